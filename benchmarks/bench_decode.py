@@ -0,0 +1,137 @@
+"""Benchmark for photo decoding and model preprocessing.
+
+Compares the old path (full resolution decode, resize, crop, float copy per
+image) against photo_inference.decode_image's draft decode followed by
+room_backends.preprocess, on synthetic 4K JPEGs. Each variant runs in its own
+process so its peak RSS is not polluted by the other.
+
+    uv run python benchmarks/bench_decode.py --width 3840 --height 2160 --batch 16
+
+Prints one JSON object per variant.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+from typing import List
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+from renovation_tracker import photo_inference, room_backends
+from renovation_tracker.model_registry import ROOM_IMGSZ
+
+
+def make_jpeg(width: int, height: int, seed: int) -> bytes:
+    rng = np.random.default_rng(seed)
+    # blurred noise compresses like a photo instead of like static
+    small = rng.integers(0, 256, (height // 16, width // 16, 3), dtype=np.uint8)
+    image = Image.fromarray(small).resize((width, height), Image.BILINEAR)
+    image = image.filter(ImageFilter.GaussianBlur(2))
+    out = BytesIO()
+    image.save(out, "JPEG", quality=90)
+    return out.getvalue()
+
+
+def old_decode(data: bytes) -> Image.Image:
+    return Image.open(BytesIO(data)).convert("RGB")
+
+
+def old_preprocess(images: List[Image.Image], imgsz: int = ROOM_IMGSZ) -> np.ndarray:
+    """Resize, crop and convert each image separately, as before draft decoding."""
+    batch = []
+    for image in images:
+        w, h = image.size
+        if w <= h:
+            size = (imgsz, int(imgsz * h / w))
+        else:
+            size = (int(imgsz * w / h), imgsz)
+        image = image.resize(size, Image.BILINEAR)
+        left = int(round((size[0] - imgsz) / 2))
+        top = int(round((size[1] - imgsz) / 2))
+        image = image.crop((left, top, left + imgsz, top + imgsz))
+        batch.append(np.asarray(image, dtype=np.float32).transpose(2, 0, 1) / 255)
+    return np.stack(batch)
+
+
+VARIANTS = {
+    "full decode": lambda blobs: old_preprocess([old_decode(b) for b in blobs]),
+    "draft decode": lambda blobs: room_backends.preprocess(
+        [photo_inference.decode_image(b) for b in blobs]
+    ),
+}
+
+
+def run_variant(name: str, args) -> dict:
+    blobs = [p.read_bytes() for p in sorted(Path(args.images).glob("*.jpg"))]
+    fn = VARIANTS[name]
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    fn(blobs)  # warm up
+    times = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        batch = fn(blobs)
+        times.append((time.perf_counter() - start) * 1000)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "bench": "decode",
+        "variant": name,
+        "image": f"{args.width}x{args.height}",
+        "jpeg_kb": round(sum(map(len, blobs)) / len(blobs) / 1024, 1),
+        "batch": args.batch,
+        "shape": list(batch.shape),
+        "median_ms": round(statistics.median(times), 2),
+        "per_image_ms": round(statistics.median(times) / args.batch, 2),
+        "peak_rss_mb": round(peak_kb / 1024, 1),
+        "peak_rss_growth_mb": round((peak_kb - baseline_kb) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=3840)
+    parser.add_argument("--height", type=int, default=2160)
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--variant", choices=VARIANTS, help=argparse.SUPPRESS)
+    parser.add_argument("--images", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(run_variant(args.variant, args)))
+        return
+    # encode once here, so building the 4K images does not count towards
+    # the peak RSS of the variants
+    with tempfile.TemporaryDirectory() as images:
+        for seed in range(args.batch):
+            Path(images, f"{seed:03}.jpg").write_bytes(
+                make_jpeg(args.width, args.height, seed)
+            )
+        for name in VARIANTS:
+            result = subprocess.run(
+                [
+                    sys.executable,
+                    __file__,
+                    *sys.argv[1:],
+                    "--variant",
+                    name,
+                    "--images",
+                    images,
+                ],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            print(result.stdout.strip())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Micro-benchmark for listing page parsing.
+
+Compares the old full-tree parse (html.parser + lambda search over every <li>)
+against listing_extractor.parse_listing on the saved listing page. Real
+listing pages are around a megabyte, so the fixture is padded with copies of
+its unrelated sections to reach that size.
+
+    uv run python benchmarks/bench_extractor.py --pad 120
+
+Prints one JSON object per parser.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from renovation_tracker import listing_extractor
+
+FIXTURE = Path(__file__).parent / "fixtures" / "homes_listing.html"
+
+
+def padded_page(pad: int) -> str:
+    html = FIXTURE.read_text(encoding="utf-8")
+    filler = re.search(
+        r'<section class="schools">.*?<section class="similar-homes">.*?</section>',
+        html,
+        re.S,
+    ).group(0)
+    return html.replace("</main>", filler * pad + "</main>")
+
+
+def old_parse(html: str):
+    """The parse url_listing did before listing_extractor existed."""
+    soup = BeautifulSoup(html, "html.parser")
+    address = soup.find("span", {"class": "property-info-address-main"})
+    city_state = soup.find("span", {"class": "property-info-address-citystatezip"})
+    city_state_zip = ""
+    for child in city_state:
+        city_state_zip += child.get_text(strip=True) + " "
+    description = soup.find("p", {"class": "ldp-description-text"})
+    price = soup.find("span", {"class": "property-info-price"})
+    features = soup.find_all("span", {"class": "property-info-feature"})
+    beds = features[0].find("span", {"class": "property-info-feature-detail"})
+    baths = features[1].find("span", {"class": "property-info-feature-detail"})
+    year_container = soup.find(
+        lambda tag: tag.name == "li"
+        and "amenities-detail" in tag.get("class", [])
+        and "Built in" in tag.text
+    )
+    images = [
+        img.get("src") or img.get("data-src")
+        for img in soup.find_all("img", {"class": "primary-carousel-slide-img"})
+    ]
+    return (
+        address.get_text(strip=True) + " " + city_state_zip,
+        description.get_text(strip=True),
+        price.get_text(strip=True),
+        beds.get_text(strip=True),
+        baths.get_text(strip=True),
+        year_container.get_text(" ", strip=True),
+        images,
+    )
+
+
+def measure(name: str, fn, html: str, repeat: int) -> dict:
+    fn(html)  # warm up
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(html)
+        times.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "bench": "extractor",
+        "parser": name,
+        "page_kb": round(len(html) / 1024, 1),
+        "repeat": repeat,
+        "median_ms": round(statistics.median(times), 2),
+        "min_ms": round(min(times), 2),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pad", type=int, default=120, help="filler copies to add")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    html = padded_page(args.pad)
+    for name, fn in (
+        ("html.parser full tree", old_parse),
+        ("listing_extractor", listing_extractor.parse_listing),
+    ):
+        print(json.dumps(measure(name, fn, html, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Import-time profile of the API and the CLI entry points.
+
+Imports each module in a fresh interpreter under `python -X importtime` and
+reports the median cumulative import time, the slowest packages it pulled
+in, any heavy optional dependency (selenium, bs4, numpy, PIL, torch, ...)
+that should have waited for the feature that needs it, and the ratio to the
+framework floor: the import time of fastapi, sqlalchemy and httpx, measured
+the same way. DATABASE_URL points at a SQLite file in a directory that does
+not exist, so an import that touches the database fails.
+
+    uv run python benchmarks/bench_import_time.py
+    uv run python benchmarks/bench_import_time.py --repeat 10 --top 15
+
+The budget itself is enforced by tests/test_import_time.py, as a ratio to
+the floor so that it holds on slow and fast machines alike.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+MODULES = (
+    "renovation_tracker.main",
+    "renovation_tracker.db_admin",
+    "renovation_tracker.bulk_import",
+)
+HEAVY = (
+    "selenium",
+    "webdriver_manager",
+    "bs4",
+    "soupsieve",
+    "lxml",
+    "numpy",
+    "PIL",
+    "torch",
+    "torchvision",
+    "ultralytics",
+    "onnxruntime",
+    "cv2",
+)
+FLOOR = ("fastapi", "sqlalchemy", "httpx")
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+
+def import_times(statement: str) -> Dict[str, int]:
+    """Cumulative microseconds of every module `statement` imports."""
+    env = {
+        **os.environ,
+        "DATABASE_URL": "sqlite:////nonexistent-renovation-bench/import.db",
+        "MODEL_PRELOAD": "0",
+        "PYTHONPATH": os.pathsep.join(
+            filter(None, [str(SRC), os.environ.get("PYTHONPATH")])
+        ),
+    }
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if result.returncode:
+        raise RuntimeError(f"{statement} failed:\n{result.stderr[-2000:]}")
+    times: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def floor_us(repeat: int) -> float:
+    return statistics.median(
+        sum(import_times(f"import {', '.join(FLOOR)}")[name] for name in FLOOR)
+        for _ in range(repeat)
+    )
+
+
+def measure(module: str, repeat: int, top: int, floor: float) -> dict:
+    totals: List[int] = []
+    for _ in range(repeat):
+        times = import_times(f"import {module}")
+        totals.append(times[module])
+    heavy = sorted(
+        {name.split(".")[0] for name in times if name.split(".")[0] in HEAVY}
+    )
+    # top level packages only, their cumulative time covers their submodules
+    slowest = sorted(
+        ((name, us) for name, us in times.items() if "." not in name and name != module),
+        key=lambda item: item[1],
+        reverse=True,
+    )[:top]
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(totals) / 1000, 1),
+        "min_ms": round(min(totals) / 1000, 1),
+        "floor_ratio": round(statistics.median(totals) / floor, 2),
+        "modules": len(times),
+        "heavy": heavy,
+        "slowest": {name: round(us / 1000, 1) for name, us in slowest},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=list(MODULES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    floor = floor_us(args.repeat)
+    print(json.dumps({"floor": list(FLOOR), "median_ms": round(floor / 1000, 1)}))
+    for module in args.modules:
+        print(json.dumps(measure(module, args.repeat, args.top, floor)))
+
+
+if __name__ == "__main__":
+    main()
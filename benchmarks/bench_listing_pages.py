@@ -0,0 +1,136 @@
+"""Benchmark for paging through GET /listings on a large table.
+
+Fills a throwaway SQLite database with --rows listings (one million by
+default) and times a page read at increasing depths, comparing the router's
+keyset query (listings_router.listings_page) with the LIMIT/OFFSET query it
+replaces, unfiltered and with the zip and price filters. Keyset latency should
+stay flat however deep the page is, while OFFSET grows with depth.
+
+    uv run python benchmarks/bench_listing_pages.py --rows 1000000
+
+Prints one JSON object per query and depth, including SQLite's query plan.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+# the app's engine is never used, the benchmark makes its own
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, func, insert, select, text
+from sqlalchemy.orm import Session
+
+import renovation_tracker.models as models
+from renovation_tracker.pydantic_models.listings import ListingFilters
+from renovation_tracker.routers.listings_router import filter_listings, listings_page
+
+DEPTHS = (0.0, 0.25, 0.5, 0.75, 0.99)
+ZIP_CODES = [f"{22000 + i}" for i in range(200)]
+
+
+def fill(engine, rows: int, chunk: int = 50_000):
+    models.Base.metadata.create_all(engine)
+    rng = random.Random(0)
+    with engine.begin() as conn:
+        for start in range(0, rows, chunk):
+            batch = []
+            for i in range(start, min(start + chunk, rows)):
+                zip_code = rng.choice(ZIP_CODES)
+                batch.append(
+                    {
+                        "url": f"https://www.homes.com/property/{i}/",
+                        "address": f"{i} Main St Springfield, VA {zip_code}",
+                        "description": "Renovated kitchen and new roof.",
+                        "price": rng.randrange(100_000, 2_000_000, 1_000),
+                        "bedroom": rng.randint(1, 6),
+                        "bathroom": rng.randint(1, 4),
+                        "year_built": rng.randint(1900, 2025),
+                        "zip_code": zip_code,
+                    }
+                )
+            conn.execute(insert(models.Listing), batch)
+
+
+def keyset_at(session: Session, filters: ListingFilters, depth: float, rows: int):
+    # the cursor a client would hold after paging `depth` of the way through
+    cursor = int(rows * depth) or None
+    return listings_page(filters, cursor, 25)
+
+
+def offset_at(session: Session, filters: ListingFilters, depth: float, rows: int):
+    # the old style, skip the rows before the page; for filtered reads the
+    # offset is scaled by how many rows the filter keeps
+    query = filter_listings(select(models.Listing), filters)
+    matching = session.scalar(select(func.count()).select_from(query.subquery()))
+    return (
+        query.order_by(models.Listing.listing_id)
+        .offset(int(matching * depth))
+        .limit(25)
+    )
+
+
+def plan(session: Session, query) -> str:
+    compiled = query.compile(session.bind, compile_kwargs={"literal_binds": True})
+    rows = session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return "; ".join(row[-1] for row in rows)
+
+
+def measure(session: Session, query, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        session.scalars(query).all()
+        times.append((time.perf_counter() - start) * 1000)
+        session.expunge_all()
+    return round(statistics.median(times), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db", type=Path, help="reuse this SQLite file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.db or Path(tmp) / "listings.db"
+        reuse = path.exists()
+        engine = create_engine(f"sqlite:///{path}")
+        if not reuse:
+            start = time.perf_counter()
+            fill(engine, args.rows)
+            fill_s = round(time.perf_counter() - start, 1)
+            print(json.dumps({"bench": "listing_pages", "fill_s": fill_s}))
+        cases = {
+            "unfiltered": ListingFilters(),
+            "zip_code": ListingFilters(zip_code=ZIP_CODES[7]),
+            "price_range": ListingFilters(min_price=400_000, max_price=450_000),
+        }
+        with Session(engine) as session:
+            rows = session.scalar(select(func.max(models.Listing.listing_id)))
+            for case, filters in cases.items():
+                for strategy, build in (("keyset", keyset_at), ("offset", offset_at)):
+                    for depth in DEPTHS:
+                        query = build(session, filters, depth, rows)
+                        result = {
+                            "bench": "listing_pages",
+                            "rows": rows,
+                            "filter": case,
+                            "strategy": strategy,
+                            "depth": depth,
+                            "median_ms": measure(session, query, args.repeat),
+                            "plan": plan(session, query),
+                        }
+                        print(json.dumps(result))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
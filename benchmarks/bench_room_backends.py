@@ -0,0 +1,204 @@
+"""Parity check and latency benchmark for the room classifier backends.
+
+Runs every available backend (torch, onnx, openvino, and their INT8 exports)
+over a folder of room photos, reports load time, per-batch latency and
+throughput, and how often each backend's top-1 label matches the torch
+model's. Exports come from `uv run model-export`; backends whose runtime or
+export is missing are reported as skipped.
+
+Photos filed in one folder per room label (rooms/Kitchen/*.jpg,
+rooms/Bathroom/*.jpg, ...) are also scored against their label, so an
+export that loses accuracy shows up even where it agrees with torch.
+
+    uv run python benchmarks/bench_room_backends.py
+    uv run python benchmarks/bench_room_backends.py --images path/to/rooms
+    uv run python benchmarks/bench_room_backends.py --latency-only
+
+By default it runs over benchmarks/fixtures/rooms, a small synthetic set (flat
+walls, a floor and furniture blocks in each room's colours) written by
+--write-fixtures. It is enough to catch an export or preprocessing change
+that moves labels; accuracy figures only mean something on real photos.
+
+Prints one JSON object per backend and exits with status 1 when a backend
+agrees with torch on fewer than --min-agreement of the images, or loses more
+than --max-accuracy-drop of torch's accuracy on labelled photos. Parity needs
+real photos. Without any it refuses to run, unless --latency-only times the
+runtimes on noise and skips the parity checks.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from renovation_tracker import room_backends
+from renovation_tracker.pydantic_models.photos import Room
+
+FIXTURES = Path(__file__).parent / "fixtures" / "rooms"
+VARIANTS = {
+    "torch": ("torch", False),
+    "onnx": ("onnx", False),
+    "onnx-int8": ("onnx", True),
+    "openvino": ("openvino", False),
+    "openvino-int8": ("openvino", True),
+}
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+# wall, floor and furniture colours of the synthetic fixture rooms
+PALETTES = {
+    Room.LIVING_ROOM: ((225, 215, 195), (140, 100, 60), (90, 110, 140)),
+    Room.DINING_ROOM: ((235, 225, 210), (120, 80, 50), (70, 45, 30)),
+    Room.BEDROOM: ((200, 205, 225), (170, 150, 120), (240, 240, 235)),
+    Room.BATHROOM: ((240, 240, 245), (200, 200, 205), (250, 250, 250)),
+    Room.KITCHEN: ((245, 240, 230), (160, 160, 155), (60, 60, 65)),
+    Room.HOME_EXTERIOR: ((135, 180, 230), (80, 140, 60), (170, 120, 90)),
+}
+FIXTURES_PER_ROOM = 4
+
+
+def load_images(folder: Path, count: int):
+    """Photos under `folder` and their labels (None outside a label folder)."""
+    paths = sorted(p for p in folder.rglob("*") if p.suffix.lower() in IMAGE_SUFFIXES)
+    labels = {room.value for room in Room}
+    return [Image.open(p).convert("RGB") for p in paths[:count]], [
+        p.parent.name if p.parent.name in labels else None for p in paths[:count]
+    ]
+
+
+def noise_images(count: int):
+    rng = np.random.default_rng(0)
+    return [
+        Image.fromarray(rng.integers(0, 256, (480, 640, 3), dtype=np.uint8))
+        for _ in range(count)
+    ]
+
+
+def synthetic_room(room: Room, seed: int) -> Image.Image:
+    """A 320x240 room-like scene: wall, floor and a few furniture blocks."""
+    rng = np.random.default_rng(seed)
+    wall, floor, furniture = (np.array(c, dtype=np.float64) for c in PALETTES[room])
+    h, w = 240, 320
+    horizon = int(rng.integers(120, 170))
+    pixels = np.empty((h, w, 3))
+    pixels[:horizon] = wall
+    pixels[horizon:] = floor
+    # light falling off towards one side of the room
+    pixels *= np.linspace(1.0, rng.uniform(0.7, 0.9), w)[None, :, None]
+    for _ in range(int(rng.integers(2, 5))):
+        x0, y0 = int(rng.integers(0, w - 60)), int(rng.integers(horizon - 80, horizon))
+        x1, y1 = x0 + int(rng.integers(40, 120)), y0 + int(rng.integers(40, 100))
+        pixels[y0:y1, x0:x1] = furniture * rng.uniform(0.8, 1.1)
+    pixels += rng.normal(0, 6, pixels.shape)
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+
+def write_fixtures(folder: Path):
+    for r, room in enumerate(Room):
+        (folder / room.value).mkdir(parents=True, exist_ok=True)
+        for i in range(FIXTURES_PER_ROOM):
+            image = synthetic_room(room, seed=r * FIXTURES_PER_ROOM + i)
+            image.save(folder / room.value / f"{i}.jpg", quality=85)
+
+
+def accuracy(predicted, truth):
+    scored = [(p, t) for p, t in zip(predicted, truth) if t is not None]
+    return sum(p == t for p, t in scored) / len(scored) if scored else None
+
+
+def run(variant: str, images, batch: int, repeat: int):
+    backend, int8 = VARIANTS[variant]
+    start = time.perf_counter()
+    classifier = room_backends.load_classifier(backend, int8)
+    load_ms = (time.perf_counter() - start) * 1000
+    classifier.classify(images[:batch])  # warm up
+    times, labels = [], []
+    for r in range(repeat):
+        labels = []
+        for i in range(0, len(images), batch):
+            start = time.perf_counter()
+            labels += classifier.classify(images[i : i + batch])
+            times.append((time.perf_counter() - start) * 1000)
+    total_s = sum(times) / 1000
+    return labels, {
+        "load_ms": round(load_ms, 1),
+        "batch_median_ms": round(statistics.median(times), 2),
+        "batch_p95_ms": round(sorted(times)[int(len(times) * 0.95)], 2),
+        "images_per_s": round(len(images) * repeat / total_s, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=Path, default=FIXTURES)
+    parser.add_argument("--count", type=int, default=64, help="images to classify")
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--backends", nargs="+", choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument("--min-agreement", type=float, default=0.98)
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.01)
+    parser.add_argument(
+        "--latency-only",
+        action="store_true",
+        help="time the backends on noise when there are no photos, no parity check",
+    )
+    parser.add_argument(
+        "--write-fixtures",
+        action="store_true",
+        help=f"regenerate the synthetic photos in {FIXTURES} and exit",
+    )
+    args = parser.parse_args()
+
+    if args.write_fixtures:
+        write_fixtures(FIXTURES)
+        return
+
+    images, truth = load_images(args.images, args.count)
+    if not images:
+        if not args.latency_only:
+            sys.exit(
+                f"No photos in {args.images}, the parity check needs real room "
+                "photos (pass --images, or --latency-only to time the runtimes)"
+            )
+        images, truth = noise_images(args.count), [None] * args.count
+    parity = not args.latency_only
+    reference = reference_accuracy = None
+    failed = False
+    for variant in args.backends:
+        result = {"bench": "room_backends", "backend": variant, "images": len(images)}
+        try:
+            labels, stats = run(variant, images, args.batch, args.repeat)
+        except (ImportError, FileNotFoundError) as e:
+            result["skipped"] = str(e)
+            print(json.dumps(result))
+            continue
+        result.update(stats)
+        if not parity:
+            print(json.dumps(result))
+            continue
+        top1 = accuracy(labels, truth)
+        if top1 is not None:
+            result["top1_accuracy"] = round(top1, 4)
+        if variant == "torch":
+            reference, reference_accuracy = labels, top1
+        elif reference is not None:
+            agreement = sum(a == b for a, b in zip(labels, reference)) / len(labels)
+            result["top1_agreement"] = round(agreement, 4)
+            failed |= agreement < args.min_agreement
+            if top1 is not None:
+                result["accuracy_drop"] = round(reference_accuracy - top1, 4)
+                failed |= reference_accuracy - top1 > args.max_accuracy_drop
+        print(json.dumps(result))
+    if parity and reference is None:
+        # agreement is measured against torch, without it nothing was checked
+        print("No torch reference ran, parity was not checked", file=sys.stderr)
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Benchmark for encoding listing pages as JSON.
+
+Fills a throwaway SQLite database with 10,000 listings that each have a
+5,000 character description. Then it times reading and encoding 100, 1,000
+and 10,000 of them in three ways:
+
+- orm_pydantic: the old FastAPI path. ORM objects are validated through
+  ListingRead with from_attributes, dumped in json mode and encoded with
+  json.dumps the way JSONResponse does;
+- columns_orjson: the serialization module's path. Schema columns are zipped
+  into dicts and encoded with orjson;
+- columns_orjson_projected: the same, without the description column (what
+  GET /listings?fields=... selects).
+
+    uv run python benchmarks/bench_serialization.py --sizes 100 1000 10000
+
+Prints one JSON object per path and size: the median of the whole read, the
+encoding part of it, and the size of the body.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+# the app's engine is never used, the benchmark makes its own
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+import renovation_tracker.models as models
+from renovation_tracker import serialization
+from renovation_tracker.pydantic_models.listings import ListingRead
+
+DESCRIPTION_CHARS = 5000
+LISTINGS = TypeAdapter(list[ListingRead])
+
+
+def fill(path: Path, rows: int):
+    engine = create_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(engine)
+    rng = random.Random(0)
+    words = ["kitchen", "granite", "renovated", "bathroom", "roof", "deck", "oak"]
+    with engine.begin() as conn:
+        conn.execute(
+            insert(models.Listing),
+            [
+                {
+                    "url": f"https://www.homes.com/property/{i}/",
+                    "address": f"{i} Main St Springfield, VA 22153",
+                    "description": " ".join(rng.choices(words, k=1000))[
+                        :DESCRIPTION_CHARS
+                    ],
+                    "price": rng.randrange(100_000, 2_000_000, 1_000),
+                    "bedroom": rng.randint(1, 6),
+                    "bathroom": rng.randint(1, 4),
+                    "year_built": rng.randint(1900, 2025),
+                    "zip_code": "22153",
+                }
+                for i in range(rows)
+            ],
+        )
+    engine.dispose()
+
+
+async def orm_pydantic(db: AsyncSession, size: int):
+    listings = (
+        await db.scalars(
+            select(models.Listing).order_by(models.Listing.listing_id).limit(size)
+        )
+    ).all()
+    start = time.perf_counter()
+    content = LISTINGS.dump_python(
+        LISTINGS.validate_python(listings, from_attributes=True), mode="json"
+    )
+    body = json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+    return body, time.perf_counter() - start
+
+
+async def columns_orjson(db: AsyncSession, size: int, fields=()):
+    query = serialization.select_fields(models.Listing, ListingRead, fields)
+    rows = await serialization.fetch_dicts(
+        db, query.order_by(models.Listing.listing_id).limit(size)
+    )
+    start = time.perf_counter()
+    body = serialization.dumps(rows)
+    return body, time.perf_counter() - start
+
+
+async def columns_orjson_projected(db: AsyncSession, size: int):
+    fields = [name for name in ListingRead.model_fields if name != "description"]
+    return await columns_orjson(db, size, fields)
+
+
+async def measure(engine, path, size: int, repeat: int) -> dict:
+    totals, encodes = [], []
+    for _ in range(repeat):
+        async with AsyncSession(engine) as db:
+            start = time.perf_counter()
+            body, encode_s = await path(db, size)
+            totals.append((time.perf_counter() - start) * 1000)
+            encodes.append(encode_s * 1000)
+    return {
+        "median_ms": round(statistics.median(totals), 2),
+        "encode_ms": round(statistics.median(encodes), 2),
+        "body_kb": round(len(body) / 1024, 1),
+    }
+
+
+async def run(args, path: Path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    for size in args.sizes:
+        for build in (orm_pydantic, columns_orjson, columns_orjson_projected):
+            result = {"bench": "serialization", "path": build.__name__, "rows": size}
+            result.update(await measure(engine, build, size, args.repeat))
+            print(json.dumps(result))
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "listings.db"
+        fill(path, max(args.sizes))
+        asyncio.run(run(args, path))
+
+
+if __name__ == "__main__":
+    main()
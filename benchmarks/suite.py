@@ -0,0 +1,505 @@
+"""Offline benchmark suite for the API hot paths.
+
+Needs no network access and no model weights:
+
+- the app runs in-process through httpx's ASGI transport, with its lifespan,
+  on a throwaway SQLite database;
+- listing pages come from the saved homes.com fixture;
+- photos come from a local static HTTP server over generated JPEGs;
+- the room classifier is a tiny stand-in registered in the model registry.
+
+Benchmarks:
+
+- nlp: extract_renovations throughput over a corpus built from
+  fixtures/descriptions.jsonl;
+- extractor: listing_extractor.parse_listing on the fixture page, as saved
+  and padded to real page size;
+- crud: latency percentiles of create/read/update/list/delete with
+  --concurrency clients;
+- serialization: pages of 100 listings from GET /listings, full and
+  projected with fields=;
+- photo_inference: PUT /photos/{listing_id}/inference over --photos photos,
+  with the per-stage breakdown from the Server-Timing header.
+
+    uv run python benchmarks/suite.py --out before.json
+    uv run python benchmarks/suite.py --only crud nlp --compare before.json
+
+Every result is printed as one JSON line. --out saves them together with the
+commit and the arguments. --compare matches them against an earlier file
+and prints the change of every *_ms (lower is better) and *_per_s (higher is
+better) metric. It exits with status 1 when one got worse by more than
+--threshold.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from PIL import Image
+
+FIXTURES = Path(__file__).parent / "fixtures"
+WORKDIR = Path(tempfile.mkdtemp(prefix="renovation-bench-"))
+
+# everything the app reads at import time, pointed at throwaway local state
+os.environ.update(
+    {
+        "DATABASE_URL": f"sqlite:///{WORKDIR / 'bench.db'}",
+        "MODEL_PRELOAD": "0",
+        "SCRAPE_WORKERS": "0",
+        "SCRAPER_WARM_SESSIONS": "0",
+        # every run downloads from the image server, repeats stay comparable
+        "IMAGE_CACHE_MAX_MB": "0",
+        "METRICS_TIMING_HEADERS": "1",
+    }
+)
+os.environ["NO_PROXY"] = ",".join(
+    filter(None, [os.environ.get("NO_PROXY"), "127.0.0.1", "localhost"])
+)
+
+import httpx  # noqa: E402
+from sqlalchemy import insert, update  # noqa: E402
+
+import renovation_tracker.models as models  # noqa: E402
+from renovation_tracker import listing_extractor, model_registry  # noqa: E402
+from renovation_tracker.database import async_engine, engine  # noqa: E402
+from renovation_tracker.main import api  # noqa: E402
+from renovation_tracker.nlp_predict import extract_renovations  # noqa: E402
+from renovation_tracker.pydantic_models.photos import Room  # noqa: E402
+
+from bench_extractor import padded_page  # noqa: E402
+
+BENCHMARKS = ("nlp", "extractor", "crud", "serialization", "photo_inference")
+LONG_DESCRIPTION_CHARS = 5000
+
+
+class StandInClassifier:
+    """Deterministic room from the image's mean brightness, costs microseconds."""
+
+    labels = [room.value for room in Room]
+
+    def classify(self, images: List[Image.Image]) -> List[str]:
+        return [
+            self.labels[int(np.asarray(image.resize((8, 8))).mean()) % len(self.labels)]
+            for image in images
+        ]
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_image_server(folder: Path, count: int):
+    """Serve `count` generated listing-sized JPEGs from `folder`."""
+    folder.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(0)
+    for i in range(count):
+        # a gradient keeps the hashes apart, noise keeps the JPEGs realistic in size
+        base = np.linspace(0, 255, 1024, dtype=np.float32)[None, :, None]
+        pixels = base * rng.uniform(0.2, 1.0, (1, 1, 3)) + rng.normal(0, 24, (768, 1024, 3))
+        Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(
+            folder / f"{i}.jpg", quality=85
+        )
+    handler = functools.partial(QuietHandler, directory=str(folder))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def load_descriptions() -> List[str]:
+    with open(FIXTURES / "descriptions.jsonl", encoding="utf-8") as f:
+        return [json.loads(line)["description"] for line in f if line.strip()]
+
+
+def build_corpus(count: int, seed: int = 0) -> List[str]:
+    """Descriptions mixed from the fixture sentences, the same for every run."""
+    sentences = [
+        s.strip() + "."
+        for text in load_descriptions()
+        for s in text.split(".")
+        if s.strip()
+    ]
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(sentences, k=rng.randint(4, 12))) for _ in range(count)]
+
+
+def long_description(rng: random.Random, sentences: List[str]) -> str:
+    text = ""
+    while len(text) < LONG_DESCRIPTION_CHARS:
+        text += rng.choice(sentences) + " "
+    return text[:LONG_DESCRIPTION_CHARS]
+
+
+def percentiles(times: List[float]) -> Dict[str, float]:
+    cuts = statistics.quantiles(times, n=100) if len(times) > 1 else times * 99
+    return {
+        "p50_ms": round(cuts[49], 3),
+        "p95_ms": round(cuts[94], 3),
+        "p99_ms": round(cuts[98], 3),
+    }
+
+
+def server_timing(header: Optional[str]) -> Dict[str, float]:
+    stages = {}
+    for part in (header or "").split(","):
+        name, _, dur = part.strip().partition(";dur=")
+        if dur:
+            stages[name] = float(dur)
+    return stages
+
+
+def bench_nlp(args) -> List[dict]:
+    corpus = build_corpus(args.descriptions)
+    extract_renovations(corpus[0])  # warm up
+    times = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        for text in corpus:
+            extract_renovations(text)
+        times.append(time.perf_counter() - start)
+    best = min(times)
+    return [
+        {
+            "bench": "nlp",
+            "case": "extract_renovations",
+            "descriptions": len(corpus),
+            "median_ms": round(statistics.median(times) * 1000, 2),
+            "descriptions_per_s": round(len(corpus) / best, 1),
+        }
+    ]
+
+
+def bench_extractor(args) -> List[dict]:
+    results = []
+    for case, html in (
+        ("fixture", (FIXTURES / "homes_listing.html").read_text(encoding="utf-8")),
+        ("padded", padded_page(args.pad)),
+    ):
+        listing_extractor.parse_listing(html)  # warm up
+        times = []
+        for _ in range(args.repeat * 4):
+            start = time.perf_counter()
+            listing_extractor.parse_listing(html)
+            times.append((time.perf_counter() - start) * 1000)
+        results.append(
+            {
+                "bench": "extractor",
+                "case": case,
+                "page_kb": round(len(html) / 1024, 1),
+                "median_ms": round(statistics.median(times), 3),
+                "pages_per_s": round(1000 / min(times), 1),
+            }
+        )
+    return results
+
+
+async def bench_crud(client: httpx.AsyncClient, args) -> List[dict]:
+    corpus = build_corpus(args.concurrency * args.rounds, seed=1)
+    latencies: Dict[str, List[float]] = {
+        op: [] for op in ("create", "read", "update", "list", "delete")
+    }
+    errors = 0
+    numbers = itertools.count()
+
+    async def timed(op: str, request):
+        nonlocal errors
+        start = time.perf_counter()
+        response = await request
+        latencies[op].append((time.perf_counter() - start) * 1000)
+        if response.status_code >= 400:
+            errors += 1
+        return response
+
+    async def client_loop():
+        for _ in range(args.rounds):
+            n = next(numbers)
+            created = await timed(
+                "create",
+                client.post(
+                    "/listings/",
+                    json={
+                        "url": f"https://www.homes.com/property/bench-{n}/",
+                        "address": f"{n} Bench St Springfield, VA 22153",
+                        "description": corpus[n],
+                        "price": 400_000 + n,
+                        "bedroom": 3,
+                        "bathroom": 2,
+                        "year_built": 1990,
+                    },
+                ),
+            )
+            listing_id = created.json()["listing_id"]
+            # the 50:1 read mix of a hot listing, squeezed into one round
+            for _ in range(3):
+                await timed("read", client.get(f"/listings/{listing_id}"))
+            await timed(
+                "update",
+                client.put(f"/listings/{listing_id}", json={"price": 390_000 + n}),
+            )
+            await timed("read", client.get(f"/listings/{listing_id}"))
+            await timed("list", client.get("/listings/", params={"limit": 25}))
+            await timed("delete", client.delete(f"/listings/{listing_id}"))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(args.concurrency)))
+    wall = time.perf_counter() - start
+    requests = sum(len(times) for times in latencies.values())
+    results = [
+        {
+            "bench": "crud",
+            "case": op,
+            "concurrency": args.concurrency,
+            "requests": len(times),
+            **percentiles(times),
+        }
+        for op, times in latencies.items()
+    ]
+    results.append(
+        {
+            "bench": "crud",
+            "case": "all",
+            "concurrency": args.concurrency,
+            "requests": requests,
+            "errors": errors,
+            "requests_per_s": round(requests / wall, 1),
+        }
+    )
+    return results
+
+
+async def bench_serialization(client: httpx.AsyncClient, args) -> List[dict]:
+    rng = random.Random(2)
+    sentences = [s for text in load_descriptions() for s in text.split(". ")]
+    with engine.begin() as conn:
+        conn.execute(
+            insert(models.Listing),
+            [
+                {
+                    "url": f"https://www.homes.com/property/page-{i}/",
+                    "address": f"{i} Page Ave Springfield, VA 22153",
+                    "description": long_description(rng, sentences),
+                    "price": rng.randrange(100_000, 2_000_000, 1_000),
+                    "bedroom": rng.randint(1, 6),
+                    "bathroom": rng.randint(1, 4),
+                    "year_built": rng.randint(1900, 2025),
+                    "zip_code": "22153",
+                }
+                for i in range(args.listings)
+            ],
+        )
+    results = []
+    projected = ["price", "bedroom", "bathroom", "year_built", "zip_code"]
+    for case, fields in (("full", []), ("projected", projected)):
+        times, size = [], 0
+        for _ in range(args.repeat):
+            cursor = None
+            # walk the whole table a page at a time
+            while True:
+                params = {"limit": 100, "fields": fields}
+                if cursor:
+                    params["cursor"] = cursor
+                start = time.perf_counter()
+                response = await client.get("/listings/", params=params)
+                times.append((time.perf_counter() - start) * 1000)
+                size = max(size, len(response.content))
+                cursor = response.headers.get("x-next-cursor")
+                if cursor is None:
+                    break
+        results.append(
+            {
+                "bench": "serialization",
+                "case": case,
+                "rows_per_page": 100,
+                "pages": len(times),
+                "page_kb": round(size / 1024, 1),
+                **percentiles(times),
+            }
+        )
+    return results
+
+
+async def bench_photo_inference(client: httpx.AsyncClient, args) -> List[dict]:
+    server, base_url = start_image_server(WORKDIR / "images", args.photos)
+    try:
+        with engine.begin() as conn:
+            listing_id = conn.execute(
+                insert(models.Listing).values(
+                    url="https://www.homes.com/property/photos/",
+                    address="1 Photo Ct Springfield, VA 22153",
+                    description="Photo benchmark listing.",
+                )
+            ).inserted_primary_key[0]
+            conn.execute(
+                insert(models.Photos),
+                [
+                    {"listing_id": listing_id, "url": f"{base_url}/{i}.jpg"}
+                    for i in range(args.photos)
+                ],
+            )
+        times, stages = [], {}
+        for _ in range(args.repeat):
+            # unclassified and unhashed again, so nothing is reused between runs
+            with engine.begin() as conn:
+                conn.execute(
+                    update(models.Photos)
+                    .where(models.Photos.listing_id == listing_id)
+                    .values(room_type=None, phash=None)
+                )
+            start = time.perf_counter()
+            response = await client.put(f"/photos/{listing_id}/inference")
+            times.append((time.perf_counter() - start) * 1000)
+            body = response.json()
+            if response.status_code != 200 or body["failed"]:
+                raise RuntimeError(f"Photo inference failed: {body}")
+            for name, ms in server_timing(response.headers.get("server-timing")).items():
+                stages.setdefault(name, []).append(ms)
+        best = min(times)
+        return [
+            {
+                "bench": "photo_inference",
+                "case": "listing",
+                "photos": args.photos,
+                "median_ms": round(statistics.median(times), 2),
+                "photos_per_s": round(args.photos / best * 1000, 1),
+                **{
+                    f"{name.replace('.', '_')}_ms": round(statistics.median(ms), 2)
+                    for name, ms in stages.items()
+                    if name != "total"
+                },
+            }
+        ]
+    finally:
+        server.shutdown()
+
+
+async def run_api_benchmarks(selected: List[str], args) -> List[dict]:
+    model_registry.registry.register(model_registry.ROOM_MODEL, StandInClassifier)
+    models.Base.metadata.create_all(engine)
+    results = []
+    async with api.router.lifespan_context(api):
+        transport = httpx.ASGITransport(app=api)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=60
+        ) as client:
+            for name, bench in (
+                ("crud", bench_crud),
+                ("serialization", bench_serialization),
+                ("photo_inference", bench_photo_inference),
+            ):
+                if name in selected:
+                    for result in await bench(client, args):
+                        print(json.dumps(result), flush=True)
+                        results.append(result)
+    await async_engine.dispose()
+    engine.dispose()
+    return results
+
+
+def git_commit() -> Dict[str, object]:
+    def git(*cmd):
+        return subprocess.run(
+            ["git", *cmd], capture_output=True, text=True, cwd=Path(__file__).parent
+        ).stdout.strip()
+
+    try:
+        return {"commit": git("rev-parse", "--short", "HEAD"), "dirty": bool(git("status", "--porcelain"))}
+    except OSError:
+        return {"commit": None, "dirty": None}
+
+
+def compare(results: List[dict], baseline: List[dict], threshold: float) -> int:
+    """Print metric changes against `baseline`, return how many regressed."""
+    old = {(r["bench"], r["case"]): r for r in baseline}
+    regressions = 0
+    for result in results:
+        before = old.get((result["bench"], result["case"]))
+        if before is None:
+            continue
+        for metric, value in result.items():
+            lower_is_better = metric.endswith("_ms")
+            if not (lower_is_better or metric.endswith("_per_s")):
+                continue
+            previous = before.get(metric)
+            if not previous or not value:
+                continue
+            change = (value - previous) / previous
+            worse = change > threshold if lower_is_better else change < -threshold
+            regressions += worse
+            print(
+                json.dumps(
+                    {
+                        "bench": result["bench"],
+                        "case": result["case"],
+                        "metric": metric,
+                        "before": previous,
+                        "after": value,
+                        "change": round(change, 3),
+                        "regression": worse,
+                    }
+                )
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--descriptions", type=int, default=5000, help="nlp corpus size")
+    parser.add_argument("--pad", type=int, default=120, help="extractor page padding")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=20, help="crud rounds per client")
+    parser.add_argument("--listings", type=int, default=1000, help="serialization rows")
+    parser.add_argument("--photos", type=int, default=48)
+    parser.add_argument("--out", type=Path, help="write the results to this JSON file")
+    parser.add_argument("--compare", type=Path, help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    results = []
+    try:
+        for name, bench in (("nlp", bench_nlp), ("extractor", bench_extractor)):
+            if name in args.only:
+                for result in bench(args):
+                    print(json.dumps(result), flush=True)
+                    results.append(result)
+        results += asyncio.run(run_api_benchmarks(args.only, args))
+    finally:
+        shutil.rmtree(WORKDIR, ignore_errors=True)
+
+    if args.out:
+        report = {
+            **git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()},
+            "results": results,
+        }
+        args.out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))["results"]
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""bulk_import -- load listings, photos and renovations from NDJSON or CSV.
+
+Input is read a line at a time and validated in chunks of
+`IMPORT_CHUNK_SIZE` rows. Each chunk is written in one transaction:
+
+- one multi-row upsert of the listings on their unique address (ON DUPLICATE
+  KEY UPDATE on MySQL, ON CONFLICT on SQLite); values missing from a row keep
+  what is already stored;
+- one multi-row insert of the photos the listings do not have yet;
+- one insert or update of each listing's renovation flags.
+
+When a chunk fails, its rows are retried one at a time so the bad rows are
+reported and the rest still load. Invalid rows are reported with their line
+number and never stop the import.
+
+NDJSON rows are ListingImport objects. CSV files have a header with the
+Listing columns, plus `photos` (urls separated by "|") and `renovations`
+(renovated rooms separated by "|", e.g. "kitchen|bathroom").
+
+    uv run db-import listings.ndjson
+    uv run db-import listings.csv --chunk-size 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import Connection, bindparam, func, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+import renovation_tracker.models as models
+from renovation_tracker import listing_search
+from renovation_tracker.pydantic_models.listings import (
+    ImportResult,
+    ImportRowError,
+    ListingImport,
+)
+from renovation_tracker.pydantic_models.renovations import RenovationFlags
+
+logger = logging.getLogger(__name__)
+
+# Rows validated and written per transaction
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+# Row errors kept in the result, the count covers all of them
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))
+
+FORMATS = ("ndjson", "csv")
+LIST_SEPARATOR = "|"
+
+# Optional listing columns, an upsert never overwrites them with NULL
+OPTIONAL_COLUMNS = ("price", "bedroom", "bathroom", "year_built", "zip_code")
+RENOVATION_FLAGS = tuple(RenovationFlags.model_fields)
+
+Record = Tuple[int, object]
+
+
+def iter_ndjson(lines: Iterable[str]) -> Iterator[Record]:
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError as e:
+            yield line_no, e
+
+
+def iter_csv(lines: Iterable[str]) -> Iterator[Record]:
+    reader = csv.DictReader(lines)
+    for row in reader:
+        # empty cells are missing values, not empty strings
+        record = {k: v for k, v in row.items() if k and v not in (None, "")}
+        if "photos" in record:
+            record["photos"] = [u for u in record["photos"].split(LIST_SEPARATOR) if u]
+        if "renovations" in record:
+            rooms = record["renovations"].split(LIST_SEPARATOR)
+            record["renovations"] = {room.strip(): True for room in rooms if room}
+        yield reader.line_num, record
+
+
+def iter_records(lines: Iterable[str], fmt: str) -> Iterator[Record]:
+    if fmt == "csv":
+        return iter_csv(lines)
+    if fmt == "ndjson":
+        return iter_ndjson(lines)
+    raise ValueError(f"Unknown import format {fmt!r}, expected one of {FORMATS}")
+
+
+def validated_chunks(
+    records: Iterable[Record], size: int = IMPORT_CHUNK_SIZE
+) -> Iterator[Tuple[List[Tuple[int, ListingImport]], List[ImportRowError]]]:
+    """Chunks of (line, row) that passed validation, with the rows that did not."""
+    rows: List[Tuple[int, ListingImport]] = []
+    errors: List[ImportRowError] = []
+    for line, record in records:
+        if isinstance(record, Exception):
+            errors.append(ImportRowError(line=line, error=f"Invalid JSON: {record}"))
+        else:
+            try:
+                rows.append((line, ListingImport.model_validate(record)))
+            except ValidationError as e:
+                errors.append(ImportRowError(line=line, error=_validation_message(e)))
+        if len(rows) + len(errors) >= size:
+            yield rows, errors
+            rows, errors = [], []
+    if rows or errors:
+        yield rows, errors
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors()
+    )
+
+
+def _address_key(address: str, dialect: str) -> str:
+    # MySQL compares addresses case insensitively and ignoring trailing spaces,
+    # SQLite and PostgreSQL compare them exactly
+    if dialect == "mysql":
+        return address.rstrip().lower()
+    return address
+
+
+def _upsert_statement(conn: Connection):
+    table = models.Listing.__table__
+    dialect = conn.dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+
+        stmt = insert(table)
+        new = stmt.inserted
+    elif dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table)
+        new = stmt.excluded
+    else:
+        raise NotImplementedError(f"Bulk import does not support {dialect}")
+    values = {"url": new.url, "description": new.description}
+    values.update(
+        {name: func.coalesce(new[name], table.c[name]) for name in OPTIONAL_COLUMNS}
+    )
+    if dialect == "mysql":
+        return stmt.on_duplicate_key_update(values)
+    return stmt.on_conflict_do_update(index_elements=["address"], set_=values)
+
+
+def write_rows(conn: Connection, rows: List[ListingImport]):
+    """Upsert `rows` with their photos and renovations, in the caller's transaction."""
+    listings = [
+        {
+            **row.model_dump(include=set(models.Listing.__table__.columns.keys())),
+            "zip_code": models.zip_code_from(row.address),
+        }
+        for row in rows
+    ]
+    upsert = _upsert_statement(conn)
+    dialect = conn.dialect.name
+    if dialect == "mysql":
+        # no RETURNING, read the ids back under MySQL's address comparison
+        conn.execute(upsert, listings)
+        ids: Dict[str, int] = {
+            _address_key(address, dialect): listing_id
+            for listing_id, address in conn.execute(
+                select(models.Listing.listing_id, models.Listing.address).where(
+                    models.Listing.address.in_([row.address for row in rows])
+                )
+            )
+        }
+        listing_ids = [ids[_address_key(row.address, dialect)] for row in rows]
+    else:
+        # the ids of the rows each listing was written to, in row order
+        listing_ids = list(
+            conn.scalars(
+                upsert.returning(
+                    models.Listing.__table__.c.listing_id, sort_by_parameter_order=True
+                ),
+                listings,
+            )
+        )
+
+    photos = models.Photos.__table__
+    with_photos = [lid for lid, row in zip(listing_ids, rows) if row.photos]
+    if with_photos:
+        existing = set(
+            conn.execute(
+                select(photos.c.listing_id, photos.c.url).where(
+                    photos.c.listing_id.in_(with_photos)
+                )
+            )
+        )
+        new_photos = []
+        for listing_id, row in zip(listing_ids, rows):
+            for url in dict.fromkeys(row.photos):
+                if (listing_id, url) not in existing:
+                    new_photos.append({"listing_id": listing_id, "url": url})
+        if new_photos:
+            conn.execute(photos.insert(), new_photos)
+
+    renovations = models.Renovations.__table__
+    flagged = {
+        lid: row.renovations.model_dump()
+        for lid, row in zip(listing_ids, rows)
+        if row.renovations is not None
+    }
+    if flagged:
+        existing = set(
+            conn.scalars(
+                select(renovations.c.listing_id).where(
+                    renovations.c.listing_id.in_(list(flagged))
+                )
+            )
+        )
+        inserts = [
+            {"listing_id": lid, **flags}
+            for lid, flags in flagged.items()
+            if lid not in existing
+        ]
+        updates = [
+            {"b_listing_id": lid, **flags}
+            for lid, flags in flagged.items()
+            if lid in existing
+        ]
+        if inserts:
+            conn.execute(renovations.insert(), inserts)
+        if updates:
+            conn.execute(
+                update(renovations)
+                .where(renovations.c.listing_id == bindparam("b_listing_id"))
+                .values({name: bindparam(name) for name in RENOVATION_FLAGS}),
+                updates,
+            )
+
+
+def _db_error(error: SQLAlchemyError) -> str:
+    return str(getattr(error, "orig", None) or error).splitlines()[0]
+
+
+def import_chunk(
+    conn: Connection, rows: List[Tuple[int, ListingImport]]
+) -> Tuple[int, List[ImportRowError]]:
+    """Write one validated chunk, returning how many rows loaded and the failures."""
+    if not rows:
+        return 0, []
+    # the same address twice in a chunk would hit the upsert twice, keep the last
+    dialect = conn.dialect.name
+    latest = {_address_key(row.address, dialect): (line, row) for line, row in rows}
+    rows = list(latest.values())
+    try:
+        with conn.begin():
+            write_rows(conn, [row for _, row in rows])
+        imported, errors = len(rows), []
+    except SQLAlchemyError as e:
+        logger.info("Import chunk failed (%s), retrying row by row", _db_error(e))
+        imported, errors = _import_one_by_one(conn, rows)
+    # Core writes skip the ORM events that keep the search fallback current
+    listing_search.invalidate()
+    return imported, errors
+
+
+def _import_one_by_one(
+    conn: Connection, rows: List[Tuple[int, ListingImport]]
+) -> Tuple[int, List[ImportRowError]]:
+    imported = 0
+    errors: List[ImportRowError] = []
+    for line, row in rows:
+        try:
+            with conn.begin():
+                write_rows(conn, [row])
+            imported += 1
+        except SQLAlchemyError as e:
+            errors.append(ImportRowError(line=line, error=_db_error(e)))
+    return imported, errors
+
+
+def add_to_result(
+    result: ImportResult, imported: int, errors: List[ImportRowError], rows: int
+):
+    result.rows += rows
+    result.imported += imported
+    result.failed += len(errors)
+    room = IMPORT_MAX_ERRORS - len(result.errors)
+    if room > 0:
+        result.errors.extend(errors[:room])
+
+
+def import_lines(
+    conn: Connection,
+    lines: Iterable[str],
+    fmt: str,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> ImportResult:
+    result = ImportResult()
+    for rows, errors in validated_chunks(iter_records(lines, fmt), chunk_size):
+        imported, failed = import_chunk(conn, rows)
+        add_to_result(result, imported, errors + failed, len(rows) + len(errors))
+    return result
+
+
+def guess_format(name: Optional[str]) -> str:
+    if name and name.lower().endswith(".csv"):
+        return "csv"
+    return "ndjson"
+
+
+def main():
+    from renovation_tracker.database import engine
+
+    parser = argparse.ArgumentParser(description="Bulk import listings")
+    parser.add_argument("path", help="NDJSON or CSV file, - for stdin")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the extension")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    fmt = args.format or guess_format(args.path)
+    if args.path == "-":
+        source = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+    else:
+        source = open(args.path, encoding="utf-8", newline="")
+    with source, engine.connect() as conn:
+        result = import_lines(conn, source, fmt, args.chunk_size)
+    for error in result.errors:
+        print(f"line {error.line}: {error.error}", file=sys.stderr)
+    print(result.model_dump_json(exclude={"errors"}))
+    sys.exit(1 if result.failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from dotenv import load_dotenv
 import os
 from pathlib import Path
+from renovation_tracker import metrics
 
 env_path = Path(__file__).parent / ".env"
 load_dotenv(dotenv_path=env_path)
@@ -11,11 +14,42 @@ load_dotenv()
 
 URL = os.getenv("DATABASE_URL")
 
+# Async drivers used by the API for each sync driver in DATABASE_URL
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str):
+    sync_url = make_url(url)
+    return sync_url.set(
+        drivername=ASYNC_DRIVERS.get(sync_url.drivername, sync_url.drivername)
+    )
+
+
+ASYNC_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(URL)
+
+# Sync engine for the db-* CLI scripts
 engine = create_engine(URL)
 
 Session = sessionmaker(bind=engine, autoflush=True)
 Base = declarative_base()
 
+# Async engine used by the API routers
+async_engine = create_async_engine(ASYNC_URL, pool_pre_ping=True)
+
+# Query timings and pool stats for /metrics
+metrics.instrument_engine(engine, "sync")
+metrics.instrument_engine(async_engine.sync_engine, "async")
+metrics.instrument_sessions()
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=True, expire_on_commit=False
+)
+
 
 def get_db():
     db = Session()
@@ -23,3 +57,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,183 @@
+"""driver_pool -- bounded pool of warm headless Chrome sessions for scraping.
+
+Starting Chrome (and resolving the chromedriver binary) costs seconds, so the
+API keeps a small number of browser sessions alive and hands them out to the
+scraping helpers. Sessions are health checked on checkout and recycled after
+`max_pages` page loads so a leaking tab cannot grow forever.
+"""
+from __future__ import annotations
+
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator, Optional
+
+from renovation_tracker import metrics
+
+if TYPE_CHECKING:
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service as ChromeService
+
+POOL_SIZE = int(os.getenv("SCRAPER_POOL_SIZE", "2"))
+MAX_PAGES = int(os.getenv("SCRAPER_MAX_PAGES", "50"))
+CHECKOUT_TIMEOUT = float(os.getenv("SCRAPER_CHECKOUT_TIMEOUT", "30"))
+# Sessions launched at app startup, 0 leaves the pool to fill on demand
+WARM_SESSIONS = int(os.getenv("SCRAPER_WARM_SESSIONS", str(POOL_SIZE)))
+PAGE_LOAD_TIMEOUT = 15
+
+
+class DriverPoolTimeout(Exception):
+    """Raised when no browser session frees up within the checkout timeout."""
+
+
+class _PooledDriver:
+    def __init__(self, driver: webdriver.Chrome):
+        self.driver = driver
+        self.pages = 0
+
+
+def chrome_options() -> Options:
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1280,1024")
+    # image urls are read from the DOM, the bytes themselves are never needed
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    return options
+
+
+class DriverPool:
+    def __init__(
+        self,
+        size: int = POOL_SIZE,
+        max_pages: int = MAX_PAGES,
+        checkout_timeout: float = CHECKOUT_TIMEOUT,
+    ):
+        self.size = size
+        self.max_pages = max_pages
+        self.checkout_timeout = checkout_timeout
+        self._idle: queue.LifoQueue[_PooledDriver] = queue.LifoQueue()
+        # Bounds the number of Chrome processes that can exist at once
+        self._slots = threading.BoundedSemaphore(size)
+        self._driver_path: Optional[str] = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _service(self) -> ChromeService:
+        from selenium.webdriver.chrome.service import Service as ChromeService
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        # Resolve the chromedriver binary once instead of on every scrape
+        with self._lock:
+            if self._driver_path is None:
+                self._driver_path = ChromeDriverManager().install()
+        return ChromeService(self._driver_path)
+
+    def _create(self) -> _PooledDriver:
+        # Imported on the first browser launch, so processes that never scrape
+        # (and the API until its first browser scrape) skip selenium entirely
+        from selenium import webdriver
+
+        with metrics.stage("scrape.driver_start"):
+            driver = webdriver.Chrome(service=self._service(), options=chrome_options())
+        driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+        return _PooledDriver(driver)
+
+    @staticmethod
+    def _is_alive(pooled: _PooledDriver) -> bool:
+        try:
+            pooled.driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(pooled: _PooledDriver):
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+
+    def start(self, warm: Optional[int] = None):
+        """Launch `warm` sessions up front (defaults to the pool size)."""
+        count = self.size if warm is None else min(warm, self.size)
+        for _ in range(count):
+            self._idle.put(self._create())
+
+    def stats(self) -> dict:
+        return {"size": self.size, "idle": self._idle.qsize()}
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._quit(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+    @contextmanager
+    def driver(self) -> Iterator[webdriver.Chrome]:
+        """Check out a browser session, returning it to the pool afterwards."""
+        with metrics.stage("scrape.driver_wait"):
+            acquired = self._slots.acquire(timeout=self.checkout_timeout)
+        if not acquired:
+            raise DriverPoolTimeout(
+                f"No browser session available after {self.checkout_timeout}s"
+            )
+        pooled = None
+        try:
+            pooled = self._checkout()
+            yield pooled.driver
+        finally:
+            if pooled is not None:
+                pooled.pages += 1
+                self._checkin(pooled)
+            self._slots.release()
+
+    def _checkout(self) -> _PooledDriver:
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                return self._create()
+            if self._is_alive(pooled):
+                return pooled
+            self._quit(pooled)
+
+    def _checkin(self, pooled: _PooledDriver):
+        if self._closed or pooled.pages >= self.max_pages:
+            self._quit(pooled)
+            return
+        try:
+            # stop any scripts still running on the last page, doubles as a health check
+            pooled.driver.get("about:blank")
+        except Exception:
+            self._quit(pooled)
+            return
+        self._idle.put(pooled)
+
+
+_pool: Optional[DriverPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_driver_pool() -> DriverPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool()
+        return _pool
+
+
+def close_driver_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
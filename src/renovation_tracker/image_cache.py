@@ -0,0 +1,279 @@
+"""image_cache -- disk-backed LRU cache of downloaded listing photos.
+
+Photo bytes are stored once per content hash under `IMAGE_CACHE_DIR/blobs`,
+and a small sqlite index maps each url to its blob together with the ETag and
+Last-Modified the CDN sent. Entries younger than `IMAGE_CACHE_MAX_AGE` are
+served without touching the network. Older ones are revalidated with
+If-None-Match/If-Modified-Since, so a 304 costs no download. When the blobs
+outgrow `IMAGE_CACHE_MAX_MB`, the least recently used ones are evicted.
+
+Re-running inference after a model upgrade, or re-scraping a listing whose
+CDN urls did not change, then reads the photos from disk.
+
+The cache itself is blocking (sqlite and file I/O). `aget` runs those parts
+in the threadpool and only awaits the download on the event loop.
+
+Several workers can share one `IMAGE_CACHE_DIR`. The size bound is checked
+against the index (`SUM(size)`), not a per-process counter, and a store picks
+and deletes its eviction victims in the same write transaction
+(`BEGIN IMMEDIATE`), so workers neither overshoot the bound nor evict the
+same blob twice.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional
+
+import httpx
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+IMAGE_CACHE_DIR = Path(os.getenv("IMAGE_CACHE_DIR", ".image_cache"))
+# Total size of cached photos, 0 disables the cache
+IMAGE_CACHE_MAX_MB = int(os.getenv("IMAGE_CACHE_MAX_MB", "2048"))
+# Seconds an entry is trusted before it is revalidated with the CDN
+IMAGE_CACHE_MAX_AGE = float(os.getenv("IMAGE_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    checked_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_entries_digest ON entries (digest);
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_blobs_accessed_at ON blobs (accessed_at);
+"""
+
+
+class Entry(NamedTuple):
+    digest: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    checked_at: float
+
+
+class ImageCache:
+    def __init__(self, root: Path, max_bytes: int, max_age: float):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        (root / "blobs").mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(
+            root / "index.sqlite", check_same_thread=False, isolation_level=None
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.root / "blobs" / digest[:2] / digest
+
+    def lookup(self, url: str) -> Optional[Entry]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT digest, etag, last_modified, checked_at FROM entries WHERE url = ?",
+                (url,),
+            ).fetchone()
+        return Entry(*row) if row else None
+
+    def read(self, entry: Entry) -> Optional[bytes]:
+        try:
+            return self._blob_path(entry.digest).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def is_fresh(self, entry: Entry) -> bool:
+        return time.time() - entry.checked_at < self.max_age
+
+    @staticmethod
+    def conditional_headers(entry: Entry) -> Dict[str, str]:
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def touch(self, url: str, entry: Entry, revalidated: bool = False):
+        now = time.time()
+        with self._lock:
+            if revalidated:
+                self._db.execute(
+                    "UPDATE entries SET checked_at = ? WHERE url = ?", (now, url)
+                )
+            self._db.execute(
+                "UPDATE blobs SET accessed_at = ? WHERE digest = ?", (now, entry.digest)
+            )
+
+    def _write_blob(self, digest: str, data: bytes):
+        path = self._blob_path(digest)
+        path.parent.mkdir(exist_ok=True)
+        # write then rename so readers never see a partial blob
+        tmp = path.with_name(f"{digest}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def store(self, url: str, data: bytes, etag: Optional[str], last_modified: Optional[str]):
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not path.exists():
+            self._write_blob(digest, data)
+        now = time.time()
+        with self._lock:
+            # one writer across every process sharing the directory
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                # another worker may have evicted the blob since it was written
+                if not path.exists():
+                    self._write_blob(digest, data)
+                self._db.execute(
+                    "INSERT INTO blobs (digest, size, accessed_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT (digest) DO UPDATE SET accessed_at = excluded.accessed_at",
+                    (digest, len(data), now),
+                )
+                self._db.execute(
+                    "INSERT OR REPLACE INTO entries (url, digest, etag, last_modified, checked_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (url, digest, etag, last_modified, now),
+                )
+                self._evict()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _evict(self):
+        # caller holds the lock and the write transaction
+        size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        while size > self.max_bytes:
+            row = self._db.execute(
+                "SELECT digest, size FROM blobs ORDER BY accessed_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            digest, blob_size = row
+            self._db.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+            self._db.execute("DELETE FROM entries WHERE digest = ?", (digest,))
+            self._blob_path(digest).unlink(missing_ok=True)
+            size -= blob_size
+            self.evictions += 1
+
+    def _cached(self, url: str):
+        """The cached entry and bytes for `url`, and whether they are fresh."""
+        entry = self.lookup(url)
+        data = self.read(entry) if entry else None
+        if data is None:
+            return None, None, False
+        return entry, data, self.is_fresh(entry)
+
+    def _finish(self, url: str, entry, data, response: httpx.Response) -> bytes:
+        if response.status_code == 304 and data is not None:
+            self.revalidated += 1
+            self.touch(url, entry, revalidated=True)
+            return data
+        response.raise_for_status()
+        self.misses += 1
+        self.store(
+            url,
+            response.content,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
+        return response.content
+
+    def get(self, url: str, client: httpx.Client) -> bytes:
+        entry, data, fresh = self._cached(url)
+        if fresh:
+            self.hits += 1
+            self.touch(url, entry)
+            return data
+        headers = self.conditional_headers(entry) if entry else {}
+        try:
+            response = client.get(url, headers=headers)
+        except httpx.TransportError as e:
+            if data is None:
+                raise
+            logger.warning("Serving stale cached image %s: %s", url, e)
+            return data
+        return self._finish(url, entry, data, response)
+
+    async def aget(self, url: str, client: httpx.AsyncClient) -> bytes:
+        entry, data, fresh = await run_in_threadpool(self._cached, url)
+        if fresh:
+            self.hits += 1
+            await run_in_threadpool(self.touch, url, entry)
+            return data
+        headers = self.conditional_headers(entry) if entry else {}
+        try:
+            response = await client.get(url, headers=headers)
+        except httpx.TransportError as e:
+            if data is None:
+                raise
+            logger.warning("Serving stale cached image %s: %s", url, e)
+            return data
+        # storing a miss writes the blob and may evict others
+        return await run_in_threadpool(self._finish, url, entry, data, response)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            blobs, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs"
+            ).fetchone()
+        return {
+            "entries": entries,
+            "blobs": blobs,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_cache: Optional[ImageCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> Optional[ImageCache]:
+    """The process wide cache, or None when IMAGE_CACHE_MAX_MB is 0."""
+    global _cache
+    if IMAGE_CACHE_MAX_MB <= 0:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ImageCache(
+                    IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_MB * 1024 * 1024, IMAGE_CACHE_MAX_AGE
+                )
+    return _cache
+
+
+def close_image_cache():
+    global _cache
+    if _cache is not None:
+        _cache.close()
+        _cache = None
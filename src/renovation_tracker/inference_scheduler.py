@@ -0,0 +1,170 @@
+"""inference_scheduler -- dynamic micro-batching in front of a model.
+
+Callers submit single inputs and get a future back. One worker thread owns
+the model: it takes the first queued input, keeps collecting until the batch
+is full or `max_wait_ms` has passed, runs the batch once and resolves every
+caller's future. Concurrent requests are coalesced into a few large batches
+instead of many threads contending for the model.
+
+A future is marked running when the worker takes it off the queue, so a
+caller that gave up before then (a cancelled `asyncio.wrap_future`, say)
+is dropped from the batch, and one that gives up later can no longer
+cancel it and the result is still delivered.
+"""
+from __future__ import annotations
+
+import bisect
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# Upper bounds of the histogram buckets, the last bucket catches the rest
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.total += value
+            self.count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            labels = [str(b) for b in self.buckets] + ["+Inf"]
+            return {
+                "buckets": dict(zip(labels, self.counts)),
+                "count": self.count,
+                "sum": round(self.total, 3),
+                "mean": round(self.total / self.count, 3) if self.count else 0.0,
+            }
+
+
+class _Request:
+    __slots__ = ("item", "future", "queued_at")
+
+    def __init__(self, item: Any):
+        self.item = item
+        self.future: Future = Future()
+        self.queued_at = time.perf_counter()
+
+
+_STOP = object()
+
+
+class BatchScheduler:
+    def __init__(
+        self,
+        run_batch: Callable[[List[Any]], List[Any]],
+        max_batch_size: int,
+        max_wait_ms: float,
+        name: str = "inference",
+    ):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.latency_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._loop, name=f"{self.name}-scheduler", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, item: Any) -> Future:
+        self.start()
+        request = _Request(item)
+        self._queue.put(request)
+        return request.future
+
+    def _collect(self, first: _Request) -> List[_Request]:
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = (
+                    self._queue.get(timeout=remaining)
+                    if remaining > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if request is _STOP:
+                # finish this batch first, then stop
+                self._queue.put(_STOP)
+                break
+            if request.future.set_running_or_notify_cancel():
+                batch.append(request)
+        return batch
+
+    def _loop(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            if not first.future.set_running_or_notify_cancel():
+                continue
+            batch = self._collect(first)
+            started = time.perf_counter()
+            for request in batch:
+                self.queue_wait_ms.observe((started - request.queued_at) * 1000)
+            try:
+                results = self.run_batch([request.item for request in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(
+                        f"{self.name}: run_batch returned {len(results)} results"
+                        f" for {len(batch)} inputs"
+                    )
+            except Exception as e:
+                self.errors += 1
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            finished = time.perf_counter()
+            self.batches += 1
+            self.items += len(batch)
+            self.batch_sizes.observe(len(batch))
+            for request, result in zip(batch, results):
+                self.latency_ms.observe((finished - request.queued_at) * 1000)
+                request.future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "errors": self.errors,
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+            "latency_ms": self.latency_ms.snapshot(),
+        }
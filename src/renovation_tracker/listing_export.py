@@ -0,0 +1,122 @@
+"""listing_export -- stream listings out as NDJSON or CSV in constant memory.
+
+Listings are read through a server-side cursor (`yield_per`), one partition
+of `EXPORT_PARTITION_SIZE` rows at a time. When photos or renovations are
+included, they are fetched for each partition with one IN query each on a
+second connection, because MySQL cannot run another query on a connection
+while its streaming cursor is open. Each partition is encoded into one chunk
+of the response, so memory stays the same whatever the table size.
+
+CSV rows use the bulk import layout (photos and renovated rooms joined with
+"|"), so an export can be loaded back with db-import.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import os
+from collections import defaultdict
+from typing import AsyncIterator, Dict, List, Sequence, Union
+
+import orjson
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+import renovation_tracker.models as models
+from renovation_tracker.bulk_import import LIST_SEPARATOR, RENOVATION_FLAGS
+from renovation_tracker.database import async_engine
+
+# Rows fetched from the cursor and written per response chunk
+EXPORT_PARTITION_SIZE = int(os.getenv("EXPORT_PARTITION_SIZE", "1000"))
+
+FORMATS = ("ndjson", "csv")
+INCLUDES = ("photos", "renovations")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+LISTING_COLUMNS = tuple(models.Listing.__table__.columns.keys())
+PHOTO_COLUMNS = ("photo_id", "url", "room_type", "phash")
+
+
+def listings_query() -> Select:
+    """Plain column select, rows come back as tuples instead of ORM objects."""
+    return select(*models.Listing.__table__.columns)
+
+
+async def _related(
+    conn: AsyncConnection, model, columns: Sequence[str], ids: List[int]
+) -> Dict[int, List[dict]]:
+    table = model.__table__
+    rows = await conn.execute(
+        select(table.c.listing_id, *(table.c[c] for c in columns))
+        .where(table.c.listing_id.in_(ids))
+        .order_by(*table.primary_key.columns)
+    )
+    grouped: Dict[int, List[dict]] = defaultdict(list)
+    for row in rows.mappings():
+        grouped[row["listing_id"]].append({c: row[c] for c in columns})
+    return grouped
+
+
+async def iter_partitions(
+    query: Select, include: Sequence[str] = ()
+) -> AsyncIterator[List[dict]]:
+    """Listings matching `query` in listing_id order, a partition at a time."""
+    query = query.order_by(models.Listing.listing_id).execution_options(
+        yield_per=EXPORT_PARTITION_SIZE
+    )
+    async with async_engine.connect() as conn, async_engine.connect() as lookup:
+        result = await conn.stream(query)
+        async for partition in result.mappings().partitions():
+            rows = [dict(row) for row in partition]
+            ids = [row["listing_id"] for row in rows]
+            if "photos" in include:
+                photos = await _related(lookup, models.Photos, PHOTO_COLUMNS, ids)
+                for row in rows:
+                    row["photos"] = photos.get(row["listing_id"], [])
+            if "renovations" in include:
+                columns = ("renovation_id", *RENOVATION_FLAGS)
+                renovations = await _related(lookup, models.Renovations, columns, ids)
+                for row in rows:
+                    row["renovations"] = renovations.get(row["listing_id"], [])
+            yield rows
+
+
+def encode_ndjson(rows: List[dict]) -> bytes:
+    return b"".join(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE) for row in rows)
+
+
+def csv_header(include: Sequence[str]) -> List[str]:
+    return [*LISTING_COLUMNS, *(name for name in INCLUDES if name in include)]
+
+
+def encode_csv(rows: List[dict], header: List[str]) -> str:
+    """CSV lines for `rows`, or the header line when there are none."""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    if not rows:
+        writer.writerow(header)
+    for row in rows:
+        if "photos" in row:
+            row["photos"] = LIST_SEPARATOR.join(p["url"] for p in row["photos"])
+        if "renovations" in row:
+            # renovated rooms over all of the listing's renovation rows
+            row["renovations"] = LIST_SEPARATOR.join(
+                flag
+                for flag in RENOVATION_FLAGS
+                if any(r[flag] for r in row["renovations"])
+            )
+        writer.writerow([row.get(name) for name in header])
+    return out.getvalue()
+
+
+async def stream_export(
+    query: Select, fmt: str, include: Sequence[str] = ()
+) -> AsyncIterator[Union[str, bytes]]:
+    if fmt == "csv":
+        header = csv_header(include)
+        yield encode_csv([], header)
+        async for rows in iter_partitions(query, include):
+            yield encode_csv(rows, header)
+    else:
+        async for rows in iter_partitions(query, include):
+            yield encode_ndjson(rows)
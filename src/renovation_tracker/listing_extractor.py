@@ -0,0 +1,209 @@
+"""listing_extractor -- pull listing fields out of a homes.com listing page.
+
+Works on an HTML string so the same code serves the plain HTTP fast path, the
+Selenium fallback (via `driver.page_source`) and saved fixture pages.
+
+Listing pages are large, so only the elements carrying the classes below are
+built into a tree (lxml + SoupStrainer) and they are looked up with
+precompiled CSS selectors. JSON-LD blocks are cut out of the raw html with a
+regex instead of being parsed as part of the document.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+from typing import Dict, List, Optional
+
+import httpx
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+FETCH_TIMEOUT = float(os.getenv("SCRAPE_FETCH_TIMEOUT", "10"))
+# Fewer photos than this in the static html sends the scrape to the browser
+MIN_PHOTOS = int(os.getenv("SCRAPE_FAST_PATH_MIN_PHOTOS", "1"))
+
+REQUIRED_FIELDS = ("address", "description")
+
+PARSER = "lxml"
+
+# Top level elements kept while parsing, everything else is skipped
+_STRAINER = SoupStrainer(
+    ["span", "p", "li", "img"],
+    attrs={
+        "class": [
+            "property-info-address-main",
+            "property-info-address-citystatezip",
+            "property-info-price",
+            "property-info-feature",
+            "ldp-description-text",
+            "amenities-detail",
+            "primary-carousel-slide-img",
+        ]
+    },
+)
+
+_ADDRESS = soupsieve.compile("span.property-info-address-main")
+_CITY_STATE = soupsieve.compile("span.property-info-address-citystatezip")
+_DESCRIPTION = soupsieve.compile("p.ldp-description-text")
+_PRICE = soupsieve.compile("span.property-info-price")
+_FEATURES = soupsieve.compile("span.property-info-feature")
+_FEATURE_DETAIL = soupsieve.compile("span.property-info-feature-detail")
+_BEDS = soupsieve.compile("span.feature-beds")
+_BATHS = soupsieve.compile("span.feature-baths")
+_AMENITIES = soupsieve.compile("li.amenities-detail")
+_CAROUSEL_IMAGES = soupsieve.compile("img.primary-carousel-slide-img")
+
+_JSON_LD = re.compile(
+    r"<script[^>]*application/ld\+json[^>]*>(.*?)</script>", re.I | re.S
+)
+_BUILT_IN = re.compile(r"Built in\s+(\d+)")
+
+_client: Optional[httpx.Client] = None
+
+
+def get_http_client() -> httpx.Client:
+    # Shared client so connections to the listing site are reused
+    global _client
+    if _client is None:
+        _client = httpx.Client(
+            headers=HEADERS, timeout=FETCH_TIMEOUT, follow_redirects=True
+        )
+    return _client
+
+
+def fetch_html(url: str) -> str:
+    response = get_http_client().get(url)
+    response.raise_for_status()
+    return response.text
+
+
+def _float(text: str) -> Optional[float]:
+    try:
+        return float(text.replace("$", "").replace(",", ""))
+    except ValueError:
+        return None
+
+
+def _json_ld_images(html: str) -> List[str]:
+    """Image urls listed in the page's embedded JSON-LD blocks."""
+    images: List[str] = []
+
+    def collect(node):
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == "image":
+                    collect_image(value)
+                else:
+                    collect(value)
+        elif isinstance(node, list):
+            for value in node:
+                collect(value)
+
+    def collect_image(value):
+        if isinstance(value, str):
+            images.append(value)
+        elif isinstance(value, list):
+            for v in value:
+                collect_image(v)
+        elif isinstance(value, dict):
+            url = value.get("contentUrl") or value.get("url")
+            if isinstance(url, str):
+                images.append(url)
+
+    for block in _JSON_LD.findall(html):
+        try:
+            collect(json.loads(block))
+        except ValueError:
+            continue
+    return images
+
+
+def extract_image_urls(soup: BeautifulSoup, html: str) -> List[str]:
+    """Carousel image urls already in the markup, then any from JSON-LD."""
+    by_index: Dict[str, str] = {}
+    for img in _CAROUSEL_IMAGES.select(soup):
+        src = img.get("src") or img.get("data-src")
+        idx = img.get("data-index")
+        if src and idx:
+            by_index[idx] = src
+    ordered = [
+        by_index[idx]
+        for idx in sorted(by_index, key=lambda i: int(i) if i.isdigit() else 0)
+    ]
+    seen = set(ordered)
+    for src in _json_ld_images(html):
+        if src not in seen:
+            seen.add(src)
+            ordered.append(src)
+    return ordered
+
+
+def parse_listing(html: str) -> Dict[str, object]:
+    """Return every listing field found in `html`, None for the missing ones."""
+    soup = BeautifulSoup(html, PARSER, parse_only=_STRAINER)
+    fields: Dict[str, object] = {
+        "address": None,
+        "description": None,
+        "price": None,
+        "bedroom": None,
+        "bathroom": None,
+        "year_built": None,
+        "photos": [],
+    }
+
+    # Address (Required)
+    address = _ADDRESS.select_one(soup)
+    city_state = _CITY_STATE.select_one(soup)
+    if address and city_state:
+        city_state_zip = ""
+        for child in city_state:
+            city_state_zip += child.get_text(strip=True) + " "
+        fields["address"] = address.get_text(strip=True) + " " + city_state_zip
+
+    # Description (Required)
+    description = _DESCRIPTION.select_one(soup)
+    if description:
+        fields["description"] = description.get_text(strip=True)
+
+    # Price (Optional)
+    price = _PRICE.select_one(soup)
+    if price:
+        fields["price"] = _float(price.get_text(strip=True))
+
+    # Number of bedrooms and bathrooms (Optional)
+    bedroom_bathroom = _FEATURES.select(soup, limit=2)
+    for feature in bedroom_bathroom:
+        detail = _FEATURE_DETAIL.select_one(feature)
+        if detail is None:
+            continue
+        if _BEDS.select_one(feature):
+            fields["bedroom"] = _float(detail.get_text(strip=True))
+        elif _BATHS.select_one(feature):
+            fields["bathroom"] = _float(detail.get_text(strip=True))
+
+    # Year built (Optional)
+    for amenity in _AMENITIES.select(soup):
+        match = _BUILT_IN.search(amenity.get_text(" ", strip=True))
+        if match:
+            fields["year_built"] = int(match.group(1))
+            break
+
+    # Images (Optional)
+    fields["photos"] = extract_image_urls(soup, html)
+    return fields
+
+
+def missing_fields(fields: Dict[str, object]) -> List[str]:
+    return [name for name in REQUIRED_FIELDS if not fields.get(name)]
+
+
+def is_complete(fields: Dict[str, object]) -> bool:
+    """True when the fast path found everything and the browser can be skipped."""
+    return not missing_fields(fields) and len(fields["photos"]) >= MIN_PHOTOS
@@ -0,0 +1,301 @@
+"""listing_search -- ranked full-text search over listing descriptions.
+
+On MySQL the search is a MATCH ... AGAINST in boolean mode on the FULLTEXT
+index of `listings.description`. Every word and "quoted phrase" in the query
+is required, and rows are ranked by MySQL's relevance. Other databases
+(SQLite in development and tests) get the same semantics from an in-process
+inverted index with positional postings, ranked with BM25. It is built from
+the table on the first search. Listings written through an ORM session in
+this process are collected at flush and applied when the session commits
+(and dropped if it rolls back). Bulk imports write through Core, so they
+mark the index stale and it is rebuilt on the next search. Other workers and
+the db-import CLI are only seen once the index is older than
+`SEARCH_INDEX_TTL`: the next search starts a rebuild in the background and
+keeps answering from the current index until it is done.
+
+Callers pass a select of listings already narrowed by the listing and
+renovation filters, and get back (listing, score) pairs, best first.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Select, desc, event, inspect, select
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import renovation_tracker.models as models
+from renovation_tracker.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_PHRASE = re.compile(r'"([^"]*)"')
+
+# Ranked candidates checked against the filters per query on the fallback path
+CANDIDATE_CHUNK = 500
+# Seconds before the fallback index is rebuilt to pick up other processes' writes
+SEARCH_INDEX_TTL = float(os.getenv("SEARCH_INDEX_TTL", "60"))
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN.findall((text or "").lower())
+
+
+def parse_query(text: str) -> Tuple[List[str], List[List[str]]]:
+    """Loose words and quoted phrases (as word lists) of a search query."""
+    phrases = [tokenize(p) for p in _PHRASE.findall(text)]
+    words = tokenize(_PHRASE.sub(" ", text))
+    return words, [p for p in phrases if p]
+
+
+def boolean_query(words: List[str], phrases: List[List[str]]) -> str:
+    # tokens are [a-z0-9] only, so no user input reaches the boolean syntax
+    return " ".join(
+        [f"+{w}" for w in words] + [f'+"{" ".join(p)}"' for p in phrases]
+    )
+
+
+class InvertedIndex:
+    def __init__(self):
+        # token -> listing_id -> positions of the token in the description
+        self.postings: Dict[str, Dict[int, List[int]]] = defaultdict(dict)
+        # listing_id -> distinct tokens, so a listing is removed without a scan
+        self.tokens: Dict[int, List[str]] = {}
+        self.lengths: Dict[int, int] = {}
+        self.total_length = 0
+        self._lock = threading.Lock()
+
+    def add(self, listing_id: int, text: Optional[str]):
+        tokens = tokenize(text)
+        with self._lock:
+            self._remove(listing_id)
+            positions: Dict[str, List[int]] = defaultdict(list)
+            for i, token in enumerate(tokens):
+                positions[token].append(i)
+            for token, where in positions.items():
+                self.postings[token][listing_id] = where
+            self.tokens[listing_id] = list(positions)
+            self.lengths[listing_id] = len(tokens)
+            self.total_length += len(tokens)
+
+    def remove(self, listing_id: int):
+        with self._lock:
+            self._remove(listing_id)
+
+    def _remove(self, listing_id: int):
+        length = self.lengths.pop(listing_id, None)
+        if length is None:
+            return
+        self.total_length -= length
+        for token in self.tokens.pop(listing_id):
+            docs = self.postings[token]
+            del docs[listing_id]
+            if not docs:
+                del self.postings[token]
+
+    @staticmethod
+    def _has_phrase(positions: List[List[int]]) -> bool:
+        starts = set(positions[0])
+        for offset, later in enumerate(positions[1:], start=1):
+            starts &= {p - offset for p in later}
+            if not starts:
+                return False
+        return True
+
+    def search(
+        self, words: List[str], phrases: List[List[str]]
+    ) -> List[Tuple[int, float]]:
+        """Listings containing every word and phrase, BM25 ranked, best first."""
+        terms = list(dict.fromkeys(words + [t for p in phrases for t in p]))
+        if not terms:
+            return []
+        with self._lock:
+            docs = [self.postings.get(t, {}) for t in terms]
+            if not all(docs):
+                return []
+            # intersect starting from the rarest term
+            candidates = set(min(docs, key=len))
+            for postings in docs:
+                candidates.intersection_update(postings)
+            for phrase in phrases:
+                candidates = {
+                    d
+                    for d in candidates
+                    if self._has_phrase([self.postings[t][d] for t in phrase])
+                }
+            count = len(self.lengths)
+            average = (self.total_length / count) or 1
+            weights = [
+                (p, math.log(1 + (count - len(p) + 0.5) / (len(p) + 0.5)))
+                for p in docs
+            ]
+            scores = []
+            for doc in candidates:
+                norm = K1 * (1 - B + B * self.lengths[doc] / average)
+                score = 0.0
+                for postings, idf in weights:
+                    tf = len(postings[doc])
+                    score += idf * tf * (K1 + 1) / (tf + norm)
+                scores.append((doc, score))
+        scores.sort(key=lambda hit: (-hit[1], hit[0]))
+        return scores
+
+
+# (listing_id, description) to index, a None description is a deleted listing
+Change = Tuple[int, Optional[str]]
+
+_index: Optional[InvertedIndex] = None
+_stale = True
+_built_at = 0.0
+_build_lock = asyncio.Lock()
+_refresh: Optional[asyncio.Task] = None
+# listings committed while a build reads the table, replayed onto the result
+_replay: Optional[List[Change]] = None
+
+# session.info key of the listings flushed but not yet committed
+_PENDING = "listing_search_pending"
+
+
+def invalidate():
+    """Rebuild the fallback index on the next search (after Core writes)."""
+    global _stale
+    _stale = True
+
+
+def _apply(index: InvertedIndex, changes: List[Change]):
+    for listing_id, description in changes:
+        if description is None:
+            index.remove(listing_id)
+        else:
+            index.add(listing_id, description)
+
+
+async def _build(db: AsyncSession):
+    global _index, _stale, _built_at, _replay
+    started = time.monotonic()
+    # cleared first, so an invalidate() while the table is read still counts
+    _stale = False
+    _replay = []
+    try:
+        index = InvertedIndex()
+        rows = await db.stream(
+            select(models.Listing.listing_id, models.Listing.description)
+            .execution_options(yield_per=1000)
+        )
+        async for listing_id, description in rows:
+            index.add(listing_id, description)
+        _apply(index, _replay)
+        _index, _built_at = index, started
+    except BaseException:
+        _stale = True
+        raise
+    finally:
+        _replay = None
+
+
+async def _rebuild():
+    global _refresh
+    try:
+        async with _build_lock, AsyncSessionLocal() as db:
+            await _build(db)
+    except Exception as e:
+        logger.warning("Could not rebuild the search index: %s", e)
+    finally:
+        _refresh = None
+
+
+async def get_index(db: AsyncSession) -> InvertedIndex:
+    global _refresh
+    if _index is None or _stale:
+        async with _build_lock:
+            if _index is None or _stale:
+                await _build(db)
+    elif time.monotonic() - _built_at > SEARCH_INDEX_TTL and _refresh is None:
+        _refresh = asyncio.create_task(_rebuild())
+    return _index
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_listings(session, flush_context):
+    # new/dirty/deleted and attribute history still show what was flushed
+    pending: Dict[int, Optional[str]] = session.info.setdefault(_PENDING, {})
+    for listing in session.new:
+        if isinstance(listing, models.Listing):
+            pending[listing.listing_id] = listing.description
+    for listing in session.dirty:
+        if isinstance(listing, models.Listing) and (
+            inspect(listing).attrs.description.history.has_changes()
+        ):
+            pending[listing.listing_id] = listing.description
+    for listing in session.deleted:
+        if isinstance(listing, models.Listing):
+            pending[listing.listing_id] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _index_listings(session):
+    pending = session.info.pop(_PENDING, None)
+    if not pending:
+        return
+    changes = list(pending.items())
+    if _index is not None:
+        _apply(_index, changes)
+    if _replay is not None:
+        _replay.extend(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_listings(session):
+    session.info.pop(_PENDING, None)
+
+
+async def search(
+    db: AsyncSession, text: str, query: Select, limit: int
+) -> List[Tuple[models.Listing, float]]:
+    """Top `limit` listings of `query` matching `text`, with their scores."""
+    words, phrases = parse_query(text)
+    if not words and not phrases:
+        return []
+    if db.bind.dialect.name == "mysql":
+        score = match(
+            models.Listing.description, against=boolean_query(words, phrases)
+        ).in_boolean_mode()
+        rows = await db.execute(
+            query.add_columns(score.label("score"))
+            .where(score > 0)
+            .order_by(desc("score"), models.Listing.listing_id)
+            .limit(limit)
+        )
+        return [(listing, float(s)) for listing, s in rows]
+
+    ranked = (await get_index(db)).search(words, phrases)
+    hits: List[Tuple[models.Listing, float]] = []
+    for start in range(0, len(ranked), CANDIDATE_CHUNK):
+        chunk = ranked[start : start + CANDIDATE_CHUNK]
+        found = {
+            listing.listing_id: listing
+            for listing in (
+                await db.scalars(
+                    query.where(models.Listing.listing_id.in_([d for d, _ in chunk]))
+                )
+            ).all()
+        }
+        for listing_id, score in chunk:
+            if listing_id in found:
+                hits.append((found[listing_id], score))
+                if len(hits) == limit:
+                    return hits
+    return hits
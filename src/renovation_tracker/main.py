@@ -1,14 +1,44 @@
 from __future__ import annotations
-from fastapi import FastAPI
-from renovation_tracker.database import engine, Session
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Response, status
+from fastapi.responses import PlainTextResponse
+from renovation_tracker.database import AsyncSession, get_async_db
+from renovation_tracker.db_admin import CREATE_TABLES, ensure_tables
 import renovation_tracker.models as models
 from renovation_tracker.routers import listings_router
 from renovation_tracker.routers import renovations_router
 from renovation_tracker.routers import photos_router
-from pydantic import BaseModel
-from typing import Any, Dict
-from renovation_tracker.nlp_predict import extract_renovations
-from sqlalchemy import inspect
+from renovation_tracker.photo_inference import (
+    close_async_client,
+    close_http_client,
+    get_scheduler,
+    stop_scheduler,
+)
+from renovation_tracker.image_cache import close_image_cache, get_image_cache
+from renovation_tracker.response_cache import close_response_cache, get_response_cache
+from renovation_tracker import metrics
+from renovation_tracker.model_registry import PRELOAD_MODELS, init_models, registry
+from renovation_tracker.scrape_jobs import start_scrape_workers, stop_scrape_workers
+from renovation_tracker.driver_pool import (
+    WARM_SESSIONS,
+    close_driver_pool,
+    get_driver_pool,
+)
+from pydantic import BaseModel, Field
+from typing import Annotated, Any, Dict, List, Optional
+from renovation_tracker.nlp_predict import (
+    extract_renovations,
+    extract_renovations_batch,
+)
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
 
 
 class PredictRequest(BaseModel):
@@ -19,65 +49,203 @@ class PredictResponse(BaseModel):
     result: Dict[str, Any]
 
 
-api = FastAPI()
+# Largest number of descriptions + listing ids accepted in one batch call
+MAX_PREDICT_BATCH = 10000
+# Descriptions handed to a pool worker at a time
+PREDICT_CHUNK_SIZE = 64
+
+
+class PredictBatchRequest(BaseModel):
+    descriptions: List[str] = Field(default_factory=list, max_length=MAX_PREDICT_BATCH)
+    listing_ids: List[int] = Field(default_factory=list, max_length=MAX_PREDICT_BATCH)
+
+
+class PredictBatchItem(BaseModel):
+    listing_id: Optional[int] = None
+    result: Dict[str, Any]
+
+
+class PredictBatchResponse(BaseModel):
+    results: List[PredictBatchItem]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema check runs here, not at import, so importing the app needs no database
+    if CREATE_TABLES:
+        await run_in_threadpool(ensure_tables)
+    # Created up front so its cross-worker invalidation setup is logged at startup
+    get_response_cache()
+    # Load the room classifier before taking traffic, see /ready
+    if PRELOAD_MODELS:
+        await run_in_threadpool(init_models)
+    # Launch browser sessions up front so the first scrape skips Chrome startup
+    try:
+        await run_in_threadpool(get_driver_pool().start, WARM_SESSIONS)
+    except Exception as e:
+        logger.warning("Could not warm the scraper driver pool: %s", e)
+    await start_scrape_workers(
+        listings_router.url_listing, listings_router.save_scraped_listing
+    )
+    yield
+    await stop_scrape_workers()
+    await close_async_client()
+    close_http_client()
+    stop_scheduler()
+    close_image_cache()
+    await close_response_cache()
+    close_driver_pool()
+    close_process_pool()
+
+
+api = FastAPI(lifespan=lifespan)
 api.include_router(listings_router.router)
 api.include_router(renovations_router.router)
 api.include_router(photos_router.router)
 
 
-def create_tables():
-    models.Base.metadata.create_all(bind=engine)
-
-
-def drop_tables():
-    models.Base.metadata.drop_all(bind=engine)
-
-
-def reset_db():
-    drop_tables()
-    create_tables()
-
-
-def seed_data():
-    session = Session()
-    listings = [
-        models.Listing(
-            url="https://www.homes.com/property/12301-fawn-lake-pkwy-spotsylvania-va/2s8v31qvw8527",
-            address="12301 Fawn Lake Pkwy Spotsylvania, VA 22551",
-            description="Luxury meets lake living at 12301 Fawn Lake Parkway — a turnkey colonial that feels brand new and beautifully balanced between comfort and sophistication. Set within a popular community that lives like a resort, this home captures modern design, timeless detail, and the ease of everyday lake life. Tucked on over half an acre across from the water in Fawn Lake, this Corsica model by Ryan Homes is a sought-after floor plan. Every inch feels purposeful and current — from the stone-accented façade to the refined interiors that balance livable warmth with luxury detail. Just a three-minute stroll from the lake itself, this address delivers both serenity and convenience. Fawn Lake’s resort-style amenities include an Arnold Palmer-designed golf course, clubhouse and restaurant, community pool, tennis and pickleball center, walking trails, and the breathtaking 288-acre private lake at the heart of it all. The curb appeal is striking — dark blue siding contrasted by natural stone, a deep burgundy front door, and newly landscaped gardens framed by crepe myrtles, fresh seed and aeration, and privacy evergreens. The side-loading two-car garage and widened asphalt driveway make daily living effortless, while the rear deck opens to tall trees and peaceful privacy. Inside, light luxury vinyl plank flooring, upgraded hardware, and custom details set a refined tone. A French-door office sits near the entry — perfect for work-from-home days — while the open main living space centers around a stone gas fireplace. The family room transitions seamlessly into the show-stopping kitchen: a massive island with white quartzite counters, full-height, custom backsplash, under-cabinet lighting, stainless appliances, and a walk-in pantry built for real life. Four spacious bedrooms anchor the upper level, including a primary suite that feels like a private spa. Dual walk-ins, a Roman shower, dual vanities, and a private water closet create a daily retreat. Two of the secondary bedrooms — and the loft just outside them — capture tranquil lake views that frame the sunrise beautifully. The upstairs laundry room (complete with sink and conveying appliances) adds practical luxury. The fully finished lower level offers an additional dimension of living: a true media room with theater ambiance, a large recreation room, full bath, and fifth bedroom. Designer accent walls in cyber gray keep the look fresh and modern, and the walk-out access brings in natural light. Beyond the gates, Route 3 and everyday conveniences are minutes away, while Downtown Fredericksburg, Orange, and Culpeper are within half an hour. Yet at home, you’ll feel a world apart — surrounded by lake breezes, tall trees, and the quiet confidence that comes with a property built right and maintained perfectly. This is a rare opportunity to live across from the lake, surrounded by resort-level amenities, in a home that feels as fresh as the day it was built.",
-            price=925000,
-            bedroom=5,
-            bathroom=4.5,
-            year_built=2022,
-        ),
-        models.Listing(
-            url="https://www.homes.com/property/5832-red-fox-dr-spotsylvania-va/cxqxmj13js52m",
-            address="5832 Red Fox Dr  Spotsylvania, VA  22551  ",
-            description="Set on 2.37 beautifully landscaped acres with mature trees, this private retreat combines country serenity with modern comfort. A wide front porch frames the home and offers an ideal spot for quiet mornings and relaxing evenings. Inside, the family room centers around a cozy gas log fireplace, and the kitchen with gas cooking flows into the dining area and a bright sunroom suited for year-round enjoyment. The main-level owner’s suite includes a spacious ensuite bath with a jetted soaking tub and separate shower. Upstairs, two oversized bedrooms provide flexible space for family, guests, or home office needs. Outdoor living is a highlight, featuring a Trex deck, above-ground pool, and hot tub surrounded by natural privacy. Two storage sheds and a whole-home generator add everyday practicality. The location feels tucked away yet remains minutes to I-95 and a short drive to Fredericksburg, Richmond, Lake Anna, Dominion Raceway, and the future Kalahari Resort slated for Fall 2026. A newly renovated property offering peaceful country living with convenient access to major destinations.",
-            price=500000,
-            bedroom=3,
-            bathroom=2.5,
-            year_built=2009,
-        ),
-    ]
-    session.add_all(listings)
-    session.commit()
-    session.close()
+# Times every request, and sends its stage totals back when timing headers are on
+api.add_middleware(metrics.RequestTimingMiddleware)
+
 
+# Inference scheduler, caches and browser pool, read when /metrics is scraped
+def collect_app_metrics():
+    scheduler = get_scheduler()
+    yield "inference_queue_depth", {}, scheduler.stats()["queue_depth"], "gauge"
+    yield "inference_batches_total", {}, scheduler.batches, "counter"
+    yield "inference_items_total", {}, scheduler.items, "counter"
+    yield "inference_errors_total", {}, scheduler.errors, "counter"
+    yield "inference_batch_size", {}, scheduler.batch_sizes, "histogram"
+    yield "inference_queue_wait_ms", {}, scheduler.queue_wait_ms, "histogram"
+    yield "inference_latency_ms", {}, scheduler.latency_ms, "histogram"
+    image_cache = get_image_cache()
+    if image_cache is not None:
+        stats = image_cache.stats()
+        for name in ("hits", "revalidated", "misses", "evictions"):
+            yield f"image_cache_{name}_total", {}, stats[name], "counter"
+        yield "image_cache_bytes", {}, stats["bytes"], "gauge"
+    stats = get_response_cache().stats()
+    for name in ("hits", "shared_hits", "misses", "invalidations"):
+        yield f"response_cache_{name}_total", {}, stats[name], "counter"
+    yield "response_cache_entries", {}, stats["entries"], "gauge"
+    stats = get_driver_pool().stats()
+    yield "driver_pool_size", {}, stats["size"], "gauge"
+    yield "driver_pool_idle", {}, stats["idle"], "gauge"
 
-inspector = inspect(engine)
-tables = inspector.get_table_names()
-if not tables:
-    create_tables()
+
+metrics.register_collector(collect_app_metrics)
 
 
 @api.get("/", tags=["health"])
 def health():
-    return {"status": "ok"}
+    return {"status": "ok", "ready": registry.ready(), "models": registry.status()}
+
+
+# Prometheus scrape target
+@api.get("/metrics", tags=["health"], response_class=PlainTextResponse)
+def read_metrics():
+    return PlainTextResponse(
+        metrics.registry.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
+# Readiness probe, 503 until the models are loaded
+@api.get("/ready", tags=["health"])
+def ready(response: Response):
+    if not registry.ready():
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"ready": registry.ready(), "models": registry.status()}
 
 
 @api.post("/predict-renovations", response_model=PredictResponse)
 def predict_renovations(req: PredictRequest):
     """Accepts a property description and returns structured renovation info."""
-    result = extract_renovations(req.description)
+    with metrics.stage("nlp.extract_renovations"):
+        result = extract_renovations(req.description)
     return {"result": result}
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+# Process pool for batch predictions, created on first use and sized to the cores
+# Workers come from a forkserver (spawn where there is none), never a fork of
+# this process, which could copy a lock held by another thread (the metrics
+# registry, the inference scheduler) and deadlock the child on it
+def get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        method = (
+            "forkserver"
+            if "forkserver" in multiprocessing.get_all_start_methods()
+            else "spawn"
+        )
+        _process_pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count(), mp_context=multiprocessing.get_context(method)
+        )
+    return _process_pool
+
+
+def close_process_pool():
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown()
+        _process_pool = None
+
+
+# Helper function that fans descriptions out across the process pool in chunks
+# Timed here, stages recorded inside pool workers would stay in their registry
+@metrics.timed("nlp.extract_renovations_batch")
+async def run_predict_batch(texts: List[str]) -> List[Dict[str, Any]]:
+    if len(texts) <= PREDICT_CHUNK_SIZE:
+        # small batches skip the pool, but still keep the regex scans off the loop
+        return await run_in_threadpool(extract_renovations_batch, texts)
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+    chunks = [
+        texts[i : i + PREDICT_CHUNK_SIZE]
+        for i in range(0, len(texts), PREDICT_CHUNK_SIZE)
+    ]
+    # gather keeps the chunks in submission order
+    done = await asyncio.gather(
+        *(loop.run_in_executor(pool, extract_renovations_batch, c) for c in chunks)
+    )
+    return [result for chunk in done for result in chunk]
+
+
+@api.post("/predict-renovations/batch", response_model=PredictBatchResponse)
+async def predict_renovations_batch(
+    req: PredictBatchRequest, db: Annotated[AsyncSession, Depends(get_async_db)]
+):
+    """Scores many descriptions and/or stored listings, results in request order.
+
+    Raw descriptions come first, followed by one result per requested listing id.
+    """
+    if len(req.descriptions) + len(req.listing_ids) > MAX_PREDICT_BATCH:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Batch is limited to {MAX_PREDICT_BATCH} descriptions and listings",
+        )
+    ids: List[Optional[int]] = [None] * len(req.descriptions) + req.listing_ids
+    texts = list(req.descriptions)
+    if req.listing_ids:
+        rows = await db.execute(
+            select(models.Listing.listing_id, models.Listing.description).where(
+                models.Listing.listing_id.in_(req.listing_ids)
+            )
+        )
+        found = {listing_id: description for listing_id, description in rows}
+        missing = [i for i in req.listing_ids if i not in found]
+        if missing:
+            raise HTTPException(
+                status_code=404, detail=f"Listings with ids {missing} not found"
+            )
+        texts += [found[i] for i in req.listing_ids]
+
+    results = await run_predict_batch(texts)
+    return {
+        "results": [
+            {"listing_id": listing_id, "result": result}
+            for listing_id, result in zip(ids, results)
+        ]
+    }
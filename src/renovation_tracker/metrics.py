@@ -0,0 +1,328 @@
+"""metrics -- stage timings, database timings and a Prometheus text export.
+
+Code under measurement wraps each stage in `stage("scrape.page_load")`, or
+reports a duration it already has with `observe_stage`. Every stage feeds one
+histogram labelled by its name. The database hooks time each statement via
+SQLAlchemy cursor events, labelled by engine and verb, and time ORM flushes
+and commits via session events. Connection pool occupancy is read when
+/metrics is scraped. Other subsystems (inference scheduler, caches) plug in
+with `register_collector`.
+
+During an HTTP request the stages also add up per request. With
+METRICS_TIMING_HEADERS=1 the totals are sent back in a Server-Timing header,
+so one slow response shows where its time went in the browser's dev tools
+or curl -v.
+
+Stages only reach /metrics from this process. Code shipped to a process pool
+is timed by the parent, around the call that waits for it.
+"""
+from __future__ import annotations
+
+import functools
+import inspect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from renovation_tracker.inference_scheduler import Histogram
+
+# Set METRICS_TIMING_HEADERS=1 to add a Server-Timing header to every response
+TIMING_HEADERS = os.getenv("METRICS_TIMING_HEADERS", "0") == "1"
+
+PREFIX = "renovation_tracker"
+# Upper bounds in ms, wide enough for a cached query and for a browser scrape
+STAGE_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+QUERY_BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+# Statement verbs kept as labels, anything else is "other"
+QUERY_VERBS = ("select", "insert", "update", "delete")
+
+Labels = Tuple[Tuple[str, str], ...]
+# (name, labels, value, type) read at scrape time, the value of a
+# "histogram" sample is a Histogram
+Sample = Tuple[str, Dict[str, object], object, str]
+
+
+class Registry:
+    def __init__(self):
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.help: Dict[str, str] = {}
+        self.collectors: List[Callable[[], Iterable[Sample]]] = []
+        self._lock = threading.Lock()
+
+    def histogram(
+        self, name: str, buckets=STAGE_BUCKETS_MS, **labels: str
+    ) -> Histogram:
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(key, Histogram(buckets))
+        return histogram
+
+    def observe(self, name: str, value: float, buckets=STAGE_BUCKETS_MS, **labels: str):
+        self.histogram(name, buckets, **labels).observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def describe(self, name: str, text: str):
+        self.help[name] = text
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        seen = set()
+
+        def header(name: str, kind: str):
+            if name not in seen:
+                seen.add(name)
+                if name in self.help:
+                    lines.append(f"# HELP {PREFIX}_{name} {self.help[name]}")
+                lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            header(name, "histogram")
+            lines.extend(_histogram_lines(f"{PREFIX}_{name}", dict(labels), histogram))
+        for (name, labels), value in sorted(self.counters.items()):
+            header(name, "counter")
+            lines.append(f"{PREFIX}_{name}{_labels(dict(labels))} {_number(value)}")
+        for collect in self.collectors:
+            for name, labels, value, kind in collect():
+                header(name, kind)
+                if kind == "histogram":
+                    lines.extend(_histogram_lines(f"{PREFIX}_{name}", labels, value))
+                else:
+                    lines.append(f"{PREFIX}_{name}{_labels(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, object]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _histogram_lines(
+    name: str, labels: Dict[str, object], histogram: Histogram
+) -> Iterator[str]:
+    snapshot = histogram.snapshot()
+    cumulative = 0
+    for bound, count in snapshot["buckets"].items():
+        cumulative += count
+        yield f"{name}_bucket{_labels({**labels, 'le': bound})} {cumulative}"
+    yield f"{name}_sum{_labels(labels)} {_number(snapshot['sum'])}"
+    yield f"{name}_count{_labels(labels)} {snapshot['count']}"
+
+
+registry = Registry()
+registry.describe("stage_duration_ms", "Time spent in each stage, in ms")
+registry.describe("db_query_duration_ms", "Statement execution time, in ms")
+registry.describe("db_query_errors_total", "Statements that raised")
+registry.describe("http_request_duration_ms", "Request handling time, in ms")
+
+# Per request stage totals, set by the HTTP middleware
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def register_collector(collect: Callable[[], Iterable[Sample]]):
+    registry.collectors.append(collect)
+
+
+def observe_stage(name: str, ms: float):
+    registry.observe("stage_duration_ms", ms, stage=name)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + ms
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, (time.perf_counter() - start) * 1000)
+
+
+def timed(name: str):
+    """Decorator form of `stage`, for plain and async functions."""
+
+    def wrap(fn):
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def run_async(*args, **kwargs):
+                with stage(name):
+                    return await fn(*args, **kwargs)
+
+            return run_async
+
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+
+        return run
+
+    return wrap
+
+
+@contextmanager
+def request_timings() -> Iterator[Dict[str, float]]:
+    """Collect the stages run in this context (and its tasks and threads)."""
+    timings: Dict[str, float] = {}
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+
+def server_timing(timings: Dict[str, float], total_ms: float) -> str:
+    parts = [f"{name};dur={ms:.1f}" for name, ms in timings.items()]
+    return ", ".join(parts + [f"total;dur={total_ms:.1f}"])
+
+
+def observe_request(method: str, route: str, status: int, ms: float):
+    registry.observe(
+        "http_request_duration_ms", ms, method=method, route=route, status=str(status)
+    )
+
+
+class RequestTimingMiddleware:
+    """Times every HTTP request, and sends its stage totals back when timing
+    headers are on.
+
+    Plain ASGI rather than `@app.middleware("http")`, which runs the app in a
+    separate task behind a stream and costs every request a task hop.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+        with request_timings() as timings:
+
+            async def send_timed(message: Message):
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    if TIMING_HEADERS:
+                        total_ms = (time.perf_counter() - start) * 1000
+                        MutableHeaders(scope=message).append(
+                            "Server-Timing", server_timing(timings, total_ms)
+                        )
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_timed)
+            finally:
+                route = scope.get("route")
+                # the route template keeps one series per endpoint, not per listing id
+                observe_request(
+                    scope["method"],
+                    route.path if route is not None else "unmatched",
+                    status,
+                    (time.perf_counter() - start) * 1000,
+                )
+
+
+def _verb(statement: str) -> str:
+    verb = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else ""
+    return verb if verb in QUERY_VERBS else "other"
+
+
+def instrument_engine(engine: Engine, name: str):
+    """Time every statement run on `engine` and report its pool occupancy."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["metrics_query_start"].pop()
+        ms = (time.perf_counter() - start) * 1000
+        registry.observe(
+            "db_query_duration_ms", ms, QUERY_BUCKETS_MS, engine=name, verb=_verb(statement)
+        )
+        timings = _request_timings.get()
+        if timings is not None:
+            timings["db.query"] = timings.get("db.query", 0.0) + ms
+
+    @event.listens_for(engine, "handle_error")
+    def query_error(context):
+        starts = context.connection.info.get("metrics_query_start") if context.connection else None
+        if starts:
+            starts.pop()
+        registry.inc("db_query_errors_total", engine=name)
+
+    def pool_stats() -> Iterator[Sample]:
+        pool = engine.pool
+        # only the queue pools (MySQL, file SQLite) track checkouts
+        if not hasattr(pool, "checkedout"):
+            return
+        labels = {"engine": name}
+        yield "db_pool_size", labels, pool.size(), "gauge"
+        yield "db_pool_checked_out", labels, pool.checkedout(), "gauge"
+        yield "db_pool_checked_in", labels, pool.checkedin(), "gauge"
+        yield "db_pool_overflow", labels, max(pool.overflow(), 0), "gauge"
+
+    register_collector(pool_stats)
+
+
+def instrument_sessions():
+    """Time ORM flushes and commits of every session, sync or async."""
+
+    @event.listens_for(Session, "before_flush")
+    def before_flush(session, flush_context, instances):
+        session.info["metrics_flush_start"] = time.perf_counter()
+
+    @event.listens_for(Session, "after_flush_postexec")
+    def after_flush(session, flush_context):
+        start = session.info.pop("metrics_flush_start", None)
+        if start is not None:
+            observe_stage("db.flush", (time.perf_counter() - start) * 1000)
+
+    @event.listens_for(Session, "before_commit")
+    def before_commit(session):
+        session.info["metrics_commit_start"] = time.perf_counter()
+
+    @event.listens_for(Session, "after_commit")
+    def after_commit(session):
+        start = session.info.pop("metrics_commit_start", None)
+        if start is not None:
+            observe_stage("db.commit", (time.perf_counter() - start) * 1000)
+
+    @event.listens_for(Session, "after_rollback")
+    def after_rollback(session):
+        session.info.pop("metrics_commit_start", None)
+        session.info.pop("metrics_flush_start", None)
+
@@ -0,0 +1,117 @@
+"""model_registry -- lazily loaded, shared ML models.
+
+Importing ultralytics/torch and reading the weights takes seconds, so nothing
+is loaded at import time. Models are registered with a loader and built on
+first use (or by the app lifespan via `init_models`), once per process, behind
+a lock so concurrent first requests don't load the same weights twice.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MODEL_PACKAGE = "renovation_tracker.yolo_models"
+ROOM_MODEL_FILE = os.getenv("ROOM_MODEL_FILE", "new.pt")
+# Runtime serving the room classifier: torch, onnx or openvino (room_backends)
+ROOM_MODEL_BACKEND = os.getenv("ROOM_MODEL_BACKEND", "torch")
+# Use the INT8 quantized export of the onnx/openvino backends
+ROOM_MODEL_INT8 = os.getenv("ROOM_MODEL_INT8", "0") == "1"
+# Load the models in the app lifespan instead of on the first request
+PRELOAD_MODELS = os.getenv("MODEL_PRELOAD", "1") != "0"
+# Run one dummy inference after loading so the first real call is not slow
+WARMUP_MODELS = os.getenv("MODEL_WARMUP", "1") != "0"
+# Input size the room classifier was trained with (yolo-training.py)
+ROOM_IMGSZ = 224
+
+ROOM_MODEL = "room"
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._warmups: Dict[str, Callable[[Any], None]] = {}
+        self._models: Dict[str, Any] = {}
+        self._status: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def register(
+        self,
+        name: str,
+        loader: Callable[[], Any],
+        warmup: Optional[Callable[[Any], None]] = None,
+    ):
+        self._loaders[name] = loader
+        if warmup is not None:
+            self._warmups[name] = warmup
+        self._status[name] = "not_loaded"
+
+    def get(self, name: str) -> Any:
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        with self._lock:
+            # another thread may have finished loading while we waited
+            model = self._models.get(name)
+            if model is None:
+                self._status[name] = "loading"
+                try:
+                    model = self._loaders[name]()
+                except Exception as e:
+                    self._status[name] = f"error: {e}"
+                    raise
+                self._models[name] = model
+                self._status[name] = "loaded"
+        return model
+
+    def warmup(self, name: str):
+        model = self.get(name)
+        warmup = self._warmups.get(name)
+        if warmup is not None:
+            warmup(model)
+        self._status[name] = "ready"
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def status(self) -> Dict[str, str]:
+        return dict(self._status)
+
+    def ready(self) -> bool:
+        return all(name in self._models for name in self._loaders)
+
+
+def load_room_model():
+    # Imported here so only processes that classify photos pay for the runtime
+    from renovation_tracker.room_backends import load_classifier
+
+    return load_classifier(ROOM_MODEL_BACKEND, ROOM_MODEL_INT8)
+
+
+def warmup_room_model(model):
+    from PIL import Image
+
+    model.classify([Image.new("RGB", (ROOM_IMGSZ, ROOM_IMGSZ))])
+
+
+registry = ModelRegistry()
+registry.register(ROOM_MODEL, load_room_model, warmup_room_model)
+
+
+def get_room_model():
+    return registry.get(ROOM_MODEL)
+
+
+def init_models(warmup: bool = WARMUP_MODELS):
+    """Load (and optionally warm up) every registered model, logging failures."""
+    for name in registry.status():
+        try:
+            if warmup:
+                registry.warmup(name)
+            else:
+                registry.get(name)
+        except Exception as e:
+            logger.warning("Could not load model %s: %s", name, e)
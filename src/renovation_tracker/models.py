@@ -1,22 +1,67 @@
-from sqlalchemy import Column, Integer, String, Boolean, Double, ForeignKey
-from sqlalchemy.orm import relationship
+import re
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Boolean,
+    Double,
+    DateTime,
+    ForeignKey,
+    Index,
+    JSON,
+    func,
+)
+from sqlalchemy.orm import relationship, validates
 from renovation_tracker.database import Base
 
+# Trailing "12345" or "12345-6789" of an address like "1 Main St Town, VA 22153"
+ZIP_CODE = re.compile(r"\b(\d{5})(?:-\d{4})?\s*$")
+
+
+def zip_code_from(address):
+    match = ZIP_CODE.search(address or "")
+    return match.group(1) if match else None
+
+
+# Hex digits of each band of a 64 bit photo hash. Hashes at most
+# len(PHASH_BANDS) - 1 bits apart match exactly in at least one band
+PHASH_BANDS = (slice(0, 6), slice(6, 11), slice(11, 16))
+
+
+def phash_bands(phash):
+    return [phash[band] if phash else None for band in PHASH_BANDS]
+
 
 class Listing(Base):
     __tablename__ = "listings"
+    __table_args__ = (
+        # GET /listings?zip_code= walks this in listing_id (cursor) order
+        Index("ix_listings_zip_code_listing_id", "zip_code", "listing_id"),
+        Index("ix_listings_bedroom_bathroom", "bedroom", "bathroom"),
+        # GET /listings/search, other databases search an in-process index
+        Index(
+            "ix_listings_description_fulltext", "description", mysql_prefix="FULLTEXT"
+        ).ddl_if(dialect="mysql"),
+    )
 
     listing_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     url = Column(String(100), nullable=False)
     address = Column(String(100), unique=True, nullable=False)
     description = Column(String(5000), nullable=False)
-    price = Column(Double)
+    price = Column(Double, index=True)
     bedroom = Column(Double)
     bathroom = Column(Double)
-    year_built = Column(Integer)
+    year_built = Column(Integer, index=True)
+    # derived from address so listings can be filtered by zip with an index
+    zip_code = Column(String(10))
     renovations = relationship("Renovations", back_populates="listing")
     photos = relationship("Photos", back_populates="listing")
 
+    @validates("address")
+    def set_zip_code(self, key, address):
+        self.zip_code = zip_code_from(address)
+        return address
+
 
 class Renovations(Base):
     __tablename__ = "renovations"
@@ -35,5 +80,37 @@ class Photos(Base):
     photo_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     url = Column(String(200), nullable=False)
     room_type = Column(String(100))
+    # perceptual hash of the image (photo_hash.dhash), shared by duplicates
+    phash = Column(String(16), index=True)
+    # the phash bands after the first (a prefix of phash), so near duplicates
+    # can be looked up with an index, see photo_hash.known_rooms
+    phash_mid = Column(String(5), index=True)
+    phash_tail = Column(String(5), index=True)
     listing_id = Column(Integer, ForeignKey("listings.listing_id"))
     listing = relationship("Listing", back_populates="photos")
+
+    @validates("phash")
+    def set_phash_bands(self, key, phash):
+        _, self.phash_mid, self.phash_tail = phash_bands(phash)
+        return phash
+
+
+class ScrapeJobs(Base):
+    __tablename__ = "scrape_jobs"
+    job_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    url = Column(String(500), nullable=False)
+    status = Column(String(20), nullable=False, default="queued", index=True)
+    progress = Column(String(100))
+    error = Column(String(1000))
+    attempts = Column(Integer, nullable=False, default=0)
+    # a deleted listing leaves its job behind, pointing at nothing
+    listing_id = Column(
+        Integer, ForeignKey("listings.listing_id", ondelete="SET NULL")
+    )
+    # "http" when the plain fetch was enough, "browser" for the selenium fallback
+    source = Column(String(20))
+    # per stage scrape timings in ms, e.g. {"fetch_ms": .., "carousel_ms": ..}
+    timings = Column(JSON)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    claimed_at = Column(DateTime)
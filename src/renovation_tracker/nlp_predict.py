@@ -17,7 +17,7 @@ so it works without any heavy ML dependencies and is easy to extend.
 from __future__ import annotations
 
 import re
-from typing import Dict, List, Tuple
+from typing import Dict, List, Set
 from datetime import datetime
 
 RENOVATION_CATEGORIES: Dict[str, List[str]] = {
@@ -42,29 +42,81 @@ STRONG_VERBS = ["renovated", "remodeled", "rebuilt", "replaced", "installed", "r
 MEDIUM_VERBS = ["updated", "updated", "refreshed", "upgraded", "modernized"]
 
 
-def _find_sentences_with_keywords(text: str, keywords: List[str]) -> List[str]:
-    text_lower = text.lower()
-    sentences = re.split(r"(?<=[.!?])\s+", text.strip())
-    matches: List[str] = []
-    for s in sentences:
-        s_l = s.lower()
-        for kw in keywords:
-            if kw in s_l:
-                matches.append(s.strip())
-                break
-    return matches
-
-
-def _estimate_confidence(sentence: str) -> float:
-    s = sentence.lower()
-    for strong in STRONG_VERBS:
-        if strong in s:
-            return 0.92
-    for med in MEDIUM_VERBS:
-        if med in s:
-            return 0.75
+# Tags for the confidence verbs; kept distinct from the category names above
+_STRONG = "__strong__"
+_MEDIUM = "__medium__"
+_NEW = "__new__"
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+
+def _build_term_tags() -> Dict[str, Set[str]]:
+    tags: Dict[str, Set[str]] = {}
+    for name, keywords in RENOVATION_CATEGORIES.items():
+        for kw in keywords + [name]:
+            tags.setdefault(kw, set()).add(name)
+    for verb in STRONG_VERBS:
+        tags.setdefault(verb, set()).add(_STRONG)
+    for verb in MEDIUM_VERBS:
+        tags.setdefault(verb, set()).add(_MEDIUM)
+    for word in ("new", "brand new"):
+        tags.setdefault(word, set()).add(_NEW)
+    return tags
+
+
+def _trie_pattern(node: Dict[str, dict]) -> str:
+    branches = [
+        re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch
+    ]
+    if not branches:
+        return ""
+    if "" in node:
+        # a shorter term ends here, the greedy "?" still prefers the longer one
+        return "(?:" + "|".join(branches) + ")?"
+    if len(branches) == 1:
+        return branches[0]
+    return "(?:" + "|".join(branches) + ")"
+
+
+def _build_matcher(terms: List[str]) -> re.Pattern:
+    """Compile every term into one trie-shaped regex.
+
+    The pattern sits inside a lookahead so overlapping terms are still seen
+    (e.g. "ac" inside "crawl space") and each position reports its longest term.
+    """
+    trie: Dict[str, dict] = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    return re.compile("(?=(" + _trie_pattern(trie) + "))")
+
+
+_TERM_TAGS = _build_term_tags()
+# Every term that is a prefix of a longer one matches wherever the longer one does
+_MATCH_TAGS: Dict[str, Set[str]] = {
+    term: set().union(*(t for other, t in _TERM_TAGS.items() if term.startswith(other)))
+    for term in _TERM_TAGS
+}
+_MATCHER = _build_matcher(list(_TERM_TAGS))
+
+
+def _sentence_tags(sentence: str) -> Set[str]:
+    """Return every category and verb tag found in the sentence in one scan."""
+    tags: Set[str] = set()
+    for match in _MATCHER.finditer(sentence.lower()):
+        tags |= _MATCH_TAGS[match.group(1)]
+    return tags
+
+
+def _estimate_confidence(tags: Set[str]) -> float:
+    if _STRONG in tags:
+        return 0.92
+    if _MEDIUM in tags:
+        return 0.75
     # weak signals like "painted" or "new" alone are lower
-    if "new" in s or "brand new" in s:
+    if _NEW in tags:
         return 0.85
     return 0.6
 
@@ -89,18 +141,22 @@ def extract_renovations(text: str) -> Dict[str, object]:
     items = []
     detected = []
 
-    for name, keywords in RENOVATION_CATEGORIES.items():
-        sentences = _find_sentences_with_keywords(text, keywords + [name])
-        if sentences:
-            # dedupe and keep up to 3 details
-            uniq = []
-            for s in sentences:
-                if s not in uniq:
-                    uniq.append(s)
+    # split and scan the description once, then group the sentences per category
+    sentences = [s.strip() for s in _SENTENCE_SPLIT.split(text.strip())]
+    scanned = [(s, _sentence_tags(s)) for s in sentences]
+
+    for name in RENOVATION_CATEGORIES:
+        # dedupe and keep up to 3 details
+        uniq: List[str] = []
+        confidences: List[float] = []
+        for s, tags in scanned:
+            if name in tags and s not in uniq:
+                uniq.append(s)
+                confidences.append(_estimate_confidence(tags))
                 if len(uniq) >= 3:
                     break
-            confidences = [_estimate_confidence(s) for s in uniq]
-            confidence = max(confidences) if confidences else 0.6
+        if uniq:
+            confidence = max(confidences)
             items.append({
                 "name": name,
                 "renovated": True,
@@ -125,6 +181,14 @@ def extract_renovations(text: str) -> Dict[str, object]:
     return result
 
 
+def extract_renovations_batch(texts: List[str]) -> List[Dict[str, object]]:
+    """Run `extract_renovations` over many descriptions, keeping their order.
+
+    Module-level so it can be shipped to a process pool worker.
+    """
+    return [extract_renovations(text) for text in texts]
+
+
 if __name__ == "__main__":
     # quick manual smoke test
     sample = (
@@ -0,0 +1,136 @@
+"""photo_hash -- perceptual hashes to spot the same photo on several listings.
+
+Relistings and reposts put the same picture behind different urls (or the
+same url with another query string). Each photo gets a 64 bit difference
+hash (dHash) of its decoded image, stored in the indexed `photos.phash`
+column. Re-encoding or resizing a photo leaves its hash identical or a bit
+or two apart, so a photo whose hash is within `PHOTO_HASH_MAX_DISTANCE` bits
+of one that is already classified reuses that room type. It is neither
+downloaded again nor sent to the model.
+
+Candidates come from three indexed lookups, one per band of the hash (the
+`phash` prefix, `phash_mid` and `phash_tail`). Two hashes at most two bits
+apart agree on at least one whole band; the exact distance is then checked
+in Python.
+"""
+from __future__ import annotations
+
+import logging
+import os
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple, Union
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+import renovation_tracker.models as models
+from renovation_tracker import photo_inference
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Download and hash photos when a listing is saved, so duplicates are found
+# before anyone asks for inference
+HASH_AT_INGEST = os.getenv("PHOTO_HASH_AT_INGEST", "1") != "0"
+
+HASH_SIZE = 8
+# Bits two hashes may differ by and still be the same photo, 0 to 2 (what
+# the bands can find)
+MAX_DISTANCE = min(
+    int(os.getenv("PHOTO_HASH_MAX_DISTANCE", "2")), len(models.PHASH_BANDS) - 1
+)
+
+
+def dhash(image: Image.Image) -> str:
+    """Hex dHash: 64 left/right brightness comparisons on a 9x8 grayscale thumbnail."""
+    # Imported here so the API boots without numpy and PIL until a photo is hashed
+    import numpy as np
+    from PIL import Image
+
+    gray = image.convert("L").resize(
+        (HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS, reducing_gap=3.0
+    )
+    pixels = np.asarray(gray, dtype=np.int16)
+    bits = pixels[:, 1:] > pixels[:, :-1]
+    return np.packbits(bits).tobytes().hex()
+
+
+def hash_images(images: List[Image.Image]) -> List[str]:
+    return [dhash(image) for image in images]
+
+
+def decode_and_hash(
+    blobs: List[bytes],
+) -> List[Union[Tuple[Image.Image, str], Exception]]:
+    """Decoded image and its hash per blob, or the decode error."""
+    decoded: List[Union[Tuple[Image.Image, str], Exception]] = []
+    for data in blobs:
+        try:
+            # hash the same reduced decode the model sees, so ingest and
+            # inference always agree on a photo's hash
+            image = photo_inference.decode_image(data)
+            decoded.append((image, dhash(image)))
+        except Exception as e:
+            decoded.append(e)
+    return decoded
+
+
+async def hash_urls(urls: List[str]) -> List[Optional[str]]:
+    """dHash of each url's photo, None where it could not be fetched or decoded."""
+    downloads = await photo_inference.download_images(urls)
+    blobs = [data for data in downloads if not isinstance(data, Exception)]
+    decoded = iter(await run_in_threadpool(decode_and_hash, blobs))
+    hashes: List[Optional[str]] = []
+    for url, data in zip(urls, downloads):
+        item = data if isinstance(data, Exception) else next(decoded)
+        if isinstance(item, Exception):
+            logger.warning("Could not hash photo %s: %s", url, item)
+            hashes.append(None)
+        else:
+            hashes.append(item[1])
+    return hashes
+
+
+def distance(a: str, b: str) -> int:
+    return (int(a, 16) ^ int(b, 16)).bit_count()
+
+
+async def known_rooms(
+    db: AsyncSession, hashes: Iterable[Optional[str]]
+) -> Dict[str, str]:
+    """Room type of the closest classified photo to each of `hashes`."""
+    wanted = {h for h in hashes if h}
+    if not wanted:
+        return {}
+    if MAX_DISTANCE == 0:
+        match = models.Photos.phash.in_(wanted)
+    else:
+        bands = [models.phash_bands(h) for h in wanted]
+        match = or_(
+            # a range rather than LIKE, so every database walks the phash index
+            *(
+                models.Photos.phash.between(head + "0" * 10, head + "f" * 10)
+                for head, _, _ in bands
+            ),
+            models.Photos.phash_mid.in_({mid for _, mid, _ in bands}),
+            models.Photos.phash_tail.in_({tail for _, _, tail in bands}),
+        )
+    rows = (
+        await db.execute(
+            select(models.Photos.phash, models.Photos.room_type).where(
+                match, models.Photos.room_type.is_not(None)
+            )
+        )
+    ).all()
+    rooms: Dict[str, str] = {}
+    for phash in wanted:
+        best = None
+        for candidate, room in rows:
+            d = distance(phash, candidate)
+            if d <= MAX_DISTANCE and (best is None or d < best[0]):
+                best = (d, room)
+        if best is not None:
+            rooms[phash] = best[1]
+    return rooms
@@ -0,0 +1,159 @@
+"""photo_inference -- download listing photos and classify their room type.
+
+Photos are fetched concurrently with a shared async httpx client, through
+the on-disk image cache, and run through the room classifier in batches, so
+a whole listing costs a handful of model calls instead of one per photo.
+Every classification goes through one micro-batching scheduler, which also
+coalesces photos from concurrent requests into shared batches.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+from io import BytesIO
+from typing import TYPE_CHECKING, List, Optional, Union
+
+import httpx
+
+from renovation_tracker.image_cache import get_image_cache
+from renovation_tracker.inference_scheduler import BatchScheduler
+from renovation_tracker.model_registry import ROOM_IMGSZ, get_room_model
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
+DOWNLOAD_TIMEOUT = float(os.getenv("PHOTO_DOWNLOAD_TIMEOUT", "10"))
+# Concurrent photo downloads per listing
+DOWNLOAD_CONCURRENCY = int(os.getenv("PHOTO_DOWNLOAD_CONCURRENCY", "8"))
+# Images per model call
+INFERENCE_BATCH_SIZE = int(os.getenv("INFERENCE_BATCH_SIZE", "16"))
+# How long the scheduler waits for more images before running a partial batch
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "10"))
+# Let the JPEG decoder downscale to the model's input size while decoding
+DRAFT_DECODE = os.getenv("INFERENCE_DRAFT_DECODE", "1") != "0"
+
+_client: Optional[httpx.AsyncClient] = None
+_sync_client: Optional[httpx.Client] = None
+
+
+def get_async_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            headers=HEADERS, timeout=DOWNLOAD_TIMEOUT, follow_redirects=True
+        )
+    return _client
+
+
+async def close_async_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_http_client() -> httpx.Client:
+    # Pooled client for the single photo (threadpool) path
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = httpx.Client(
+            headers=HEADERS, timeout=DOWNLOAD_TIMEOUT, follow_redirects=True
+        )
+    return _sync_client
+
+
+def close_http_client():
+    global _sync_client
+    if _sync_client is not None:
+        _sync_client.close()
+        _sync_client = None
+
+
+def fetch_image(url: str) -> bytes:
+    client = get_http_client()
+    cache = get_image_cache()
+    if cache is not None:
+        return cache.get(url, client)
+    response = client.get(url)
+    response.raise_for_status()
+    return response.content
+
+
+async def download_images(urls: List[str]) -> List[Union[bytes, Exception]]:
+    """Download every url concurrently, returning the bytes or the error per url."""
+    client = get_async_client()
+    cache = get_image_cache()
+    limit = asyncio.Semaphore(DOWNLOAD_CONCURRENCY)
+
+    async def fetch(url: str) -> bytes:
+        async with limit:
+            if cache is not None:
+                return await cache.aget(url, client)
+            response = await client.get(url)
+            response.raise_for_status()
+            return response.content
+
+    return await asyncio.gather(*(fetch(url) for url in urls), return_exceptions=True)
+
+
+def decode_image(data: bytes, size: Optional[int] = ROOM_IMGSZ) -> Image.Image:
+    # Imported on first decode, processes that never see a photo skip PIL
+    from PIL import Image
+
+    image = Image.open(BytesIO(data))
+    if size and DRAFT_DECODE:
+        # JPEGs decode straight at 1/2, 1/4 or 1/8 scale, keeping both sides
+        # >= size, so a 4K photo never exists at full resolution in memory
+        image.draft("RGB", (size, size))
+    # the classifier expects 3 channels, drop alpha and palettes
+    return image.convert("RGB")
+
+
+def decode_images(blobs: List[bytes]) -> List[Union[Image.Image, Exception]]:
+    decoded: List[Union[Image.Image, Exception]] = []
+    for data in blobs:
+        try:
+            decoded.append(decode_image(data))
+        except Exception as e:
+            decoded.append(e)
+    return decoded
+
+
+def classify_images(images: List[Image.Image]) -> List[str]:
+    """Top-1 room label for each image, predicted in batches."""
+    model = get_room_model()
+    rooms: List[str] = []
+    for i in range(0, len(images), INFERENCE_BATCH_SIZE):
+        rooms += model.classify(images[i : i + INFERENCE_BATCH_SIZE])
+    return rooms
+
+
+_scheduler: Optional[BatchScheduler] = None
+
+
+def get_scheduler() -> BatchScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = BatchScheduler(
+            classify_images, INFERENCE_BATCH_SIZE, INFERENCE_MAX_WAIT_MS, name="room"
+        )
+    return _scheduler
+
+
+def stop_scheduler():
+    global _scheduler
+    if _scheduler is not None:
+        _scheduler.stop()
+        _scheduler = None
+
+
+def classify_image(image: Image.Image) -> str:
+    """Classify one image, blocking until its batch has run."""
+    return get_scheduler().submit(image).result()
+
+
+async def classify_images_async(images: List[Image.Image]) -> List[str]:
+    scheduler = get_scheduler()
+    futures = [asyncio.wrap_future(scheduler.submit(image)) for image in images]
+    return list(await asyncio.gather(*futures))
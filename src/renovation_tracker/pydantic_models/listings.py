@@ -1,6 +1,11 @@
 from enum import StrEnum
 from pydantic import BaseModel, HttpUrl, Field, ConfigDict
-from typing import Optional
+from typing import Literal, Optional
+from renovation_tracker.pydantic_models.photos import PhotosRead
+from renovation_tracker.pydantic_models.renovations import (
+    RenovationFlags,
+    RenovationRead,
+)
 
 
 # Schema for listing base
@@ -25,9 +30,38 @@ class ListingCreate(BaseModel):
 # Schema for listing READ / Delete
 class ListingRead(Listing):
     listing_id: int
+    zip_code: Optional[str] = None
     model_config = ConfigDict(from_attributes=True)
 
 
+# Field names a listing read can be projected to with fields=
+ListingField = Literal[tuple(ListingRead.model_fields)]
+
+
+# Schema for a listing with everything needed to render it
+class ListingDetail(ListingRead):
+    photos: list[PhotosRead] = []
+    renovations: list[RenovationRead] = []
+
+
+# Query filters for listing reads, every bound is inclusive
+class ListingFilters(BaseModel):
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    min_bedroom: Optional[float] = None
+    max_bedroom: Optional[float] = None
+    min_bathroom: Optional[float] = None
+    max_bathroom: Optional[float] = None
+    min_year_built: Optional[int] = None
+    max_year_built: Optional[int] = None
+    zip_code: Optional[str] = None
+
+
+# Schema for a search result, higher scores rank first
+class ListingSearchHit(ListingRead):
+    score: float
+
+
 # Schema for listing UPDATE
 class ListingUpdate(BaseModel):
     url: Optional[str] = None
@@ -37,3 +71,24 @@ class ListingUpdate(BaseModel):
     bedroom: Optional[float] = None
     bathroom: Optional[float] = None
     year_built: Optional[int] = None
+
+
+# Schema for one bulk import row, photos are image urls
+class ListingImport(Listing):
+    photos: list[str] = []
+    renovations: Optional[RenovationFlags] = None
+
+
+# Schema for a row the bulk import skipped, line is 1-based in the input
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+
+# Schema for the bulk import summary
+class ImportResult(BaseModel):
+    rows: int = 0
+    imported: int = 0
+    failed: int = 0
+    # first IMPORT_MAX_ERRORS errors, failed has the full count
+    errors: list[ImportRowError] = []
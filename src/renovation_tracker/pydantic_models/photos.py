@@ -22,9 +22,28 @@ class Photos(BaseModel):
 
 class PhotosRead(Photos):
     photo_id: int
+    phash: Optional[str] = None
     model_config = ConfigDict(from_attributes=True)
 
 
 class PhotosUpdate(BaseModel):
     url: Optional[str]
     room_type: Optional[Room]
+
+
+# Schema for listing level inference results, keyed by photo id
+class PhotosInference(BaseModel):
+    listing_id: int
+    classified: dict[int, str] = Field(default_factory=dict)
+    failed: dict[int, str] = Field(default_factory=dict)
+    # photo ids whose room type was copied from a duplicate instead of inferred
+    reused: list[int] = Field(default_factory=list)
+
+
+# Schema for a group of photos sharing the same perceptual hash
+class PhotoDuplicateCluster(BaseModel):
+    phash: str
+    count: int
+    room_types: list[str]
+    photo_ids: list[int]
+    listing_ids: list[int]
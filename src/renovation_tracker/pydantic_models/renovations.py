@@ -13,6 +13,25 @@ class Renovation(BaseModel):
     basement: bool = Field(default=False)
 
 
+# Schema for the renovated rooms of a listing, without ids (bulk import)
+class RenovationFlags(BaseModel):
+    bathroom: bool = Field(default=False)
+    kitchen: bool = Field(default=False)
+    living_room: bool = Field(default=False)
+    bedroom: bool = Field(default=False)
+    basement: bool = Field(default=False)
+
+
+# Query filters on renovated rooms: true needs a renovation flagging the room,
+# false excludes listings that have one
+class RenovationFilters(BaseModel):
+    renovated_bathroom: Optional[bool] = None
+    renovated_kitchen: Optional[bool] = None
+    renovated_living_room: Optional[bool] = None
+    renovated_bedroom: Optional[bool] = None
+    renovated_basement: Optional[bool] = None
+
+
 # Schema for renovations CREATE
 class RenovationCreate(BaseModel):
     pass
@@ -0,0 +1,28 @@
+from enum import StrEnum
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict
+from typing import Dict, Optional
+
+
+# Enum for scrape job lifecycle
+class JobStatus(StrEnum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+# Schema for scrape job READ
+class ScrapeJobRead(BaseModel):
+    job_id: int
+    url: str
+    status: JobStatus
+    progress: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int
+    listing_id: Optional[int] = None
+    source: Optional[str] = None
+    timings: Optional[Dict[str, float]] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
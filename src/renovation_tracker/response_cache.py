@@ -0,0 +1,334 @@
+"""response_cache -- read-through cache of serialized GET responses.
+
+The single-record read routes (a listing, and the photos and renovations of a
+listing) keep the JSON body they sent, keyed by listing id. There are two
+tiers:
+
+- an in-process LRU of `RESPONSE_CACHE_MAX_ENTRIES` bodies, each trusted for
+  `RESPONSE_CACHE_LOCAL_TTL` seconds (10 by default);
+- an optional shared tier, a `SharedTier` set by `RESPONSE_CACHE_SHARED`, that
+  all workers read through for `RESPONSE_CACHE_TTL` seconds. "memory" is an
+  in-process stand-in for development; "package.module:factory" loads a real
+  one (e.g. a Redis client wrapper).
+
+The PUT/DELETE handlers invalidate the keys they change once their commit is
+done. A load that was running when its key was invalidated still answers its
+own request, but its result is not stored, so a slow read never puts old data
+back after a write. Within a worker the cache tracks its running loads. In
+the shared tier every key has a version that invalidation bumps (and a clear
+bumps one version for all keys). A body is stored with the version read
+before its load, and a body whose version is no longer current counts as a
+miss, so a slow load in one worker cannot undo another worker's write.
+Version counters never expire, one small integer per invalidated key.
+
+Invalidation reaches the worker that handled the write and the shared tier.
+Other workers' local tiers only see the change once the local TTL expires.
+That is why it stays short, with or without a shared tier. Raising it is
+only safe with a single worker.
+
+Every body gets a strong ETag. A request whose If-None-Match has that ETag is
+answered 304 with no body.
+"""
+from __future__ import annotations
+
+import hashlib
+import importlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Protocol, Set, Tuple
+
+from fastapi import Request, Response
+
+logger = logging.getLogger(__name__)
+
+# Bodies kept in each worker, 0 disables caching (ETags still work)
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "10000"))
+# "" for none, "memory" for the in-process stand-in, or "module:factory"
+RESPONSE_CACHE_SHARED = os.getenv("RESPONSE_CACHE_SHARED", "")
+# Seconds a body lives in the shared tier
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+# Seconds a body lives in a worker, bounds how stale other workers can be
+RESPONSE_CACHE_LOCAL_TTL = float(os.getenv("RESPONSE_CACHE_LOCAL_TTL", "10"))
+
+
+# Shared tier version of every key, bumped by ResponseCache.clear
+ALL_KEYS_VERSION = "version:*"
+
+
+def version_key(key: str) -> str:
+    return f"version:{key}"
+
+
+def listing_key(listing_id: int) -> str:
+    return f"listing:{listing_id}"
+
+
+def photos_key(listing_id: int) -> str:
+    return f"photos:{listing_id}"
+
+
+def renovations_key(listing_id: int) -> str:
+    return f"renovations:{listing_id}"
+
+
+@dataclass(frozen=True)
+class Entry:
+    body: bytes
+    etag: str
+
+    @classmethod
+    def of(cls, body: bytes) -> "Entry":
+        return cls(body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        if not if_none_match:
+            return False
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or self.etag in tags
+
+    def response(self, request: Request) -> Response:
+        # no-cache: clients may keep the body but must revalidate with the ETag
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache"}
+        if self.matches(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+        return Response(self.body, media_type="application/json", headers=headers)
+
+
+class SharedTier(Protocol):
+    # values of `keys` in one round trip (Redis MGET), None where missing
+    async def get_many(self, *keys: str) -> List[Optional[bytes]]: ...
+
+    async def set(self, key: str, value: bytes, ttl: float): ...
+
+    # atomic increment with no expiry, a missing key counts as 0 (Redis INCR)
+    async def incr(self, key: str) -> int: ...
+
+    async def delete(self, *keys: str): ...
+
+
+class MemorySharedTier:
+    """Stand-in shared tier for development, shared by nothing but this worker."""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[bytes, float]] = {}
+
+    async def get_many(self, *keys: str) -> List[Optional[bytes]]:
+        now = time.monotonic()
+        values = []
+        for key in keys:
+            value, expires = self._data.get(key, (None, 0.0))
+            if value is not None and expires < now:
+                del self._data[key]
+                value = None
+            values.append(value)
+        return values
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        self._data[key] = (value, time.monotonic() + ttl)
+
+    async def incr(self, key: str) -> int:
+        value, _ = self._data.get(key, (b"0", 0.0))
+        count = int(value) + 1
+        self._data[key] = (str(count).encode(), float("inf"))
+        return count
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._data.pop(key, None)
+
+
+def load_shared_tier(spec: str) -> Optional[SharedTier]:
+    if not spec:
+        return None
+    if spec == "memory":
+        return MemorySharedTier()
+    module, _, factory = spec.partition(":")
+    return getattr(importlib.import_module(module), factory)()
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        max_entries: int,
+        local_ttl: float,
+        shared: Optional[SharedTier] = None,
+        shared_ttl: float = RESPONSE_CACHE_TTL,
+    ):
+        self.max_entries = max_entries
+        self.local_ttl = local_ttl
+        self.shared = shared
+        self.shared_ttl = shared_ttl
+        self._local: "OrderedDict[str, Tuple[Entry, float]]" = OrderedDict()
+        # keys with a load running, and those of them invalidated meanwhile
+        self._loading: Dict[str, int] = {}
+        self._stale: Set[str] = set()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _get_local(self, key: str) -> Optional[Entry]:
+        item = self._local.get(key)
+        if item is None:
+            return None
+        entry, expires = item
+        if expires < time.monotonic():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return entry
+
+    def _put_local(self, key: str, entry: Entry):
+        self._local[key] = (entry, time.monotonic() + self.local_ttl)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def get_or_load(
+        self, key: str, load: Callable[[], Awaitable[bytes]]
+    ) -> Entry:
+        """Cached entry for `key`, or the body `load` returns (exceptions pass)."""
+        if not self.enabled:
+            return Entry.of(await load())
+        entry = self._get_local(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        self._loading[key] = self._loading.get(key, 0) + 1
+        try:
+            body, version = await self._get_shared(key)
+            if body is not None:
+                self.shared_hits += 1
+                entry = Entry.of(body)
+            else:
+                self.misses += 1
+                entry = Entry.of(await load())
+                if key not in self._stale and version is not None:
+                    await self._set_shared(key, version + entry.body)
+            if key not in self._stale:
+                self._put_local(key, entry)
+            return entry
+        finally:
+            self._loading[key] -= 1
+            if not self._loading[key]:
+                del self._loading[key]
+                self._stale.discard(key)
+
+    async def _get_shared(self, key: str) -> Tuple[Optional[bytes], Optional[bytes]]:
+        """Current body of `key` and the version prefix to store a load under.
+
+        The body is None on a miss, and when the stored one predates the last
+        invalidation. The version is None when there is no usable shared tier.
+        """
+        if self.shared is None:
+            return None, None
+        try:
+            stored, key_version, all_version = await self.shared.get_many(
+                key, version_key(key), ALL_KEYS_VERSION
+            )
+        except Exception as e:
+            # the shared tier is an optimization, reads go to the database
+            logger.warning("Shared response cache get failed: %s", e)
+            return None, None
+        version = b"%d.%d\n" % (int(all_version or 0), int(key_version or 0))
+        if stored is not None and stored.startswith(version):
+            return stored[len(version) :], version
+        return None, version
+
+    async def _set_shared(self, key: str, body: bytes):
+        if self.shared is None:
+            return
+        try:
+            await self.shared.set(key, body, self.shared_ttl)
+        except Exception as e:
+            logger.warning("Shared response cache set failed: %s", e)
+
+    async def invalidate(self, *keys: str):
+        """Drop `keys` from both tiers, call after the write is committed."""
+        self.invalidations += len(keys)
+        for key in keys:
+            self._local.pop(key, None)
+            if key in self._loading:
+                self._stale.add(key)
+        if self.shared is not None:
+            try:
+                # the version bump is what turns away a racing load's write
+                for key in keys:
+                    await self.shared.incr(version_key(key))
+                await self.shared.delete(*keys)
+            except Exception as e:
+                logger.warning("Shared response cache delete failed: %s", e)
+
+    async def clear(self):
+        """Drop everything, for writes that touch rows in bulk."""
+        self._local.clear()
+        self._stale.update(self._loading)
+        if self.shared is not None:
+            try:
+                # old bodies stop matching and expire with their TTL
+                await self.shared.incr(ALL_KEYS_VERSION)
+            except Exception as e:
+                logger.warning("Shared response cache clear failed: %s", e)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "entries": len(self._local),
+            "max_entries": self.max_entries,
+            "shared": type(self.shared).__name__ if self.shared else None,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_rate": (
+                round((self.hits + self.shared_hits) / lookups, 3) if lookups else None
+            ),
+            "invalidations": self.invalidations,
+        }
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    global _cache
+    if _cache is None:
+        if RESPONSE_CACHE_MAX_ENTRIES > 0 and not RESPONSE_CACHE_SHARED:
+            logger.info(
+                "Response cache has no shared tier, with several workers a write "
+                "reaches the others within RESPONSE_CACHE_LOCAL_TTL=%ss",
+                RESPONSE_CACHE_LOCAL_TTL,
+            )
+        _cache = ResponseCache(
+            RESPONSE_CACHE_MAX_ENTRIES,
+            RESPONSE_CACHE_LOCAL_TTL,
+            load_shared_tier(RESPONSE_CACHE_SHARED),
+            RESPONSE_CACHE_TTL,
+        )
+    return _cache
+
+
+async def close_response_cache():
+    global _cache
+    if _cache is not None:
+        close = getattr(_cache.shared, "close", None)
+        if close is not None:
+            await close()
+        _cache = None
+
+
+async def cached_response(
+    request: Request, key: str, load: Callable[[], Awaitable[bytes]]
+) -> Response:
+    entry = await get_response_cache().get_or_load(key, load)
+    return entry.response(request)
+
+
+async def invalidate(*keys: str):
+    await get_response_cache().invalidate(*keys)
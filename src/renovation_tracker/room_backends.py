@@ -0,0 +1,222 @@
+"""room_backends -- interchangeable runtimes for the room classifier.
+
+The classifier is trained with ultralytics (yolo-training.py), but on CPU-only
+nodes it is cheaper to serve an ONNX Runtime or OpenVINO export of it, which
+also keeps torch out of the API workers. Every backend takes RGB PIL images
+and returns the top-1 room label, so photo_inference does not care which one
+the registry loaded.
+
+Exports are written next to the weights in yolo_models/:
+
+    uv run model-export --backend onnx --int8
+    uv run model-export --backend openvino --int8 --data path/to/calibration
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import importlib.resources as resources
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from PIL import Image
+
+from renovation_tracker.model_registry import (
+    MODEL_PACKAGE,
+    ROOM_IMGSZ,
+    ROOM_MODEL_BACKEND,
+    ROOM_MODEL_FILE,
+    ROOM_MODEL_INT8,
+)
+
+BACKENDS = ("torch", "onnx", "openvino")
+# Threads per ONNX Runtime/OpenVINO inference, 0 lets the runtime decide
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", "0"))
+
+
+def model_path(backend: str, int8: bool = False) -> Path:
+    """Where the weights (or export) for `backend` live in yolo_models/."""
+    stem = Path(ROOM_MODEL_FILE).stem
+    if backend == "torch":
+        name = ROOM_MODEL_FILE
+    elif backend == "onnx":
+        name = f"{stem}.int8.onnx" if int8 else f"{stem}.onnx"
+    elif backend == "openvino":
+        name = f"{stem}_int8_openvino_model" if int8 else f"{stem}_openvino_model"
+    else:
+        raise ValueError(f"Unknown room model backend {backend!r}, expected one of {BACKENDS}")
+    return Path(str(resources.files(MODEL_PACKAGE) / name))
+
+
+def preprocess(images: List[Image.Image], imgsz: int = ROOM_IMGSZ) -> np.ndarray:
+    """NCHW float32 batch matching ultralytics' classify transforms.
+
+    The same steps as torchvision's Resize(imgsz) and CenterCrop(imgsz) on a
+    PIL image, so the exports see the pixels the torch model sees: shorter
+    side resized to `imgsz` (bilinear, longer side truncated), center crop
+    with the offset rounded, scaled to 0-1 with no mean or std normalisation.
+    Pixels land in one uint8 buffer and the layout change and scaling happen
+    in a single numpy pass. tests/test_room_backends.py holds it to the
+    ultralytics transforms.
+    """
+    pixels = np.empty((len(images), imgsz, imgsz, 3), dtype=np.uint8)
+    for i, image in enumerate(images):
+        w, h = image.size
+        if w <= h:
+            size = (imgsz, int(imgsz * h / w))
+        else:
+            size = (int(imgsz * w / h), imgsz)
+        if size != image.size:
+            image = image.resize(size, Image.BILINEAR)
+        left = int(round((size[0] - imgsz) / 2.0))
+        top = int(round((size[1] - imgsz) / 2.0))
+        pixels[i] = image.crop((left, top, left + imgsz, top + imgsz))
+    batch = np.empty((len(images), 3, imgsz, imgsz), dtype=np.float32)
+    np.multiply(pixels.transpose(0, 3, 1, 2), np.float32(1 / 255), out=batch)
+    return batch
+
+
+class TorchRoomClassifier:
+    name = "torch"
+
+    def __init__(self, path: Path):
+        # Imported here so only the torch backend pays for torch
+        from ultralytics import YOLO
+
+        self.model = YOLO(path)
+
+    def classify(self, images: List[Image.Image]) -> List[str]:
+        results = self.model.predict(images, verbose=False)
+        return [result.names[result.probs.top1] for result in results]
+
+
+class OnnxRoomClassifier:
+    name = "onnx"
+
+    def __init__(self, path: Path):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if INFERENCE_THREADS:
+            options.intra_op_num_threads = INFERENCE_THREADS
+        self.session = ort.InferenceSession(
+            str(path), options, providers=["CPUExecutionProvider"]
+        )
+        # ultralytics stores the class names and input size in the metadata
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names: Dict[int, str] = ast.literal_eval(metadata["names"])
+        self.imgsz = ast.literal_eval(metadata.get("imgsz", str([ROOM_IMGSZ])))[0]
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # a static export only takes one image per run
+        self.dynamic_batch = not isinstance(model_input.shape[0], int)
+
+    def classify(self, images: List[Image.Image]) -> List[str]:
+        batch = preprocess(images, self.imgsz)
+        if self.dynamic_batch:
+            probs = self.session.run(None, {self.input_name: batch})[0]
+        else:
+            probs = np.concatenate(
+                [self.session.run(None, {self.input_name: x[None]})[0] for x in batch]
+            )
+        return [self.names[int(i)] for i in probs.argmax(axis=1)]
+
+
+class OpenVinoRoomClassifier:
+    name = "openvino"
+
+    def __init__(self, path: Path):
+        import openvino as ov
+        import yaml
+
+        core = ov.Core()
+        config = {"PERFORMANCE_HINT": "LATENCY"}
+        if INFERENCE_THREADS:
+            config["INFERENCE_NUM_THREADS"] = INFERENCE_THREADS
+        model = core.read_model(next(path.glob("*.xml")))
+        self.compiled = core.compile_model(model, "CPU", config)
+        metadata = yaml.safe_load((path / "metadata.yaml").read_text())
+        self.names: Dict[int, str] = {int(k): v for k, v in metadata["names"].items()}
+        self.imgsz = metadata.get("imgsz", [ROOM_IMGSZ])[0]
+        self.dynamic_batch = model.inputs[0].get_partial_shape()[0].is_dynamic
+
+    def classify(self, images: List[Image.Image]) -> List[str]:
+        batch = preprocess(images, self.imgsz)
+        if self.dynamic_batch:
+            probs = self.compiled(batch)[0]
+        else:
+            probs = np.concatenate([self.compiled(x[None])[0] for x in batch])
+        return [self.names[int(i)] for i in probs.argmax(axis=1)]
+
+
+_CLASSIFIERS = {
+    "torch": TorchRoomClassifier,
+    "onnx": OnnxRoomClassifier,
+    "openvino": OpenVinoRoomClassifier,
+}
+
+
+def load_classifier(backend: str = ROOM_MODEL_BACKEND, int8: bool = ROOM_MODEL_INT8):
+    # torch has no int8 build here, the flag only picks the quantized exports
+    path = model_path(backend, int8 and backend != "torch")
+    if not path.exists():
+        raise FileNotFoundError(
+            f"No {backend} room model at {path}, run model-export first"
+        )
+    return _CLASSIFIERS[backend](path)
+
+
+def _quantize_onnx(source: Path, target: Path):
+    import onnx
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(source, target, weight_type=QuantType.QUInt8)
+    # keep the names/imgsz metadata the classifier reads
+    original = onnx.load(source, load_external_data=False)
+    quantized = onnx.load(target)
+    if not quantized.metadata_props:
+        quantized.metadata_props.extend(original.metadata_props)
+        onnx.save(quantized, target)
+
+
+def export_room_model(
+    backend: str, int8: bool = False, data: Optional[str] = None
+) -> Path:
+    """Export the torch weights to `backend`, returning the export's path."""
+    from ultralytics import YOLO
+
+    model = YOLO(model_path("torch"))
+    if backend == "onnx":
+        exported = Path(
+            model.export(format="onnx", imgsz=ROOM_IMGSZ, dynamic=True, simplify=True)
+        )
+        if not int8:
+            return exported
+        target = model_path("onnx", int8=True)
+        _quantize_onnx(exported, target)
+        return target
+    if backend == "openvino":
+        return Path(
+            model.export(
+                format="openvino", imgsz=ROOM_IMGSZ, dynamic=True, int8=int8, data=data
+            )
+        )
+    raise ValueError(f"Cannot export to {backend!r}, expected onnx or openvino")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the room classifier")
+    parser.add_argument("--backend", choices=("onnx", "openvino"), default="onnx")
+    parser.add_argument("--int8", action="store_true", help="quantize the weights to INT8")
+    parser.add_argument(
+        "--data", help="calibration dataset for OpenVINO INT8 (ultralytics format)"
+    )
+    args = parser.parse_args()
+    print(export_room_model(args.backend, args.int8, args.data))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,97 +1,313 @@
-from fastapi import APIRouter, HTTPException, Depends, Query, status
-from typing import Annotated
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, status
+from fastapi.responses import StreamingResponse
+from typing import Annotated, Literal, Optional
 from renovation_tracker.pydantic_models.listings import (
+    ImportResult,
     Listing,
+    ListingDetail,
+    ListingField,
+    ListingFilters,
     ListingRead,
+    ListingSearchHit,
     ListingUpdate,
 )
+from renovation_tracker.pydantic_models.renovations import RenovationFilters
+from renovation_tracker.pydantic_models.scrape_jobs import ScrapeJobRead
 import renovation_tracker.models as models
-from renovation_tracker.database import get_db, Session
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
+from renovation_tracker import scrape_jobs
+from renovation_tracker.database import get_async_db, AsyncSession, async_engine
+from sqlalchemy import Select, exists, select, update
+from sqlalchemy.orm import selectinload
+from renovation_tracker.driver_pool import DriverPoolTimeout, get_driver_pool
 import time
-import re
-from bs4 import BeautifulSoup
-
+import httpx
+import io
+import os
+import logging
+import tempfile
+from starlette.concurrency import run_in_threadpool
+from renovation_tracker import bulk_import
+from renovation_tracker import listing_export
+from renovation_tracker import listing_search
+from renovation_tracker import metrics
+from renovation_tracker import photo_hash
+from renovation_tracker import response_cache
+from renovation_tracker import serialization
+
+
+logger = logging.getLogger(__name__)
+
+# Set SCRAPE_FAST_PATH=0 to always scrape with the browser
+FAST_PATH_ENABLED = os.getenv("SCRAPE_FAST_PATH", "1") != "0"
+# Bulk import bodies larger than this are spooled to a temp file
+IMPORT_SPOOL_BYTES = 8 * 1024 * 1024
 
 router = APIRouter(prefix="/listings")
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 
 # Create listing with custom inputs
 @router.post("/", response_model=ListingRead, status_code=status.HTTP_201_CREATED)
-async def create_listing(listing: Listing, db: Annotated[Session, Depends(get_db)]):
+async def create_listing(listing: Listing, db: db_dependency):
     # Create listing using user input
     db_listing = models.Listing(**listing.dict())
     try:
         db.add(db_listing)
-        db.commit()
-        db.refresh(db_listing)
+        await db.commit()
+        await db.refresh(db_listing)
         return db_listing
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error inserting listing: {e}")
 
 
 # CREATE Listing with URL also creates Photos
-@router.post("/url", response_model=ListingRead, status_code=status.HTTP_201_CREATED)
-async def create_url_listing(url: str, db: Annotated[Session, Depends(get_db)]):
-    # Create listing object using web scraping helper function
-    url_return = url_listing(url)
+# Queues a scrape job, poll GET /listings/jobs/{job_id} for the listing_id
+@router.post(
+    "/url", response_model=ScrapeJobRead, status_code=status.HTTP_202_ACCEPTED
+)
+async def create_url_listing(url: str, db: db_dependency):
     try:
-        db.add(url_return["listing"])
-        db.flush()
-        db.refresh(url_return["listing"])
-        for img_url in url_return["photos_list"]:
-            db_photo = models.Photos(
-                url=img_url, listing_id=url_return["listing"].listing_id
-            )
-            db.add(db_photo)
-        db.commit()
-        return url_return["listing"]
+        return await scrape_jobs.enqueue(db, url)
     except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Error inserting listing: {e}")
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error queueing scrape: {e}")
+
+
+# Bulk import listings, photos and renovations from an NDJSON or CSV body
+# Rows are upserted on address in chunks, rows that fail are reported by line
+@router.post("/import", response_model=ImportResult)
+async def import_listings(
+    request: Request,
+    format: Optional[str] = Query(
+        default=None,
+        pattern="^(ndjson|csv)$",
+        description="default: csv for a text/csv body, otherwise ndjson",
+    ),
+):
+    content_type = request.headers.get("content-type", "")
+    fmt = format or ("csv" if "csv" in content_type else "ndjson")
+    result = ImportResult()
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES) as spool:
+        async for data in request.stream():
+            spool.write(data)
+        spool.seek(0)
+        lines = io.TextIOWrapper(spool, encoding="utf-8", newline="")
+        chunks = bulk_import.validated_chunks(bulk_import.iter_records(lines, fmt))
+        async with async_engine.connect() as conn:
+            # parsing and validation are CPU bound, keep them off the event loop
+            while (chunk := await run_in_threadpool(next, chunks, None)) is not None:
+                rows, errors = chunk
+                imported, failed = await conn.run_sync(bulk_import.import_chunk, rows)
+                bulk_import.add_to_result(
+                    result, imported, errors + failed, len(rows) + len(errors)
+                )
+    # upserts can change any listing, its photos and renovations
+    if result.imported:
+        await response_cache.get_response_cache().clear()
+    return result
+
+
+# READ scrape job status
+@router.get("/jobs/{job_id}", response_model=ScrapeJobRead)
+async def get_scrape_job(job_id: int, db: db_dependency):
+    job = await db.get(models.ScrapeJobs, job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404, detail=f"Scrape job with id {job_id} not found"
+        )
+    return job
+
+
+# Filter columns and the bound each ListingFilters field puts on them
+LISTING_FILTERS = {
+    "min_price": (models.Listing.price, "min"),
+    "max_price": (models.Listing.price, "max"),
+    "min_bedroom": (models.Listing.bedroom, "min"),
+    "max_bedroom": (models.Listing.bedroom, "max"),
+    "min_bathroom": (models.Listing.bathroom, "min"),
+    "max_bathroom": (models.Listing.bathroom, "max"),
+    "min_year_built": (models.Listing.year_built, "min"),
+    "max_year_built": (models.Listing.year_built, "max"),
+    "zip_code": (models.Listing.zip_code, "eq"),
+}
+
+
+def filter_listings(query: Select, filters: ListingFilters) -> Select:
+    for name, value in filters.model_dump(exclude_none=True).items():
+        column, bound = LISTING_FILTERS[name]
+        if bound == "min":
+            query = query.where(column >= value)
+        elif bound == "max":
+            query = query.where(column <= value)
+        else:
+            query = query.where(column == value)
+    return query
+
+
+def filter_renovations(query: Select, filters: RenovationFilters) -> Select:
+    for name, value in filters.model_dump(exclude_none=True).items():
+        flag = getattr(models.Renovations, name.removeprefix("renovated_"))
+        renovated = exists().where(
+            models.Renovations.listing_id == models.Listing.listing_id,
+            flag.is_(True),
+        )
+        query = query.where(renovated if value else ~renovated)
+    return query
+
+
+def listings_page(
+    filters: ListingFilters,
+    cursor: Optional[int],
+    limit: int,
+    query: Optional[Select] = None,
+) -> Select:
+    """Keyset page: listings after `cursor` in listing_id order, never an OFFSET."""
+    query = filter_listings(
+        query if query is not None else select(models.Listing), filters
+    )
+    if cursor is not None:
+        query = query.where(models.Listing.listing_id > cursor)
+    return query.order_by(models.Listing.listing_id).limit(limit)
 
 
-# READ all Listings
+# READ Listings a page at a time, optionally filtered
+# A full page sets X-Next-Cursor, pass it back as cursor for the next page
+# Rows are encoded straight from the selected columns, fields= picks them
 @router.get("/", response_model=list[ListingRead])
 async def read_listing(
-    db: Annotated[Session, Depends(get_db)],
-    limit: int = Query(default=25, le=100, description="limit amount of listings read"),
+    db: db_dependency,
+    filters: Annotated[ListingFilters, Depends()],
+    limit: int = Query(
+        default=25, ge=1, le=100, description="limit amount of listings read"
+    ),
+    cursor: Optional[int] = Query(
+        default=None, description="listing_id of the last listing already read"
+    ),
+    fields: list[ListingField] = Query(
+        default=[], description="fields to return, listing_id is always included"
+    ),
 ):
-    allListings = db.query(models.Listing).limit(limit).all()
-    return allListings
+    query = serialization.select_fields(
+        models.Listing, ListingRead, fields and ["listing_id", *fields]
+    )
+    # one extra row tells whether there is a next page
+    allListings = await serialization.fetch_dicts(
+        db, listings_page(filters, cursor, limit + 1, query)
+    )
+    headers = {}
+    if len(allListings) > limit:
+        allListings = allListings[:limit]
+        headers["X-Next-Cursor"] = str(allListings[-1]["listing_id"])
+    return serialization.json_response(allListings, headers)
+
+
+# Search listing descriptions, best match first
+# Every word and "quoted phrase" in q must appear, filters narrow the results
+@router.get("/search", response_model=list[ListingSearchHit])
+async def search_listings(
+    db: db_dependency,
+    filters: Annotated[ListingFilters, Depends()],
+    renovations: Annotated[RenovationFilters, Depends()],
+    q: str = Query(min_length=1, max_length=200, description="search text"),
+    limit: int = Query(
+        default=25, ge=1, le=100, description="limit amount of listings read"
+    ),
+):
+    query = filter_renovations(
+        filter_listings(select(models.Listing), filters), renovations
+    )
+    hits = await listing_search.search(db, q, query, limit)
+    return [
+        ListingSearchHit(**ListingRead.model_validate(listing).model_dump(), score=score)
+        for listing, score in hits
+    ]
 
 
-# READ single listing
-@router.get("/{listing_id}", response_model=ListingRead)
-async def list_listing(listing_id: int, db: Annotated[Session, Depends(get_db)]):
-    listing = (
-        db.query(models.Listing).filter(models.Listing.listing_id == listing_id).first()
+MAX_DETAIL_IDS = 100
+
+
+def listing_details(ids: list[int]) -> Select:
+    # photos and renovations come in one IN query each, however many listings
+    return (
+        select(models.Listing)
+        .where(models.Listing.listing_id.in_(ids))
+        .options(
+            selectinload(models.Listing.photos),
+            selectinload(models.Listing.renovations),
+        )
+    )
+
+
+# READ many listings with their photos and renovations, in the order asked for
+@router.get("/details", response_model=list[ListingDetail])
+async def read_listing_details(
+    db: db_dependency,
+    ids: list[int] = Query(max_length=MAX_DETAIL_IDS, description="listing ids"),
+):
+    listings = {
+        listing.listing_id: listing
+        for listing in (await db.scalars(listing_details(ids))).all()
+    }
+    missing = [listing_id for listing_id in ids if listing_id not in listings]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Listings not found: {missing}")
+    return [listings[listing_id] for listing_id in ids]
+
+
+# Export every listing matching the filters as NDJSON or CSV
+# Streamed from a server-side cursor, photos/renovations added with include=
+@router.get("/export")
+async def export_listings(
+    filters: Annotated[ListingFilters, Depends()],
+    format: Literal["ndjson", "csv"] = "ndjson",
+    include: list[Literal["photos", "renovations"]] = Query(default=[]),
+):
+    query = filter_listings(listing_export.listings_query(), filters)
+    return StreamingResponse(
+        listing_export.stream_export(query, format, include),
+        media_type=listing_export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="listings.{format}"'},
     )
+
+
+# READ single listing with its photos and renovations
+@router.get("/{listing_id}/detail", response_model=ListingDetail)
+async def read_listing_detail(listing_id: int, db: db_dependency):
+    listing = (await db.scalars(listing_details([listing_id]))).first()
     if listing is None:
         raise HTTPException(
             status_code=404, detail=f"Listing with id {listing_id} not found"
         )
-
     return listing
 
 
+# READ single listing
+# Served from the response cache, If-None-Match with the ETag gets a 304
+@router.get("/{listing_id}", response_model=ListingRead)
+async def list_listing(listing_id: int, request: Request, db: db_dependency):
+    async def load():
+        listing = await serialization.fetch_dicts(
+            db,
+            serialization.select_fields(models.Listing, ListingRead).where(
+                models.Listing.listing_id == listing_id
+            ),
+        )
+        if not listing:
+            raise HTTPException(
+                status_code=404, detail=f"Listing with id {listing_id} not found"
+            )
+        return serialization.dumps(listing[0])
+
+    return await response_cache.cached_response(
+        request, response_cache.listing_key(listing_id), load
+    )
+
+
 # UPDATE Listing
 @router.put("/{listing_id}", response_model=ListingRead)
-async def update_listing(
-    listing_id: int, listing: ListingUpdate, db: Annotated[Session, Depends(get_db)]
-):
-    findListing = (
-        db.query(models.Listing).filter(models.Listing.listing_id == listing_id).first()
-    )
+async def update_listing(listing_id: int, listing: ListingUpdate, db: db_dependency):
+    findListing = await db.get(models.Listing, listing_id)
     if findListing is None:
         raise HTTPException(
             status_code=404, detail=f"Listing to update with id {listing_id} not found"
@@ -103,11 +319,12 @@ async def update_listing(
         for keys, value in update_listing.items():
             setattr(findListing, keys, value)
 
-        db.commit()
-        db.refresh(findListing)
+        await db.commit()
+        await db.refresh(findListing)
+        await response_cache.invalidate(response_cache.listing_key(listing_id))
         return findListing
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail=f"Error occurred while updating listing {listing_id} {e}",
@@ -116,19 +333,28 @@ async def update_listing(
 
 # DELETE Listing
 @router.delete("/{listing_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_item(listing_id: int, db: Annotated[Session, Depends(get_db)]):
-    listing = (
-        db.query(models.Listing).filter(models.Listing.listing_id == listing_id).first()
-    )
+async def delete_item(listing_id: int, db: db_dependency):
+    listing = await db.get(models.Listing, listing_id)
     if listing is None:
         raise HTTPException(
             status_code=404, detail=f"Listing to delete with id {listing_id} not found"
         )
     try:
-        db.delete(listing)
-        db.commit()
+        # also done by ON DELETE SET NULL, but tables created before it lack it
+        await db.execute(
+            update(models.ScrapeJobs)
+            .where(models.ScrapeJobs.listing_id == listing_id)
+            .values(listing_id=None)
+        )
+        await db.delete(listing)
+        await db.commit()
+        await response_cache.invalidate(
+            response_cache.listing_key(listing_id),
+            response_cache.photos_key(listing_id),
+            response_cache.renovations_key(listing_id),
+        )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail=f"Error occurred while deleting listing {listing_id}",
@@ -139,231 +365,203 @@ async def delete_item(listing_id: int, db: Annotated[Session, Depends(get_db)]):
 #
 
 
-# Helper function to launch web driver used in selenium
+# Helper function to load a page with a pooled web driver used in selenium
 def get_source(url: str):
-    driver = None
     try:
-        driver = webdriver.Chrome(
-            service=ChromeService(ChromeDriverManager().install())
-        )
-        driver.set_page_load_timeout(15)
-        driver.get(url)
-
-        page_source = driver.page_source
-
-        return page_source
+        with get_driver_pool().driver() as driver:
+            driver.get(url)
+            return driver.page_source
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Scraping error {e}")
-    finally:
-        if driver:
-            driver.quit()
-
 
-# helpers.py or at top of your routes file
-def scrape_carousel_images(driver):
-    image_list = {}
-    visited_slides = set()
 
-    # Get the next button
-    next_btn = driver.find_element(
-        By.CSS_SELECTOR, "button.primary-carousel-right-nav.right-nav"
-    )
+# Reads every carousel image in the DOM in one round trip instead of a call per attribute
+CAROUSEL_IMAGES_JS = """
+return Array.from(document.querySelectorAll("img.primary-carousel-slide-img"))
+    .map(img => [img.getAttribute("data-index"), img.src || img.getAttribute("data-src")])
+    .filter(([idx, src]) => idx && src);
+"""
+# Upper bound on next clicks for carousels that only render nearby slides
+MAX_CAROUSEL_CLICKS = int(os.getenv("SCRAPE_MAX_CAROUSEL_CLICKS", "80"))
+# How long a click may take to reveal a new image before we assume the end
+CAROUSEL_WAIT = float(os.getenv("SCRAPE_CAROUSEL_WAIT", "2"))
 
-    while True:
-        # Find all slide containers
-        slides = driver.find_elements(By.CSS_SELECTOR, "div.primary-carousel-slide")
 
-        found_new_slide = False
+def _read_carousel(driver, image_list: dict) -> int:
+    added = 0
+    for idx, src in driver.execute_script(CAROUSEL_IMAGES_JS) or []:
+        if idx not in image_list:
+            added += 1
+        image_list[idx] = src
+    return added
 
-        for slide in slides:
-            slide_num = slide.get_attribute("data-slide")
 
-            # Skip if slide_num missing (shouldn’t happen) or already visited
-            if not slide_num or slide_num in visited_slides:
-                continue
+# Collects carousel image urls, clicking next only while images are still missing
+# expected is the photo count known from the page's embedded data, 0 if unknown
+def scrape_carousel_images(driver, expected: int = 0, stats: dict | None = None):
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
 
-            # Mark new slide detected
-            found_new_slide = True
-            visited_slides.add(slide_num)
-
-            # Extract all images inside this slide
-            imgs = slide.find_elements(
-                By.CSS_SELECTOR, "img.primary-carousel-slide-img"
-            )
+    start = time.perf_counter()
+    image_list = {}
+    clicks = 0
 
-            for img in imgs:
-                src = img.get_attribute("src") or img.get_attribute("data-src")
-                idx = img.get_attribute("data-index")
-                if src and idx:
-                    image_list[idx] = src
+    # Most pages already have every slide in the DOM
+    _read_carousel(driver, image_list)
 
-        # No new slide found → we're looping, so stop
-        if not found_new_slide:
-            break
-
-        # Click next and wait for the slide to change
+    next_btns = driver.find_elements(
+        By.CSS_SELECTOR, "button.primary-carousel-right-nav.right-nav"
+    )
+    while (
+        next_btns
+        and clicks < MAX_CAROUSEL_CLICKS
+        and (not expected or len(image_list) < expected)
+    ):
+        driver.execute_script("arguments[0].click();", next_btns[0])
+        clicks += 1
         try:
-            driver.execute_script("arguments[0].click();", next_btn)
-
-            # Wait for new slide to appear (data-slide changes)
-            WebDriverWait(driver, 5).until(
-                lambda d: any(
-                    s.get_attribute("data-slide") not in visited_slides
-                    for s in d.find_elements(
-                        By.CSS_SELECTOR, "div.primary-carousel-slide"
-                    )
-                )
+            # Poll for newly rendered images, no fixed sleep
+            WebDriverWait(driver, CAROUSEL_WAIT, poll_frequency=0.05).until(
+                lambda d: _read_carousel(d, image_list) > 0
             )
-            time.sleep(0.4)
-
-        except Exception:
+        except TimeoutException:
+            # Nothing new appeared, the carousel has wrapped around
             break
 
-    return list(image_list.values())
+    if stats is not None:
+        stats["carousel_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        stats["carousel_clicks"] = clicks
+    ordered = sorted(image_list, key=lambda i: int(i) if i.isdigit() else 0)
+    return [image_list[idx] for idx in ordered]
 
 
 # Helper function that takes url and returns listing object to be inerted into db and list of photo urls to be added as photos
+# Tries a plain HTTP fetch first and only starts a browser when that page is incomplete
+# selenium and bs4 are imported on the first scrape, not when the API boots
 def url_listing(url: str):
-    driver = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()))
-    driver.set_page_load_timeout(15)
-    driver.get(url)
-    # Web Scraping
-    # Uses beautifulsoup to obtain info from html
-    try:
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-
-        # Webscraping Address (Required)
-        address = soup.find("span", {"class": "property-info-address-main"})
-        if not address:
-            raise NoSuchElementException("Address not found likely not a valid URL")
-        city_state = soup.find("span", {"class": "property-info-address-citystatezip"})
-        city_state_zip = ""
-        if not city_state:
-            raise NoSuchElementException("Address not found likely not a valid URL")
-        for child in city_state:
-            city_state_zip += child.get_text(strip=True) + " "
-
-        # Scraping description (Required)
-        description = soup.find("p", {"class": "ldp-description-text"})
-        if not description:
-            raise NoSuchElementException("Description not found likely not a valid URL")
-
-        # Scraping Price (Optional)
-        price = soup.find("span", {"class": "property-info-price"})
-        price_numeric = (
-            float(price.get_text(strip=True).replace("$", "").replace(",", ""))
-            if price
-            else None
-        )
+    from renovation_tracker import listing_extractor
 
-        # Scraping number of bedrooms and bathroom (Optional)
-        bedroom_bathroom = soup.find_all("span", {"class": "property-info-feature"})
-        bedroom = (
-            float(
-                bedroom_bathroom[0]
-                .find("span", {"class": "property-info-feature-detail"})
-                .get_text(strip=True)
-            )
-            if bedroom_bathroom
-            and bedroom_bathroom[0].find("span", {"class": "feature-beds"})
-            else None
-        )
-        bathroom = (
-            float(
-                bedroom_bathroom[1]
-                .find("span", {"class": "property-info-feature-detail"})
-                .get_text(strip=True)
+    start = time.perf_counter()
+    timings = {}
+    fields = None
+    source = "http"
+    if FAST_PATH_ENABLED:
+        try:
+            html = listing_extractor.fetch_html(url)
+        except httpx.HTTPError:
+            html = None
+        timings["fetch_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        if html is not None:
+            with metrics.stage("scrape.parse"):
+                fields = listing_extractor.parse_listing(html)
+    if fields is None or not listing_extractor.is_complete(fields):
+        source = "browser"
+        browser_start = time.perf_counter()
+        with get_driver_pool().driver() as driver:
+            driver.get(url)
+            timings["page_load_ms"] = round(
+                (time.perf_counter() - browser_start) * 1000, 1
             )
-            if bedroom_bathroom
-            and bedroom_bathroom[1].find("span", {"class": "feature-baths"})
-            else None
+            fields = scrape_listing(driver, timings)
+    timings["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    logger.info("Scraped %s via %s %s", url, source, timings)
+    for name, value in timings.items():
+        if name.endswith("_ms"):
+            metrics.observe_stage(f"scrape.{name.removesuffix('_ms')}", value)
+
+    missing = listing_extractor.missing_fields(fields)
+    if missing:
+        from selenium.common.exceptions import NoSuchElementException
+
+        raise NoSuchElementException(
+            f"{', '.join(missing)} not found likely not a valid URL"
         )
 
-        # Scraping year built (Optional)
-        year_container = soup.find(
-            lambda tag: tag.name == "li"
-            and "amenities-detail" in tag.get("class", [])
-            and "Built in" in tag.text
+    # Creating listing object
+    db_listing = models.Listing(
+        url=url,
+        address=fields["address"],
+        description=fields["description"],
+        price=fields["price"],
+        bedroom=fields["bedroom"],
+        bathroom=fields["bathroom"],
+        year_built=fields["year_built"],
+    )
+    return {
+        "listing": db_listing,
+        "photos_list": fields["photos"],
+        "source": source,
+        "timings": timings,
+    }
+
+
+# Helper function used by the scrape workers to insert a scraped listing and its photos
+async def save_scraped_listing(db: AsyncSession, url_return) -> int:
+    urls = url_return["photos_list"]
+    # Hash the photos first so duplicates of classified photos get their room type
+    with metrics.stage("photos.hash"):
+        hashes = await photo_hash.hash_urls(urls) if photo_hash.HASH_AT_INGEST else []
+    hashes += [None] * (len(urls) - len(hashes))
+    try:
+        rooms = await photo_hash.known_rooms(db, hashes)
+        db.add(url_return["listing"])
+        await db.flush()
+        db.add_all(
+            models.Photos(
+                url=img_url,
+                phash=phash,
+                room_type=rooms.get(phash),
+                listing_id=url_return["listing"].listing_id,
+            )
+            for img_url, phash in zip(urls, hashes)
         )
-        year_built = None
-        if year_container:
-            year_built = re.search(
-                r"Built in\s+(\d+)", year_container.get_text(strip=True)
-            ).group(1)
-
-        # Scraping images (Optional)
-        image_list = scrape_carousel_images(driver)
-
-        # Creating listing object
-        db_listing = models.Listing(
-            url=url,
-            address=address.get_text(strip=True) + " " + city_state_zip,
-            description=description.get_text(strip=True),
-            price=price_numeric,
-            bedroom=bedroom,
-            bathroom=bathroom,
-            year_built=year_built,
+        await db.commit()
+        return url_return["listing"].listing_id
+    except Exception:
+        await db.rollback()
+        raise
+
+
+# Web Scraping with the page loaded in the driver
+# Fields come from the rendered html, images from walking the carousel
+def scrape_listing(driver, stats: dict | None = None):
+    from renovation_tracker import listing_extractor
+
+    with metrics.stage("scrape.parse"):
+        fields = listing_extractor.parse_listing(driver.page_source)
+    if not listing_extractor.missing_fields(fields):
+        # photos found in the embedded data tell the carousel walk when to stop
+        fields["photos"] = (
+            scrape_carousel_images(driver, len(fields["photos"]), stats)
+            or fields["photos"]
         )
-
-        return {"listing": db_listing, "photos_list": image_list}
-    finally:
-        driver.quit()
+    return fields
 
 
 # Example web scraping for testing
+# Plain def so FastAPI runs the blocking selenium work in its threadpool
 @router.get("/example/")
-async def scrape_web(url: str):
-    driver = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()))
-    driver.set_page_load_timeout(15)
-    driver.get(url)
-    # response = get_source(url)
+def scrape_web(url: str):
     try:
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        title_tag = soup.find("h1")
-        address = soup.find("span", {"class": "property-info-address-main"})
-        city_state = soup.find("span", {"class": "property-info-address-citystatezip"})
-        city_state_zip = ""
-        for child in city_state:
-            city_state_zip += child.get_text(strip=True) + " "
-        description = soup.find("p", {"class": "ldp-description-text"})
-        price = soup.find("span", {"class": "property-info-price"})
-        bedroom_bathroom = soup.find_all("span", {"class": "property-info-feature"})
-        bedroom = bedroom_bathroom[0].find(
-            "span", {"class": "property-info-feature-detail"}
-        )
-        bathroom = bedroom_bathroom[1].find(
-            "span", {"class": "property-info-feature-detail"}
-        )
-        year_container = soup.find(
-            lambda tag: tag.name == "li"
-            and "amenities-detail" in tag.get("class", [])
-            and "Built in" in tag.text
+        with get_driver_pool().driver() as driver:
+            driver.get(url)
+            return example_scrape(driver)
+    except DriverPoolTimeout as e:
+        raise HTTPException(status_code=503, detail=f"Scraper busy: {e}")
+
+
+def example_scrape(driver):
+    fields = scrape_listing(driver)
+    parts = [
+        fields[name] if fields[name] is not None else ""
+        for name in (
+            "address",
+            "description",
+            "price",
+            "bedroom",
+            "bathroom",
+            "year_built",
         )
-        year_built = None
-        if year_container:
-            year_built = (
-                re.search(r"Built in\s+(\d+)", year_container.get_text(strip=True))
-            ).group(1)
-
-        # scrape images dynamically
-        images = scrape_carousel_images(driver)
-        return {
-            "response": address.get_text(strip=True)
-            + " "
-            + city_state_zip
-            + " "
-            + description.get_text(strip=True)
-            + " "
-            + price.get_text(strip=True)
-            + " "
-            + bedroom.get_text(strip=True)
-            + " "
-            + bathroom.get_text(strip=True)
-            + " "
-            + str(year_built or "")
-            + " "
-            + str(len(images))
-            + " "
-        }
-    finally:
-        driver.quit()
+    ]
+    return {"response": " ".join(str(part) for part in parts) + f" {len(fields['photos'])} "}
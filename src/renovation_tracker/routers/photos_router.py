@@ -1,53 +1,115 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Request, status
 from typing import Annotated
-from renovation_tracker.pydantic_models.photos import Photos, PhotosRead, PhotosUpdate
+from renovation_tracker.pydantic_models.photos import (
+    PhotoDuplicateCluster,
+    Photos,
+    PhotosInference,
+    PhotosRead,
+    PhotosUpdate,
+)
 import renovation_tracker.models as models
-from renovation_tracker.database import get_db, Session
-from PIL import Image
-import requests
-from io import BytesIO
-import importlib.resources as resources
-from ultralytics import YOLO
+from renovation_tracker.database import get_async_db, AsyncSession
+from sqlalchemy import func, select
+from starlette.concurrency import run_in_threadpool
+from renovation_tracker import metrics
+from renovation_tracker import photo_hash
+from renovation_tracker import photo_inference as inference
+from renovation_tracker import response_cache
+from renovation_tracker import serialization
+from renovation_tracker.image_cache import get_image_cache
 
 router = APIRouter(prefix="/photos")
-db_dependency = Annotated[Session, Depends(get_db)]
-with resources.path("renovation_tracker.yolo_models", "new.pt") as model_path:
-    yolo_model = YOLO(model_path)
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 
 # CREATE Photo Entry with custom input
 @router.post("/", response_model=PhotosRead, status_code=status.HTTP_201_CREATED)
-async def create_photo(photo: Photos, db: Annotated[Session, Depends(get_db)]):
+async def create_photo(photo: Photos, db: db_dependency):
     db_photos = models.Photos(**photo.dict())
+    if photo_hash.HASH_AT_INGEST:
+        [db_photos.phash] = await photo_hash.hash_urls([photo.url])
+        if db_photos.room_type is None:
+            rooms = await photo_hash.known_rooms(db, [db_photos.phash])
+            db_photos.room_type = rooms.get(db_photos.phash)
     try:
         db.add(db_photos)
-        db.commit()
-        db.refresh(db_photos)
+        await db.commit()
+        await db.refresh(db_photos)
+        await response_cache.invalidate(response_cache.photos_key(photo.listing_id))
         return db_photos
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error inserting photo: {e}")
 
 
 # READ photos for given listing id
+# Served from the response cache, If-None-Match with the ETag gets a 304
 @router.get("/{listing_id}/read", response_model=list[PhotosRead])
-async def get_photos(listing_id: int, db: Annotated[Session, Depends(get_db)]):
-    listing = (
-        db.query(models.Listing).filter(models.Listing.listing_id == listing_id).first()
+async def get_photos(listing_id: int, request: Request, db: db_dependency):
+    async def load():
+        listing = await db.scalar(
+            select(models.Listing.listing_id).where(
+                models.Listing.listing_id == listing_id
+            )
+        )
+        if listing is None:
+            raise HTTPException(
+                status_code=404, detail=f"Listing with id {listing_id} not found"
+            )
+        photos = await serialization.fetch_dicts(
+            db,
+            serialization.select_fields(models.Photos, PhotosRead)
+            .where(models.Photos.listing_id == listing_id)
+            .order_by(models.Photos.photo_id),
+        )
+        return serialization.dumps(photos)
+
+    return await response_cache.cached_response(
+        request, response_cache.photos_key(listing_id), load
     )
-    if listing is None:
-        raise HTTPException(
-            status_code=404, detail=f"Listing with id {listing_id} not found"
+
+
+# Report groups of photos with identical perceptual hashes, largest groups first
+# (near duplicates a bit or two apart are reused for inference, not grouped here)
+@router.get("/duplicates", response_model=list[PhotoDuplicateCluster])
+async def duplicate_photos(db: db_dependency, min_size: int = 2, limit: int = 100):
+    clusters = (
+        await db.execute(
+            select(models.Photos.phash, func.count())
+            .where(models.Photos.phash.is_not(None))
+            .group_by(models.Photos.phash)
+            .having(func.count() >= min_size)
+            .order_by(func.count().desc())
+            .limit(limit)
         )
-    return listing.photos
+    ).all()
+    members = (
+        await db.scalars(
+            select(models.Photos)
+            .where(models.Photos.phash.in_([phash for phash, _ in clusters]))
+            .order_by(models.Photos.photo_id)
+        )
+    ).all()
+    report = {
+        phash: PhotoDuplicateCluster(
+            phash=phash, count=count, room_types=[], photo_ids=[], listing_ids=[]
+        )
+        for phash, count in clusters
+    }
+    for photo in members:
+        cluster = report[photo.phash]
+        cluster.photo_ids.append(photo.photo_id)
+        if photo.listing_id is not None and photo.listing_id not in cluster.listing_ids:
+            cluster.listing_ids.append(photo.listing_id)
+        if photo.room_type is not None and photo.room_type not in cluster.room_types:
+            cluster.room_types.append(photo.room_type)
+    return list(report.values())
 
 
 # READ photo given photo id
 @router.get("/{photo_id}", response_model=PhotosRead)
-async def get_photo_by_id(photo_id: int, db: Annotated[Session, Depends(get_db)]):
-    get_photo = (
-        db.query(models.Photos).filter(models.Photos.photo_id == photo_id).first()
-    )
+async def get_photo_by_id(photo_id: int, db: db_dependency):
+    get_photo = await db.get(models.Photos, photo_id)
     if get_photo is None:
         raise HTTPException(
             status_code=404, detail=f"Photo with id {photo_id} not found"
@@ -58,23 +120,39 @@ async def get_photo_by_id(photo_id: int, db: Annotated[Session, Depends(get_db)]
 
 # Photo inference function to return roomtype given photoid
 @router.put("/inference")
-async def photo_inference(photo_id: int, db: Annotated[Session, Depends(get_db)]):
-    findPhoto = (
-        db.query(models.Photos).filter(models.Photos.photo_id == photo_id).first()
-    )
+async def photo_inference(photo_id: int, db: db_dependency):
+    findPhoto = await db.get(models.Photos, photo_id)
     if findPhoto is None:
         raise HTTPException(
             status_code=404, detail=f"Photo with id {photo_id} not found"
         )
     if findPhoto.room_type is None:
         try:
-            room = get_room(findPhoto.url)
+            # A duplicate that is already classified saves the download
+            rooms = await photo_hash.known_rooms(db, [findPhoto.phash])
+            room = rooms.get(findPhoto.phash)
+            if room is None:
+                # Download, decoding and hashing are blocking so they run in the threadpool
+                with metrics.stage("photos.download"):
+                    data = await run_in_threadpool(inference.fetch_image, findPhoto.url)
+                with metrics.stage("photos.decode"):
+                    image = await run_in_threadpool(inference.decode_image, data)
+                with metrics.stage("photos.hash"):
+                    findPhoto.phash = await run_in_threadpool(photo_hash.dhash, image)
+                rooms = await photo_hash.known_rooms(db, [findPhoto.phash])
+                room = rooms.get(findPhoto.phash)
+            if room is None:
+                with metrics.stage("photos.classify"):
+                    [room] = await inference.classify_images_async([image])
             setattr(findPhoto, "room_type", room)
-            db.commit()
-            db.refresh(findPhoto)
+            await db.commit()
+            await db.refresh(findPhoto)
+            await response_cache.invalidate(
+                response_cache.photos_key(findPhoto.listing_id)
+            )
             return room
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             raise HTTPException(
                 status_code=500,
                 detail=f"Error occurred while updating photo with id {photo_id}",
@@ -83,14 +161,106 @@ async def photo_inference(photo_id: int, db: Annotated[Session, Depends(get_db)]
         return findPhoto.room_type
 
 
+# Inference scheduler histograms and image cache hit rates
+@router.get("/inference/stats")
+async def inference_stats():
+    cache = get_image_cache()
+    return {
+        "scheduler": inference.get_scheduler().stats(),
+        "image_cache": cache.stats() if cache is not None else None,
+    }
+
+
+# Photo inference for every unclassified photo of a listing
+# Photos are downloaded concurrently, classified in batches and saved in one commit
+@router.put("/{listing_id}/inference", response_model=PhotosInference)
+async def listing_inference(listing_id: int, db: db_dependency):
+    listing = await db.get(models.Listing, listing_id)
+    if listing is None:
+        raise HTTPException(
+            status_code=404, detail=f"Listing with id {listing_id} not found"
+        )
+    photos = (
+        await db.scalars(
+            select(models.Photos).where(
+                models.Photos.listing_id == listing_id,
+                models.Photos.room_type.is_(None),
+            )
+        )
+    ).all()
+    result = PhotosInference(listing_id=listing_id)
+
+    # Photos hashed at ingest may duplicate one that is already classified
+    rooms = await photo_hash.known_rooms(db, [p.phash for p in photos])
+    pending = []
+    for photo in photos:
+        if photo.phash in rooms:
+            photo.room_type = rooms[photo.phash]
+            result.classified[photo.photo_id] = photo.room_type
+            result.reused.append(photo.photo_id)
+        else:
+            pending.append(photo)
+
+    with metrics.stage("photos.download"):
+        downloads = await inference.download_images([p.url for p in pending])
+    fetched = []
+    for photo, data in zip(pending, downloads):
+        if isinstance(data, Exception):
+            result.failed[photo.photo_id] = f"Download failed: {data}"
+        else:
+            fetched.append((photo, data))
+
+    # Decoding is blocking so it runs in the threadpool, the model has its own thread
+    with metrics.stage("photos.decode"):
+        images = await run_in_threadpool(
+            inference.decode_images, [data for _, data in fetched]
+        )
+    decoded = []
+    for (photo, _), image in zip(fetched, images):
+        if isinstance(image, Exception):
+            result.failed[photo.photo_id] = f"Decode failed: {image}"
+        else:
+            decoded.append((photo, image))
+    with metrics.stage("photos.hash"):
+        hashes = await run_in_threadpool(
+            photo_hash.hash_images, [image for _, image in decoded]
+        )
+    # Photos with the same hash are classified once
+    by_hash = {}
+    for (photo, image), phash in zip(decoded, hashes):
+        photo.phash = phash
+        by_hash.setdefault(phash, (image, []))[1].append(photo)
+    rooms = await photo_hash.known_rooms(db, by_hash)
+
+    try:
+        unknown = [phash for phash in by_hash if phash not in rooms]
+        inferred_hashes = set(unknown)
+        with metrics.stage("photos.classify"):
+            inferred = await inference.classify_images_async(
+                [by_hash[phash][0] for phash in unknown]
+            )
+        rooms.update(zip(unknown, inferred))
+        for phash, (_, group) in by_hash.items():
+            for i, photo in enumerate(group):
+                photo.room_type = rooms[phash]
+                result.classified[photo.photo_id] = photo.room_type
+                if phash not in inferred_hashes or i > 0:
+                    result.reused.append(photo.photo_id)
+        await db.commit()
+        await response_cache.invalidate(response_cache.photos_key(listing_id))
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error occurred while classifying photos of listing {listing_id} {e}",
+        )
+    return result
+
+
 # Update Photo Entry with custom input
 @router.put("/{photo_id}", response_model=PhotosRead)
-async def update_photo(
-    photo_id: int, photo: PhotosUpdate, db: Annotated[Session, Depends(get_db)]
-):
-    find_photo = (
-        db.query(models.Photos).filter(models.Photos.photo_id == photo_id).first()
-    )
+async def update_photo(photo_id: int, photo: PhotosUpdate, db: db_dependency):
+    find_photo = await db.get(models.Photos, photo_id)
     if find_photo is None:
         raise HTTPException(
             status_code=404, detail=f"Photo to update with id {photo_id} not found"
@@ -99,11 +269,14 @@ async def update_photo(
     try:
         for keys, value in db_photos.items():
             setattr(find_photo, keys, value)
-        db.commit()
-        db.refresh(find_photo)
+        await db.commit()
+        await db.refresh(find_photo)
+        await response_cache.invalidate(
+            response_cache.photos_key(find_photo.listing_id)
+        )
         return find_photo
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail=f"Error occurred while updating photo {photo_id} {e}",
@@ -112,21 +285,22 @@ async def update_photo(
 
 # DELETE Photo
 @router.delete("/{photo_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_photo(photo_id: int, db: Annotated[Session, Depends(get_db)]):
-    find_photo = (
-        db.query(models.Photos).filter(models.Photos.photo_id == photo_id).first()
-    )
+async def delete_photo(photo_id: int, db: db_dependency):
+    find_photo = await db.get(models.Photos, photo_id)
     if find_photo is None:
         raise HTTPException(
             status_code=404,
             detail=f"Photo to delete with id {photo_id} not found",
         )
     try:
-        db.delete(find_photo)
-        db.commit()
+        await db.delete(find_photo)
+        await db.commit()
+        await response_cache.invalidate(
+            response_cache.photos_key(find_photo.listing_id)
+        )
         return {"message": "Photo Deleted"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail=f"Error occurred while deleting photo with id {photo_id}",
@@ -135,9 +309,5 @@ async def delete_photo(photo_id: int, db: Annotated[Session, Depends(get_db)]):
 
 # Helper function to obtain top matching room classification given image url
 def get_room(url: str):
-    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
-    getImage = requests.get(url, headers=headers, stream=True, timeout=10)
-    image = Image.open(BytesIO(getImage.content))
-    results = yolo_model.predict(image)
-    top1 = results[0].probs.top1
-    return results[0].names[top1]
+    image = inference.decode_image(inference.fetch_image(url))
+    return inference.classify_image(image)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Request, status
 from typing import Annotated
 from renovation_tracker.pydantic_models.renovations import (
     Renovation,
@@ -6,54 +6,66 @@ from renovation_tracker.pydantic_models.renovations import (
     RenovationUpdate,
 )
 import renovation_tracker.models as models
-from renovation_tracker.database import get_db, Session
+from renovation_tracker.database import get_async_db, AsyncSession
+from sqlalchemy import select
+from renovation_tracker import response_cache
+from renovation_tracker import serialization
 
 router = APIRouter(prefix="/renovations")
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 
 # CREATE Renovation
 @router.post("/", response_model=RenovationRead, status_code=status.HTTP_201_CREATED)
-async def create_renovation(
-    renovation: Renovation, db: Annotated[Session, Depends(get_db)]
-):
+async def create_renovation(renovation: Renovation, db: db_dependency):
     db_renovation = models.Renovations(**renovation.dict())
 
     try:
         db.add(db_renovation)
-        db.commit()
-        db.refresh(db_renovation)
+        await db.commit()
+        await db.refresh(db_renovation)
+        await response_cache.invalidate(
+            response_cache.renovations_key(renovation.listing_id)
+        )
         return db_renovation
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500, detail=f"Error occurred while creating renovation {e}"
         )
 
 
 # READ renovations for given listing id
+# Served from the response cache, If-None-Match with the ETag gets a 304
 @router.get("/{listing_id}/read", response_model=list[RenovationRead])
-async def get_renovation(listing_id: int, db: Annotated[Session, Depends(get_db)]):
-    listing = (
-        db.query(models.Listing).filter(models.Listing.listing_id == listing_id).first()
-    )
-    if listing is None:
-        raise HTTPException(
-            status_code=404, detail=f"Listing with id {listing_id} not found"
+async def get_renovation(listing_id: int, request: Request, db: db_dependency):
+    async def load():
+        listing = await db.scalar(
+            select(models.Listing.listing_id).where(
+                models.Listing.listing_id == listing_id
+            )
         )
-    return listing.renovations
+        if listing is None:
+            raise HTTPException(
+                status_code=404, detail=f"Listing with id {listing_id} not found"
+            )
+        renovations = await serialization.fetch_dicts(
+            db,
+            serialization.select_fields(models.Renovations, RenovationRead)
+            .where(models.Renovations.listing_id == listing_id)
+            .order_by(models.Renovations.renovation_id),
+        )
+        return serialization.dumps(renovations)
+
+    return await response_cache.cached_response(
+        request, response_cache.renovations_key(listing_id), load
+    )
 
 
 # READ renovations for given renovation id
 @router.get("/{renovation_id}", response_model=RenovationRead)
-async def get_renovation_by_id(
-    renovation_id: int, db: Annotated[Session, Depends(get_db)]
-):
-    renovation = (
-        db.query(models.Renovations)
-        .filter(models.Renovations.renovation_id == renovation_id)
-        .first()
-    )
+async def get_renovation_by_id(renovation_id: int, db: db_dependency):
+    renovation = await db.get(models.Renovations, renovation_id)
     if renovation is None:
         raise HTTPException(
             status_code=404, detail=f"Renovation with id {renovation_id} not found"
@@ -66,13 +78,9 @@ async def get_renovation_by_id(
 async def update_renovation(
     renovation_id: int,
     renovation: RenovationUpdate,
-    db: Annotated[Session, Depends(get_db)],
+    db: db_dependency,
 ):
-    findRenovation = (
-        db.query(models.Renovations)
-        .filter(models.Renovations.renovation_id == renovation_id)
-        .first()
-    )
+    findRenovation = await db.get(models.Renovations, renovation_id)
     if findRenovation is None:
         raise HTTPException(
             status_code=404,
@@ -82,11 +90,14 @@ async def update_renovation(
     try:
         for keys, value in update_renovation.items():
             setattr(findRenovation, keys, value)
-        db.commit()
-        db.refresh(findRenovation)
+        await db.commit()
+        await db.refresh(findRenovation)
+        await response_cache.invalidate(
+            response_cache.renovations_key(findRenovation.listing_id)
+        )
         return findRenovation
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail=f"Error occurred while updating renovation with id {renovation_id}",
@@ -95,25 +106,22 @@ async def update_renovation(
 
 # DELETE Renovation
 @router.delete("/{renovation_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_renovation(
-    renovation_id: int, db: Annotated[Session, Depends(get_db)]
-):
-    renovation = (
-        db.query(models.Renovations)
-        .filter(models.Renovations.renovation_id == renovation_id)
-        .first()
-    )
+async def delete_renovation(renovation_id: int, db: db_dependency):
+    renovation = await db.get(models.Renovations, renovation_id)
     if renovation is None:
         raise HTTPException(
             status_code=404,
             detail=f"Renovation to delete with id {renovation_id} not found",
         )
     try:
-        db.delete(renovation)
-        db.commit()
+        await db.delete(renovation)
+        await db.commit()
+        await response_cache.invalidate(
+            response_cache.renovations_key(renovation.listing_id)
+        )
         return {"message": "Renovation Deleted"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail=f"Error occurred while deleting renovation with id {renovation_id}",
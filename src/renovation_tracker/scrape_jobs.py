@@ -0,0 +1,264 @@
+"""scrape_jobs -- database backed queue of listing scrapes.
+
+`POST /listings/url` only records a job row and returns. A bounded set of
+asyncio workers claims queued rows, runs the blocking Selenium scrape in the
+threadpool and saves the listing, writing progress back to the row so clients
+can poll `GET /listings/jobs/{job_id}`. Because the queue lives in the
+database, jobs queued (or interrupted) before a restart are picked up again.
+
+A worker refreshes `claimed_at` while its job runs, and every process sweeps
+the table periodically, so a job whose worker died (a crash, a killed
+process) is requeued within `STALE_AFTER` plus one sweep, restart or not.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+import renovation_tracker.models as models
+from renovation_tracker.database import AsyncSessionLocal
+from renovation_tracker.driver_pool import POOL_SIZE
+from renovation_tracker.pydantic_models.scrape_jobs import JobStatus
+
+logger = logging.getLogger(__name__)
+
+# One worker per browser session by default, more would only wait on the pool
+SCRAPE_WORKERS = int(os.getenv("SCRAPE_WORKERS", str(POOL_SIZE)))
+# How often idle workers look for jobs queued by other processes
+POLL_INTERVAL = float(os.getenv("SCRAPE_POLL_INTERVAL", "5"))
+# Running jobs without a heartbeat for this long are assumed lost and requeued
+STALE_AFTER = float(os.getenv("SCRAPE_JOB_STALE_AFTER", "120"))
+# How often each process looks for lost jobs
+SWEEP_INTERVAL = float(os.getenv("SCRAPE_STALE_SWEEP_INTERVAL", "60"))
+MAX_ATTEMPTS = int(os.getenv("SCRAPE_MAX_ATTEMPTS", "3"))
+
+ScrapeFn = Callable[[str], Dict[str, Any]]
+SaveFn = Callable[[AsyncSession, Dict[str, Any]], Awaitable[int]]
+
+
+async def enqueue(db: AsyncSession, url: str) -> models.ScrapeJobs:
+    """Queue a scrape for `url`, reusing a job already waiting on the same url."""
+    pending = await db.scalar(
+        select(models.ScrapeJobs)
+        .where(
+            models.ScrapeJobs.url == url,
+            models.ScrapeJobs.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]),
+        )
+        .limit(1)
+    )
+    if pending is not None:
+        return pending
+    job = models.ScrapeJobs(url=url, status=JobStatus.QUEUED, progress="queued")
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    notify_workers()
+    return job
+
+
+async def claim_next(db: AsyncSession) -> Optional[models.ScrapeJobs]:
+    """Atomically move the oldest queued job to running and return it."""
+    while True:
+        job_id = await db.scalar(
+            select(models.ScrapeJobs.job_id)
+            .where(models.ScrapeJobs.status == JobStatus.QUEUED)
+            .order_by(models.ScrapeJobs.job_id)
+            .limit(1)
+        )
+        if job_id is None:
+            return None
+        # The status guard makes the claim safe across workers and processes
+        claimed = await db.execute(
+            update(models.ScrapeJobs)
+            .where(
+                models.ScrapeJobs.job_id == job_id,
+                models.ScrapeJobs.status == JobStatus.QUEUED,
+            )
+            .values(
+                status=JobStatus.RUNNING,
+                progress="starting",
+                attempts=models.ScrapeJobs.attempts + 1,
+                claimed_at=datetime.utcnow(),
+            )
+        )
+        await db.commit()
+        if claimed.rowcount == 1:
+            return await db.get(models.ScrapeJobs, job_id, populate_existing=True)
+
+
+async def requeue_stale(db: AsyncSession) -> int:
+    """Requeue running jobs whose worker went away, e.g. across a restart."""
+    cutoff = datetime.utcnow() - timedelta(seconds=STALE_AFTER)
+    stale = (
+        models.ScrapeJobs.status == JobStatus.RUNNING,
+        models.ScrapeJobs.claimed_at < cutoff,
+    )
+    failed = await db.execute(
+        update(models.ScrapeJobs)
+        .where(*stale, models.ScrapeJobs.attempts >= MAX_ATTEMPTS)
+        .values(
+            status=JobStatus.FAILED,
+            progress="failed",
+            error="Gave up after repeated interruptions",
+        )
+    )
+    requeued = await db.execute(
+        update(models.ScrapeJobs)
+        .where(*stale)
+        .values(status=JobStatus.QUEUED, progress="queued")
+    )
+    await db.commit()
+    return failed.rowcount + requeued.rowcount
+
+
+async def _set_job(job_id: int, **values):
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(models.ScrapeJobs)
+            .where(models.ScrapeJobs.job_id == job_id)
+            .values(**values)
+        )
+        await db.commit()
+
+
+async def _heartbeat(job_id: int):
+    """Keep a running job's claim fresh so the sweep leaves it alone."""
+    while True:
+        await asyncio.sleep(STALE_AFTER / 4)
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(models.ScrapeJobs)
+                    .where(
+                        models.ScrapeJobs.job_id == job_id,
+                        models.ScrapeJobs.status == JobStatus.RUNNING,
+                    )
+                    .values(claimed_at=datetime.utcnow())
+                )
+                await db.commit()
+        except Exception as e:
+            logger.warning("Could not refresh scrape job %s: %s", job_id, e)
+
+
+class ScrapeWorkerPool:
+    def __init__(self, scrape: ScrapeFn, save: SaveFn, workers: int = SCRAPE_WORKERS):
+        self.scrape = scrape
+        self.save = save
+        self.workers = workers
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        await self._sweep()
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"scrape-worker-{i}")
+            for i in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._sweeper(), name="scrape-sweeper"))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        self._wakeup.set()
+
+    async def _sweep(self):
+        try:
+            async with AsyncSessionLocal() as db:
+                requeued = await requeue_stale(db)
+        except Exception as e:
+            logger.warning("Could not recover interrupted scrape jobs: %s", e)
+            return
+        if requeued:
+            logger.info("Recovered %d interrupted scrape jobs", requeued)
+            self.notify()
+
+    async def _sweeper(self):
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL)
+            await self._sweep()
+
+    async def _worker(self):
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    job = await claim_next(db)
+            except Exception as e:
+                logger.warning("Could not claim a scrape job: %s", e)
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._run(job.job_id, job.url)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # the job row could not be updated, it is requeued once stale
+                logger.warning("Could not record scrape job %s: %s", job.job_id, e)
+
+    async def _run(self, job_id: int, url: str):
+        heartbeat = asyncio.create_task(_heartbeat(job_id))
+        try:
+            await _set_job(job_id, progress="scraping")
+            # Selenium is blocking so the scrape runs in the threadpool
+            scraped = await run_in_threadpool(self.scrape, url)
+            await _set_job(job_id, progress="saving")
+            async with AsyncSessionLocal() as db:
+                listing_id = await self.save(db, scraped)
+            await _set_job(
+                job_id,
+                status=JobStatus.DONE,
+                progress="done",
+                listing_id=listing_id,
+                source=scraped.get("source"),
+                timings=scraped.get("timings"),
+            )
+        except asyncio.CancelledError:
+            # Shutting down, hand the job to the next worker that starts
+            await asyncio.shield(
+                _set_job(job_id, status=JobStatus.QUEUED, progress="queued")
+            )
+            raise
+        except Exception as e:
+            logger.warning("Scrape job %s failed: %s", job_id, e)
+            await _set_job(
+                job_id, status=JobStatus.FAILED, progress="failed", error=str(e)[:1000]
+            )
+        finally:
+            heartbeat.cancel()
+
+
+_workers: Optional[ScrapeWorkerPool] = None
+
+
+async def start_scrape_workers(scrape: ScrapeFn, save: SaveFn):
+    global _workers
+    _workers = ScrapeWorkerPool(scrape, save)
+    await _workers.start()
+
+
+async def stop_scrape_workers():
+    global _workers
+    if _workers is not None:
+        await _workers.stop()
+        _workers = None
+
+
+def notify_workers():
+    if _workers is not None:
+        _workers.notify()
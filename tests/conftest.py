@@ -0,0 +1,54 @@
+import os
+import tempfile
+from pathlib import Path
+
+# the app reads its settings at import time, point it at a throwaway database
+WORKDIR = Path(tempfile.mkdtemp(prefix="renovation-tests-"))
+os.environ["DATABASE_URL"] = f"sqlite:///{WORKDIR / 'test.db'}"
+os.environ.update(
+    {
+        "MODEL_PRELOAD": "0",
+        "SCRAPE_WORKERS": "0",
+        "SCRAPER_WARM_SESSIONS": "0",
+        "IMAGE_CACHE_DIR": str(WORKDIR / "image_cache"),
+        "PHOTO_HASH_AT_INGEST": "0",
+    }
+)
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+import renovation_tracker.models as models  # noqa: E402
+from renovation_tracker.database import async_engine, engine  # noqa: E402
+from renovation_tracker.main import api  # noqa: E402
+
+
+# MySQL always enforces foreign keys, SQLite only when asked to
+def enable_foreign_keys(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+event.listen(engine, "connect", enable_foreign_keys)
+event.listen(async_engine.sync_engine, "connect", enable_foreign_keys)
+
+
+@pytest.fixture
+def tables():
+    models.Base.metadata.create_all(engine)
+    yield
+    models.Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def client(tables):
+    with TestClient(api) as client:
+        yield client
+
+
+@pytest.fixture
+def db():
+    with engine.connect() as conn:
+        yield conn
@@ -0,0 +1,56 @@
+import json
+
+from sqlalchemy import select
+
+import renovation_tracker.models as models
+from renovation_tracker.bulk_import import import_lines
+
+
+def row(address: str, photo: str, **fields) -> str:
+    return json.dumps(
+        {
+            "url": f"https://www.homes.com/property/{photo}/",
+            "address": address,
+            "description": "Renovated kitchen.",
+            "photos": [f"https://images.example.com/{photo}.jpg"],
+            **fields,
+        }
+    )
+
+
+def photos_by_address(db) -> dict:
+    rows = db.execute(
+        select(models.Listing.address, models.Photos.url).join(
+            models.Photos, models.Photos.listing_id == models.Listing.listing_id
+        )
+    )
+    return {address: url for address, url in rows}
+
+
+def test_addresses_differing_only_in_case_keep_their_own_photos(tables, db):
+    # SQLite compares addresses exactly, so these are two listings
+    lines = [
+        row("1 Main St Springfield, VA 22153", "lower"),
+        row("1 MAIN ST Springfield, VA 22153", "upper"),
+    ]
+
+    result = import_lines(db, lines, "ndjson")
+
+    assert (result.imported, result.failed) == (2, 0)
+    assert photos_by_address(db) == {
+        "1 Main St Springfield, VA 22153": "https://images.example.com/lower.jpg",
+        "1 MAIN ST Springfield, VA 22153": "https://images.example.com/upper.jpg",
+    }
+
+
+def test_reimport_updates_the_existing_listing(tables, db):
+    address = "2 Oak Ave Springfield, VA 22153"
+    import_lines(db, [row(address, "first", price=1)], "ndjson")
+
+    result = import_lines(db, [row(address, "second", price=2)], "ndjson")
+
+    assert result.imported == 1
+    listings = db.execute(select(models.Listing.listing_id, models.Listing.price)).all()
+    assert len(listings) == 1 and listings[0].price == 2
+    photos = db.scalars(select(models.Photos.listing_id)).all()
+    assert photos == [listings[0].listing_id] * 2
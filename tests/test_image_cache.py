@@ -0,0 +1,66 @@
+import asyncio
+
+import httpx
+
+from renovation_tracker.image_cache import ImageCache
+
+URL = "https://photos.example.com/1.jpg"
+
+
+def test_aget_caches_and_revalidates(tmp_path):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=b"jpeg bytes", headers={"ETag": '"v1"'})
+
+    async def fetch_three_times(cache: ImageCache):
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            first = await cache.aget(URL, client)
+            second = await cache.aget(URL, client)
+            # every entry is stale right away, so this one revalidates
+            cache.max_age = 0
+            third = await cache.aget(URL, client)
+        return first, second, third
+
+    cache = ImageCache(tmp_path, max_bytes=1024 * 1024, max_age=3600)
+    try:
+        assert asyncio.run(fetch_three_times(cache)) == (b"jpeg bytes",) * 3
+        assert len(requests) == 2
+        stats = cache.stats()
+        assert (stats["misses"], stats["hits"], stats["revalidated"]) == (1, 1, 1)
+    finally:
+        cache.close()
+
+
+def test_store_evicts_least_recently_used(tmp_path):
+    cache = ImageCache(tmp_path, max_bytes=10, max_age=3600)
+    try:
+        cache.store("a", b"123456", None, None)
+        cache.store("b", b"abcdef", None, None)
+
+        assert cache.lookup("a") is None
+        assert cache.read(cache.lookup("b")) == b"abcdef"
+        assert cache.stats()["evictions"] == 1
+    finally:
+        cache.close()
+
+
+def test_size_bound_holds_across_workers_sharing_the_directory(tmp_path):
+    # two workers opened the cache before either stored anything
+    first = ImageCache(tmp_path, max_bytes=10, max_age=3600)
+    second = ImageCache(tmp_path, max_bytes=10, max_age=3600)
+    try:
+        first.store("a", b"123456", None, None)
+        second.store("b", b"abcdef", None, None)
+
+        assert first.lookup("a") is None
+        assert second.read(second.lookup("b")) == b"abcdef"
+        assert first.stats()["bytes"] == second.stats()["bytes"] == 6
+        blobs = [p for p in (tmp_path / "blobs").rglob("*") if p.is_file()]
+        assert len(blobs) == 1
+    finally:
+        first.close()
+        second.close()
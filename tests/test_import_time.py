@@ -0,0 +1,82 @@
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+import pytest
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+# scraping, imaging and model runtimes, imported when a feature first needs them
+HEAVY = {
+    "selenium",
+    "webdriver_manager",
+    "bs4",
+    "soupsieve",
+    "lxml",
+    "numpy",
+    "PIL",
+    "torch",
+    "torchvision",
+    "ultralytics",
+    "onnxruntime",
+    "cv2",
+}
+# Third party packages every worker imports, the budget is a multiple of their
+# import time so it holds on slow and fast machines alike. The API measures
+# about 1.5x; before imports were made lazy it was over 3x
+FLOOR = ("fastapi", "sqlalchemy", "httpx")
+BUDGET_RATIO = 2.5
+RUNS = 5
+
+
+def import_times(statement: str) -> Dict[str, int]:
+    """Cumulative import time in us of every module `statement` imports."""
+    env = {
+        **os.environ,
+        # any connection attempt at import time fails on this path
+        "DATABASE_URL": "sqlite:////nonexistent-renovation-tests/import.db",
+        "PYTHONPATH": str(SRC),
+    }
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "cumulative" not in line:
+            _, cumulative, name = line.split("|")
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "renovation_tracker.main",
+        "renovation_tracker.db_admin",
+        "renovation_tracker.bulk_import",
+    ],
+)
+def test_import_needs_no_database_or_heavy_dependencies(module):
+    imported = {name.split(".")[0] for name in import_times(f"import {module}")}
+
+    assert not imported & HEAVY
+
+
+def test_api_import_time_budget():
+    api, floor = [], []
+    for _ in range(RUNS):
+        api.append(import_times("import renovation_tracker.main")["renovation_tracker.main"])
+        times = import_times(f"import {', '.join(FLOOR)}")
+        floor.append(sum(times[name] for name in FLOOR))
+
+    ratio = statistics.median(api) / statistics.median(floor)
+    assert ratio <= BUDGET_RATIO, (
+        f"importing the API takes {ratio:.2f}x its framework imports "
+        f"({statistics.median(api) / 1000:.0f} ms), budget {BUDGET_RATIO}x"
+    )
@@ -0,0 +1,51 @@
+import asyncio
+import threading
+
+from renovation_tracker.inference_scheduler import BatchScheduler
+
+
+def test_cancelled_caller_does_not_stop_the_scheduler():
+    release = threading.Event()
+    seen = []
+
+    def run_batch(items):
+        release.wait(5)
+        seen.append(list(items))
+        return [item * 2 for item in items]
+
+    scheduler = BatchScheduler(run_batch, max_batch_size=8, max_wait_ms=1)
+
+    async def scenario():
+        # the first batch blocks the worker while the rest queue up behind it
+        running = asyncio.wrap_future(scheduler.submit(0))
+        await asyncio.sleep(0.05)
+        gone = asyncio.wrap_future(scheduler.submit(1))
+        kept = asyncio.wrap_future(scheduler.submit(2))
+        gone.cancel()
+        # a caller that disconnects while its batch is running
+        running.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.wait_for(kept, 5)
+
+    try:
+        assert asyncio.run(scenario()) == 4
+        assert seen == [[0], [2]]
+        # the worker survived and still serves new submissions
+        assert scheduler.submit(3).result(timeout=5) == 6
+        assert scheduler.errors == 0
+    finally:
+        scheduler.stop()
+
+
+def test_failed_batch_resolves_every_future():
+    def run_batch(items):
+        raise ValueError("bad batch")
+
+    scheduler = BatchScheduler(run_batch, max_batch_size=4, max_wait_ms=1)
+    try:
+        future = scheduler.submit(1)
+        assert isinstance(future.exception(timeout=5), ValueError)
+        assert isinstance(scheduler.submit(2).exception(timeout=5), ValueError)
+    finally:
+        scheduler.stop()
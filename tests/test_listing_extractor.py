@@ -0,0 +1,20 @@
+from pathlib import Path
+
+from renovation_tracker import listing_extractor
+
+FIXTURE = Path(__file__).parent.parent / "benchmarks" / "fixtures" / "homes_listing.html"
+
+
+def test_parse_listing_fixture():
+    fields = listing_extractor.parse_listing(FIXTURE.read_text(encoding="utf-8"))
+
+    assert " ".join(fields["address"].split()) == "12301 Fawn Lake Pkwy Spotsylvania, VA 22551"
+    assert fields["description"].startswith("Luxury meets lake living at 12301 Fawn Lake Parkway")
+    assert fields["price"] == 925000.0
+    assert fields["bedroom"] == 5.0
+    assert fields["bathroom"] == 4.5
+    assert fields["year_built"] == 2022
+    photos = fields["photos"]
+    assert len(photos) == len(set(photos)) == 40
+    assert photos[0] == "https://images.homes.com/listings/102/5832-red-fox-dr-spotsylvania-va-0.jpg"
+    assert listing_extractor.is_complete(fields)
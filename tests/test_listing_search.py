@@ -0,0 +1,83 @@
+import time
+
+import pytest
+from sqlalchemy import insert
+
+import renovation_tracker.models as models
+from renovation_tracker import listing_search
+from renovation_tracker.database import Session, engine
+
+
+@pytest.fixture(autouse=True)
+def fresh_index(monkeypatch):
+    monkeypatch.setattr(listing_search, "_index", None)
+    monkeypatch.setattr(listing_search, "_stale", True)
+
+
+def search(client, q: str):
+    response = client.get("/listings/search", params={"q": q})
+    assert response.status_code == 200
+    return [hit["listing_id"] for hit in response.json()]
+
+
+def add_listing(n: int, description: str) -> int:
+    with Session() as session:
+        listing = models.Listing(
+            url=f"https://www.homes.com/property/search-{n}/",
+            address=f"{n} Search St Springfield, VA 22153",
+            description=description,
+        )
+        session.add(listing)
+        session.commit()
+        return listing.listing_id
+
+
+def test_commits_update_the_index(client):
+    listing_id = add_listing(1, "Granite kitchen with a new roof.")
+    assert search(client, "granite") == [listing_id]
+
+    with Session() as session:
+        session.get(models.Listing, listing_id).description = "Marble kitchen."
+        session.commit()
+    assert search(client, "granite") == []
+    assert search(client, "marble") == [listing_id]
+
+    with Session() as session:
+        session.delete(session.get(models.Listing, listing_id))
+        session.commit()
+    assert search(client, "marble") == []
+
+
+def test_rolled_back_writes_are_not_indexed(client):
+    listing_id = add_listing(1, "Granite kitchen.")
+    assert search(client, "granite") == [listing_id]
+
+    with Session() as session:
+        session.get(models.Listing, listing_id).description = "Sauna and cellar."
+        session.flush()
+        session.rollback()
+
+    assert search(client, "sauna") == []
+    assert search(client, "granite") == [listing_id]
+
+
+def test_other_processes_writes_show_up_after_ttl(client, monkeypatch):
+    add_listing(1, "Granite kitchen.")
+    assert search(client, "cellar") == []
+    # another process writes the table directly, this one sees no events
+    with engine.begin() as conn:
+        listing_id = conn.execute(
+            insert(models.Listing).values(
+                url="https://www.homes.com/property/search-2/",
+                address="2 Search St Springfield, VA 22153",
+                description="Wine cellar.",
+            )
+        ).inserted_primary_key[0]
+    assert search(client, "cellar") == []
+
+    monkeypatch.setattr(listing_search, "SEARCH_INDEX_TTL", 0)
+    deadline = time.monotonic() + 5
+    # the expired index still answers while it is rebuilt in the background
+    while search(client, "cellar") != [listing_id]:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
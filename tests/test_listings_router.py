@@ -0,0 +1,44 @@
+from sqlalchemy import insert, select
+
+import renovation_tracker.models as models
+
+
+def create_listing(client, n: int = 1) -> int:
+    response = client.post(
+        "/listings/",
+        json={
+            "url": f"https://www.homes.com/property/test-{n}/",
+            "address": f"{n} Test St Springfield, VA 22153",
+            "description": "Renovated kitchen with new cabinets.",
+        },
+    )
+    assert response.status_code == 201
+    return response.json()["listing_id"]
+
+
+def test_delete_listing(client):
+    listing_id = create_listing(client)
+
+    assert client.delete(f"/listings/{listing_id}").status_code == 204
+    assert client.get(f"/listings/{listing_id}").status_code == 404
+
+
+def test_delete_listing_created_by_scrape_job(client, db):
+    listing_id = create_listing(client)
+    job_id = db.execute(
+        insert(models.ScrapeJobs).values(
+            url=f"https://www.homes.com/property/test-{listing_id}/",
+            status="done",
+            listing_id=listing_id,
+        )
+    ).inserted_primary_key[0]
+    db.commit()
+
+    assert client.delete(f"/listings/{listing_id}").status_code == 204
+
+    job = client.get(f"/listings/jobs/{job_id}")
+    assert job.status_code == 200
+    assert job.json()["listing_id"] is None
+    assert db.scalar(
+        select(models.ScrapeJobs.listing_id).where(models.ScrapeJobs.job_id == job_id)
+    ) is None
@@ -0,0 +1,28 @@
+from renovation_tracker import metrics
+from renovation_tracker.main import PREDICT_CHUNK_SIZE
+
+
+def test_batch_prediction_is_timed_in_this_process(client, monkeypatch):
+    monkeypatch.setattr(metrics, "TIMING_HEADERS", True)
+    # more than one chunk, so the work runs in process pool workers
+    descriptions = ["Renovated kitchen."] * (PREDICT_CHUNK_SIZE + 1)
+
+    response = client.post(
+        "/predict-renovations/batch", json={"descriptions": descriptions}
+    )
+
+    assert response.status_code == 200
+    timing = response.headers["Server-Timing"]
+    assert "nlp.extract_renovations_batch;dur=" in timing
+    assert "total;dur=" in timing
+    exported = client.get("/metrics").text
+    assert 'stage="nlp.extract_renovations_batch"' in exported
+    assert 'route="/predict-renovations/batch"' in exported
+
+
+def test_unmatched_requests_are_counted(client):
+    assert client.get("/no-such-route").status_code == 404
+
+    exported = client.get("/metrics").text
+    assert 'route="unmatched"' in exported and 'status="404"' in exported
+    assert "Server-Timing" not in client.get("/metrics").headers
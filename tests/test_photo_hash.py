@@ -0,0 +1,51 @@
+import asyncio
+
+import renovation_tracker.models as models
+from renovation_tracker import photo_hash
+from renovation_tracker.database import AsyncSessionLocal
+
+CLASSIFIED = "f0e1d2c3b4a59687"
+
+
+def flip(phash: str, *bits: int) -> str:
+    value = int(phash, 16)
+    for bit in bits:
+        value ^= 1 << bit
+    return f"{value:016x}"
+
+
+def known_rooms(hashes):
+    async def run():
+        async with AsyncSessionLocal() as db:
+            return await photo_hash.known_rooms(db, hashes)
+
+    return asyncio.run(run())
+
+
+def test_phash_sets_band_columns():
+    photo = models.Photos(url="https://photos.example.com/1.jpg", phash=CLASSIFIED)
+
+    assert photo.phash_mid == CLASSIFIED[6:11]
+    assert photo.phash_tail == CLASSIFIED[11:]
+
+
+def test_known_rooms_matches_near_duplicates(tables):
+    async def add_photo():
+        async with AsyncSessionLocal() as db:
+            db.add(
+                models.Photos(
+                    url="https://photos.example.com/1.jpg",
+                    phash=CLASSIFIED,
+                    room_type="Kitchen",
+                )
+            )
+            await db.commit()
+
+    asyncio.run(add_photo())
+    # one flip in the first band, one each in the head and tail
+    near = [flip(CLASSIFIED, 63), flip(CLASSIFIED, 60, 2)]
+    far = flip(CLASSIFIED, 63, 40, 2)
+
+    rooms = known_rooms([CLASSIFIED, *near, far, None])
+
+    assert rooms == {CLASSIFIED: "Kitchen", near[0]: "Kitchen", near[1]: "Kitchen"}
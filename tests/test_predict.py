@@ -0,0 +1,39 @@
+from renovation_tracker.main import PREDICT_CHUNK_SIZE
+
+
+def renovated(result: dict) -> dict:
+    return {item["name"]: item["renovated"] for item in result["items"]}
+
+
+def test_predict_batch_keeps_request_order(client):
+    descriptions = ["Renovated kitchen.", "Original 1970s bathroom."]
+
+    response = client.post(
+        "/predict-renovations/batch", json={"descriptions": descriptions}
+    )
+
+    assert response.status_code == 200
+    results = [item["result"] for item in response.json()["results"]]
+    assert [r["raw_text"] for r in results] == descriptions
+    single = [
+        client.post("/predict-renovations", json={"description": d}).json()["result"]
+        for d in descriptions
+    ]
+    assert [r["items"] for r in results] == [r["items"] for r in single]
+
+
+def test_predict_batch_across_process_pool(client):
+    # more than one chunk, so the batch fans out to pool workers
+    descriptions = [
+        f"Listing {i}: fully renovated kitchen and a new roof."
+        for i in range(PREDICT_CHUNK_SIZE * 2 + 1)
+    ]
+
+    response = client.post(
+        "/predict-renovations/batch", json={"descriptions": descriptions}
+    )
+
+    assert response.status_code == 200
+    results = [item["result"] for item in response.json()["results"]]
+    assert [r["raw_text"] for r in results] == descriptions
+    assert all(renovated(r)["kitchen"] and renovated(r)["roof"] for r in results)
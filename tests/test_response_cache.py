@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+from renovation_tracker.response_cache import MemorySharedTier, ResponseCache
+
+
+async def load_body(body: bytes) -> bytes:
+    return body
+
+
+def test_other_workers_see_a_write_once_their_local_copy_expires():
+    # two workers with no shared tier, only the writer's copy is invalidated
+    writer = ResponseCache(10, local_ttl=60)
+    reader = ResponseCache(10, local_ttl=0.05)
+
+    async def run():
+        await writer.get_or_load("listing:1", lambda: load_body(b"v1"))
+        before = await reader.get_or_load("listing:1", lambda: load_body(b"v1"))
+        await writer.invalidate("listing:1")
+        cached = await reader.get_or_load("listing:1", lambda: load_body(b"v2"))
+        time.sleep(0.06)
+        expired = await reader.get_or_load("listing:1", lambda: load_body(b"v2"))
+        return before, cached, expired
+
+    before, cached, expired = asyncio.run(run())
+    assert (before.body, cached.body, expired.body) == (b"v1", b"v1", b"v2")
+
+
+def test_invalidate_drops_both_tiers():
+    cache = ResponseCache(10, local_ttl=60, shared=MemorySharedTier())
+    bodies = iter([b"v1", b"v2"])
+
+    async def load():
+        return next(bodies)
+
+    async def run():
+        first = await cache.get_or_load("listing:1", load)
+        cached = await cache.get_or_load("listing:1", load)
+        await cache.invalidate("listing:1")
+        return first, cached, await cache.get_or_load("listing:1", load)
+
+    first, cached, reloaded = asyncio.run(run())
+    assert (first.body, cached.body, reloaded.body) == (b"v1", b"v1", b"v2")
+    assert first.etag == cached.etag != reloaded.etag
+
+
+def test_load_invalidated_while_running_is_not_stored():
+    cache = ResponseCache(10, local_ttl=60)
+
+    async def run():
+        async def slow_load():
+            await cache.invalidate("listing:1")  # a write lands mid-read
+            return b"old"
+
+        async def load():
+            return b"new"
+
+        stale = await cache.get_or_load("listing:1", slow_load)
+        return stale, await cache.get_or_load("listing:1", load)
+
+    stale, fresh = asyncio.run(run())
+    assert (stale.body, fresh.body) == (b"old", b"new")
+
+
+def test_slow_load_in_one_worker_does_not_undo_a_write_in_another():
+    shared = MemorySharedTier()
+    slow = ResponseCache(10, local_ttl=60, shared=shared)
+    writer = ResponseCache(10, local_ttl=60, shared=shared)
+    later = ResponseCache(10, local_ttl=60, shared=shared)
+
+    async def run():
+        async def slow_load():
+            # another worker commits a write while this read is running
+            await writer.invalidate("listing:1")
+            return b"old"
+
+        stale = await slow.get_or_load("listing:1", slow_load)
+        fresh = await later.get_or_load("listing:1", lambda: load_body(b"new"))
+        again = await writer.get_or_load("listing:1", lambda: load_body(b"newer"))
+        return stale, fresh, again
+
+    stale, fresh, again = asyncio.run(run())
+    assert stale.body == b"old"
+    assert fresh.body == b"new"
+    # the fresh load was stored for everyone
+    assert again.body == b"new"
+    assert writer.shared_hits == 1
+
+
+def test_clear_turns_away_every_shared_body():
+    shared = MemorySharedTier()
+    first = ResponseCache(10, local_ttl=60, shared=shared)
+    second = ResponseCache(10, local_ttl=60, shared=shared)
+
+    async def run():
+        await first.get_or_load("listing:1", lambda: load_body(b"v1"))
+        await first.clear()
+        return await second.get_or_load("listing:1", lambda: load_body(b"v2"))
+
+    assert asyncio.run(run()).body == b"v2"
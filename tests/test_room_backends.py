@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from renovation_tracker.room_backends import preprocess
+
+augment = pytest.importorskip("ultralytics.data.augment")
+
+SIZES = [(640, 480), (480, 640), (1024, 683), (224, 224), (225, 300), (123, 97), (3000, 2000)]
+
+
+def synthetic_photo(size, seed: int) -> Image.Image:
+    rng = np.random.default_rng(seed)
+    w, h = size
+    # smooth gradients plus fine noise, so resampling differences show
+    y, x = np.mgrid[0:h, 0:w]
+    base = np.stack([x * 255 / w, y * 255 / h, (x + y) * 127 / (w + h)], axis=-1)
+    noise = rng.normal(0, 20, (h, w, 3))
+    return Image.fromarray(np.clip(base + noise, 0, 255).astype(np.uint8))
+
+
+@pytest.mark.parametrize("imgsz", [224, 160])
+def test_preprocess_matches_ultralytics_classify_transforms(imgsz):
+    images = [synthetic_photo(size, seed) for seed, size in enumerate(SIZES)]
+    transforms = augment.classify_transforms(imgsz)
+
+    expected = np.stack([transforms(image).numpy() for image in images])
+
+    batch = preprocess(images, imgsz)
+    assert batch.shape == expected.shape
+    assert batch.dtype == np.float32
+    np.testing.assert_allclose(batch, expected, rtol=0, atol=1e-6)
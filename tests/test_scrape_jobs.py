@@ -0,0 +1,81 @@
+import asyncio
+import time
+from datetime import datetime
+
+from sqlalchemy import insert, select
+
+import renovation_tracker.models as models
+from renovation_tracker import scrape_jobs
+from renovation_tracker.pydantic_models.scrape_jobs import JobStatus
+
+URL = "https://www.homes.com/property/test-1/"
+
+
+async def save(db, scraped):
+    return None
+
+
+def job_status(db, job_id: int) -> str:
+    return db.scalar(
+        select(models.ScrapeJobs.status).where(models.ScrapeJobs.job_id == job_id)
+    )
+
+
+def run_pool(scrape, until, workers: int = 1, timeout: float = 5):
+    async def scenario():
+        pool = scrape_jobs.ScrapeWorkerPool(scrape, save, workers=workers)
+        await pool.start()
+        try:
+            deadline = time.monotonic() + timeout
+            while not until() and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+        finally:
+            await pool.stop()
+
+    asyncio.run(scenario())
+
+
+def test_sweep_requeues_a_job_orphaned_by_a_crashed_worker(tables, db, monkeypatch):
+    monkeypatch.setattr(scrape_jobs, "STALE_AFTER", 0.3)
+    monkeypatch.setattr(scrape_jobs, "SWEEP_INTERVAL", 0.05)
+    # claimed moments ago by a worker that has since died, so the startup
+    # sweep does not consider it stale yet
+    job_id = db.execute(
+        insert(models.ScrapeJobs).values(
+            url=URL,
+            status=JobStatus.RUNNING,
+            progress="scraping",
+            attempts=1,
+            claimed_at=datetime.utcnow(),
+        )
+    ).inserted_primary_key[0]
+    db.commit()
+
+    run_pool(lambda url: {"url": url}, lambda: job_status(db, job_id) == JobStatus.DONE)
+
+    assert job_status(db, job_id) == JobStatus.DONE
+
+
+def test_heartbeat_keeps_a_slow_job_from_being_requeued(tables, db, monkeypatch):
+    monkeypatch.setattr(scrape_jobs, "STALE_AFTER", 0.3)
+    monkeypatch.setattr(scrape_jobs, "SWEEP_INTERVAL", 0.05)
+    job_id = db.execute(
+        insert(models.ScrapeJobs).values(
+            url=URL, status=JobStatus.QUEUED, progress="queued"
+        )
+    ).inserted_primary_key[0]
+    db.commit()
+    calls = []
+
+    def slow_scrape(url):
+        calls.append(url)
+        time.sleep(1)
+        return {"url": url}
+
+    # a second, idle worker would pick the job up again if it were requeued
+    run_pool(
+        slow_scrape, lambda: job_status(db, job_id) == JobStatus.DONE, workers=2
+    )
+
+    assert job_status(db, job_id) == JobStatus.DONE
+    assert calls == [URL]